@@ -0,0 +1,64 @@
+"""
+Сравнение агрегации по картам: прежний цикл по картам с масками и один проход groupby.
+
+Запуск: python -m benchmarks.bench_cards [число строк] [число карт]
+"""
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.cards import CARD_METRICS, aggregate_cards
+
+
+def make_operations(rows: int, cards: int, seed: int = 42) -> pd.DataFrame:
+    """Синтетические операции с заданным числом строк и карт"""
+    rng = np.random.default_rng(seed)
+    card_numbers = np.array([f"*{number:04d}" for number in range(cards)], dtype=object)
+    categories = np.array(['Супермаркеты', 'Транспорт', 'Фастфуд', 'Аптеки', 'ЖКХ'], dtype=object)
+    return pd.DataFrame({
+        'Номер карты': card_numbers[rng.integers(0, cards, rows)],
+        'Сумма операции': -rng.gamma(2.0, 500.0, rows).round(2),
+        'Категория': categories[rng.integers(0, len(categories), rows)],
+    })
+
+
+def legacy_process_card_data(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Прежняя реализация process_card_data: маска по всему DataFrame на каждую карту"""
+    result = []
+    for card in df['Номер карты'].dropna().unique():
+        total_spent = df[df['Номер карты'] == card]['Сумма операции'].sum()
+        result.append({
+            "last_digits": card[-4:],
+            "total_spent": round(total_spent, 2),
+            "cashback": round(total_spent / -100, 2)
+        })
+    return result
+
+
+def measure(func: Callable[[], object]) -> float:
+    """Время выполнения функции в секундах"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cards = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    df = make_operations(rows, cards)
+
+    legacy = measure(lambda: legacy_process_card_data(df))
+    grouped = measure(lambda: aggregate_cards(df))
+    all_metrics = measure(lambda: aggregate_cards(df, CARD_METRICS))
+
+    print(f"{rows} строк, {cards} карт")
+    print(f"цикл по картам:              {legacy * 1000:.1f} мс")
+    print(f"groupby:                     {grouped * 1000:.1f} мс ({legacy / grouped:.1f}x)")
+    print(f"groupby, все показатели:     {all_metrics * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Сравнение времени холодной загрузки operations.xlsx и загрузки из колоночного кэша.
+
+Запуск: python -m benchmarks.bench_operations_cache [путь к xlsx]
+"""
+import os
+import sys
+import time
+from typing import Callable
+
+from src.columnar_cache import compute_file_hash, get_cache_path
+from src.operations import OPERATIONS_FILE_PATH, clear_operations_cache, load_operations
+
+
+def measure(func: Callable[[], object], repeat: int = 3) -> float:
+    """Лучшее время выполнения функции в секундах"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def cold_load(file_path: str) -> None:
+    """Загрузка без кэша в памяти и на диске (удаляется только кэш DataFrame этой версии файла)"""
+    clear_operations_cache()
+    cache_path = get_cache_path(file_path, compute_file_hash(file_path))
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+    load_operations(file_path)
+
+
+def warm_load(file_path: str) -> None:
+    """Загрузка из колоночного кэша в новом процессе (без кэша в памяти)"""
+    clear_operations_cache()
+    load_operations(file_path)
+
+
+def main() -> None:
+    file_path = sys.argv[1] if len(sys.argv) > 1 else OPERATIONS_FILE_PATH
+
+    cold = measure(lambda: cold_load(file_path))
+    load_operations(file_path)
+    warm = measure(lambda: warm_load(file_path))
+
+    print(f"xlsx (холодный старт): {cold * 1000:.1f} мс")
+    print(f"колоночный кэш:        {warm * 1000:.1f} мс")
+    print(f"ускорение:             {cold / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
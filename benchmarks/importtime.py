@@ -0,0 +1,66 @@
+"""
+Проверка времени импорта модуля по выводу `python -X importtime`.
+
+Запуск:
+    python -m benchmarks.importtime src.main --budget 0.15 --forbid pandas --forbid requests
+
+Команда завершается с кодом 1, если импорт дольше бюджета или загружает запрещенные модули.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_MODULE = 'src.main'
+# Бюджет (секунды) на импорт модуля командной строки без тяжелых зависимостей
+DEFAULT_BUDGET = 0.15
+DEFAULT_FORBIDDEN = ['pandas', 'numpy', 'requests', 'dotenv', 'openpyxl', 'pyarrow']
+
+
+def measure_imports(module: str) -> Dict[str, int]:
+    """
+    Импортирует модуль в отдельном процессе с -X importtime и возвращает
+    накопленное время импорта (микросекунды) для каждого загруженного модуля.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                               capture_output=True, text=True, cwd=root, check=True)
+    timings: Dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def check_imports(module: str = DEFAULT_MODULE, budget: float = DEFAULT_BUDGET,
+                  forbidden: Sequence[str] = DEFAULT_FORBIDDEN) -> List[str]:
+    """Нарушения бюджета: время импорта модуля и запрещенные модули среди загруженных"""
+    timings = measure_imports(module)
+    problems = []
+    seconds = timings.get(module, 0) / 1e6
+    if seconds > budget:
+        problems.append(f"Импорт {module} занимает {seconds:.3f} с, бюджет {budget:.3f} с")
+    for name in forbidden:
+        if name in timings:
+            problems.append(f"Импорт {module} загружает {name} ({timings[name] / 1e6:.3f} с)")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Проверка времени импорта модуля")
+    parser.add_argument('module', nargs='?', default=DEFAULT_MODULE)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help="допустимое время импорта, секунды")
+    parser.add_argument('--forbid', action='append', help="модуль, который не должен импортироваться")
+    args = parser.parse_args(argv)
+
+    problems = check_imports(args.module, args.budget, args.forbid or DEFAULT_FORBIDDEN)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Набор замеров для всех путей анализа на синтетических операциях (benchmarks.synthetic).
+HTTP запросы к API курсов валют и цен акций заменены заглушками.
+
+Запуск:
+    python -m benchmarks.suite --rows 10000 100000 --output bench.json
+    python -m benchmarks.suite --rows 10000 100000 --baseline bench.json
+
+С --baseline результаты сравниваются с сохраненными, и при замедлении больше порога
+команда завершается с кодом 1.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_operations, to_export_format
+from src import encoding
+from src.columnar_cache import compute_file_hash, get_object_cache_path, load_cached_frame, save_cached_frame
+from src.cube import clear_cube_cache
+from src.operations import load_operations, normalize_operations
+from src.reports import spending_by_category
+from src.response_cache import response_cache
+from src.search_index import INDEX_CACHE_NAME, clear_search_index_cache
+from src.services import analyze_cashback_categories, search_transactions
+from src.utils import get_top_transactions, process_card_data
+from src.views import base_func_module_one
+
+DEFAULT_ROWS = [10_000, 100_000]
+DEFAULT_REPEAT = 5
+# Замедление больше этой доли относительно базовых результатов считается регрессией
+DEFAULT_THRESHOLD = 0.2
+# Разница меньше этого времени (секунды) не считается регрессией - это шум измерения
+MIN_REGRESSION_SECONDS = 0.002
+# Приведение строк выгрузки к типам схемы замеряется только до этого размера
+RAW_MAX_ROWS = 1_000_000
+
+Case = Callable[[], Any]
+
+
+def measure(func: Case, repeat: int) -> List[float]:
+    """Время каждого из repeat вызовов функции (после одного прогревочного вызова)"""
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def cold(clear: Callable[[], None], func: Case) -> Case:
+    """Замер с пустыми кэшами: clear вызывается перед каждым вызовом func"""
+    def case() -> Any:
+        clear()
+        return func()
+    return case
+
+
+def build_cases(df: pd.DataFrame, workdir: str) -> Dict[str, Optional[Case]]:
+    """Замеряемые операции над DataFrame; None - операция пропускается для этого размера"""
+    last_date = df['Дата операции'].max()
+    year, month, day = last_date.year, last_date.month, last_date.day
+
+    raw = to_export_format(df) if len(df) <= RAW_MAX_ROWS else None
+    # Вместо Excel файла - файл-заглушка с готовым колоночным кэшем: load_operations читает операции
+    # из кэша, и поиск и кешбэк идут по снимку файла с общими индексом, кубом и кэшем ответов
+    cache_source = os.path.join(workdir, f"operations_{len(df)}.xlsx")
+    with open(cache_source, 'w', encoding='utf-8') as f:
+        f.write(f"benchmark {len(df)}")
+    content_hash = compute_file_hash(cache_source)
+    save_cached_frame(cache_source, content_hash, df)
+    # Заглушку нельзя прочитать как Excel, поэтому кэш на диске включается и при OPERATIONS_DISK_CACHE=0
+    with patch('src.operations.DISK_CACHE_ENABLED', True):
+        snapshot = load_operations(cache_source)
+
+    def clear_search() -> None:
+        # Индекс строится заново и сохраняется на диск, как при первом поиске по новой версии файла
+        clear_search_index_cache()
+        index_path = get_object_cache_path(cache_source, content_hash, INDEX_CACHE_NAME)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+    def clear_cashback() -> None:
+        clear_cube_cache()
+        response_cache.clear()
+
+    # Отчет вызывается без декоратора, чтобы замерялся расчет, а не запись файла
+    spending = getattr(spending_by_category, '__wrapped__', spending_by_category)
+
+    return {
+        "load_normalize": (lambda: normalize_operations(raw.copy())) if raw is not None else None,
+        "load_columnar_cache": lambda: load_cached_frame(cache_source, content_hash),
+        "process_card_data": lambda: process_card_data(df),
+        "get_top_transactions": lambda: get_top_transactions(df),
+        "search_transactions_cold": cold(clear_search, lambda: search_transactions('колхоз', snapshot)),
+        "search_transactions": lambda: search_transactions('колхоз', snapshot),
+        "analyze_cashback_categories_cold": cold(clear_cashback,
+                                                 lambda: analyze_cashback_categories(year, month, snapshot)),
+        "analyze_cashback_categories": lambda: analyze_cashback_categories(year, month, snapshot),
+        "spending_by_category": lambda: spending(df, 'Супермаркеты', year, month, day),
+        "home_page": lambda: base_func_module_one(last_date.strftime('%Y-%m-%d %H:%M:%S'), df,
+                                                  {"user_stocks": ["AAPL", "AMZN"]}),
+    }
+
+
+def run(rows_list: List[int], repeat: int, cases: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Выполняет замеры для всех размеров и возвращает результаты в виде словаря для JSON"""
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, \
+            patch('src.views.get_currency_rates', return_value=[{"currency": "USD", "rate": 73.21}]), \
+            patch('src.views.get_stock_prices', return_value=[{"stock": "AAPL", "price": 150.12}]), \
+            patch('src.views.EXCHANGE_RATES_API_KEY', 'benchmark'), \
+            patch('src.views.ALPHA_VANTAGE_API_KEY', 'benchmark'):
+        for rows in rows_list:
+            df = generate_operations(rows)
+            for name, func in build_cases(df, workdir).items():
+                if cases and name not in cases:
+                    continue
+                if func is None:
+                    print(f"{name:<30} {rows:>10} пропущено", file=sys.stderr)
+                    continue
+                timings = measure(func, repeat)
+                result: Dict[str, Any] = {"case": name, "rows": rows, "min": min(timings),
+                                          "median": statistics.median(timings), "repeat": repeat}
+                results.append(result)
+                print(f"{name:<30} {rows:>10} {result['median'] * 1000:>10.2f} мс", file=sys.stderr)
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "json_backend": encoding.JSON_BACKEND,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Сравнивает медианы замеров с базовыми. Возвращает строки сравнения для общих замеров;
+    regression=True, если замедление больше threshold и больше MIN_REGRESSION_SECONDS.
+    """
+    def by_key(report: Dict[str, Any]) -> Dict[Tuple[str, int], float]:
+        return {(result["case"], result["rows"]): result["median"] for result in report["results"]}
+
+    baseline_medians = by_key(baseline)
+    rows = []
+    for key, median in by_key(current).items():
+        if key not in baseline_medians:
+            continue
+        base = baseline_medians[key]
+        ratio = median / base if base > 0 else float('inf')
+        rows.append({"case": key[0], "rows": key[1], "baseline": base, "current": median, "ratio": ratio,
+                     "regression": ratio > 1 + threshold and median - base > MIN_REGRESSION_SECONDS})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры путей анализа на синтетических операциях")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS,
+                        help="размеры синтетических данных (от 10000 до 10000000 строк)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="число замеров каждого случая")
+    parser.add_argument('--case', action='append', help="замерять только этот случай (можно несколько раз)")
+    parser.add_argument('--output', help="файл для результатов в формате JSON (по умолчанию - stdout)")
+    parser.add_argument('--baseline', help="файл с базовыми результатами для сравнения")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимое замедление относительно базовых результатов (доля)")
+    args = parser.parse_args(argv)
+    # Сообщения модулей о каждом вызове не нужны в выводе замеров
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = run(args.rows, args.repeat, args.case)
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            comparison = compare(report, json.load(f), args.threshold)
+        report["comparison"] = comparison
+        for row in comparison:
+            mark = "ЗАМЕДЛЕНИЕ" if row["regression"] else ""
+            print(f"{row['case']:<30} {row['rows']:>10} {row['ratio']:>6.2f}x {mark}", file=sys.stderr)
+        if any(row["regression"] for row in comparison):
+            exit_code = 1
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
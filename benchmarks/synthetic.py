@@ -0,0 +1,142 @@
+"""
+Генератор синтетических операций с теми же столбцами, что и data/operations.xlsx.
+
+Запуск: python -m benchmarks.synthetic <число строк> <путь к xlsx или csv>
+"""
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.currency import BASE_AMOUNT_COLUMN, add_base_amounts
+from src.schema import DATE_COLUMNS, apply_schema
+
+OPERATION_COLUMNS = [
+    'Дата операции', 'Дата платежа', 'Номер карты', 'Статус', 'Сумма операции', 'Валюта операции',
+    'Сумма платежа', 'Валюта платежа', 'Кэшбэк', 'Категория', 'MCC', 'Описание', 'Бонусы (включая кэшбэк)',
+    'Округление на инвесткопилку', 'Сумма операции с округлением',
+]
+
+# Категория, доля операций, MCC, типичная сумма (знак - списание или пополнение), описания
+CATEGORY_PROFILES: List[Tuple[str, float, Optional[int], float, List[str]]] = [
+    ('Супермаркеты', 0.34, 5411, -400.0, ['Колхоз', 'Магнит', 'SPAR', 'Дикси', 'Перекрёсток']),
+    ('Фастфуд', 0.19, 5814, -250.0, ["McDonald's", 'Бургер Кинг', 'Rumyanyj Khleb', 'Теремок']),
+    ('Транспорт', 0.06, 4121, -300.0, ['Яндекс Такси', 'Метро Санкт-Петербург', 'Ситимобил']),
+    ('Переводы', 0.05, None, -5000.0, ['Перевод с карты', 'Перевод Кредитная карта. ТП 10.2 RUR']),
+    ('Ж/д билеты', 0.04, 4112, -2500.0, ['РЖД', 'Ozon.ru']),
+    ('Различные товары', 0.03, 5399, -1200.0, ['Яндекс Маркет', 'Wildberries', 'AliExpress']),
+    ('Связь', 0.03, 4814, -400.0, ['МТС', 'Билайн', 'МегаФон']),
+    ('Пополнения', 0.03, None, 10000.0, ['Пополнение через Газпромбанк', 'Внесение наличных через банкомат']),
+    ('Аптеки', 0.02, 5912, -600.0, ['Аптека Вита', 'Ригла', 'Планета Здоровья']),
+    ('Каршеринг', 0.02, 7512, -800.0, ['Ситидрайв', 'Яндекс Драйв', 'Делимобиль']),
+    ('Рестораны', 0.02, 5812, -1500.0, ['IP Yakubovskaya M. V.', 'Тануки', 'Шоколадница']),
+    ('Бонусы', 0.015, None, 50.0, ['Кешбэк за обычные покупки']),
+    ('Наличные', 0.015, 6011, -5000.0, ['Снятие в банкомате Тинькофф']),
+    ('Дом и ремонт', 0.015, 5200, -2000.0, ['Леруа Мерлен', 'OBI', 'Петрович']),
+    ('Услуги банка', 0.015, None, -99.0, ['Оплата услуги Тинькофф Pro']),
+    ('Топливо', 0.01, 5541, -1800.0, ['Лукойл', 'Роснефть', 'Shell']),
+    ('Одежда и обувь', 0.01, 5651, -3000.0, ['Спортмастер', 'Uniqlo', 'Zara']),
+    ('ЖКХ', 0.01, None, -3500.0, ['ЖКУ Дом', 'ГУП ВЦКП ЖХ']),
+    ('Зарплата', 0.005, None, 60000.0, ['Пополнение. ООО "Работа"']),
+    ('Другое', 0.09, 5817, -700.0, ['Яндекс Плюс', 'Google Play', 'Steam']),
+]
+CURRENCIES = ['RUB', 'TRY', 'EUR', 'CNY', 'USD']
+CURRENCY_SHARES = [0.98, 0.01, 0.005, 0.003, 0.002]
+
+
+def _categorical(codes: np.ndarray, categories: List[str]) -> pd.Series:
+    """Категориальный столбец по номерам категорий (-1 - пропуск)"""
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories)))
+
+
+def generate_operations(rows: int, seed: int = 42, cards: int = 8, start: str = '2018-01-01',
+                        end: str = '2022-01-01') -> pd.DataFrame:
+    """
+    Синтетические операции в типах схемы (как после load_operations), от новых к старым.
+    Число различных описаний растет с числом строк, поэтому поиск и группировки ведут себя
+    примерно как на реальной выгрузке любого размера.
+    """
+    rng = np.random.default_rng(seed)
+    shares = np.array([profile[1] for profile in CATEGORY_PROFILES])
+    category_codes = rng.choice(len(CATEGORY_PROFILES), size=rows, p=shares / shares.sum())
+
+    # Описание: базовое название категории, у части операций - с номером торговой точки
+    descriptions: List[str] = []
+    description_offsets = []
+    for _, _, _, _, names in CATEGORY_PROFILES:
+        description_offsets.append(len(descriptions))
+        descriptions.extend(names)
+    name_counts = np.array([len(profile[4]) for profile in CATEGORY_PROFILES])[category_codes]
+    base_codes = np.array(description_offsets)[category_codes] + (rng.random(rows) * name_counts).astype(np.int64)
+    branches = max(1, min(rows // 20, 50_000))
+    with_branch = rng.random(rows) < 0.3
+    # Строки для пар (описание, точка) создаются только для встретившихся пар, а не для каждой строки
+    pairs, pair_codes = np.unique(base_codes[with_branch] * branches + rng.integers(0, branches, with_branch.sum()),
+                                  return_inverse=True)
+    description_codes = base_codes.copy()
+    description_codes[with_branch] = len(descriptions) + pair_codes
+    description_names = descriptions + [f"{descriptions[pair // branches]} #{pair % branches}" for pair in pairs]
+
+    scales = np.array([profile[3] for profile in CATEGORY_PROFILES])[category_codes]
+    amounts = np.round(np.sign(scales) * rng.gamma(2.0, np.abs(scales) / 2.0), 2)
+
+    start_ns = pd.Timestamp(start).value
+    end_ns = pd.Timestamp(end).value
+    seconds = np.sort(rng.integers(start_ns // 10**9, end_ns // 10**9, rows))[::-1]
+    operation_dates = pd.to_datetime(seconds, unit='s')
+    payment_delay = pd.to_timedelta(rng.integers(0, 3, rows), unit='D')
+    payment_dates = pd.Series(operation_dates.normalize() + payment_delay).where(rng.random(rows) >= 0.002)
+
+    card_numbers = [f"*{number:04d}" for number in rng.choice(10_000, cards, replace=False)]
+    card_codes = rng.integers(0, cards, rows)
+    card_codes[rng.random(rows) < 0.02] = -1
+
+    mcc = np.array([profile[2] if profile[2] is not None else -1 for profile in CATEGORY_PROFILES])[category_codes]
+    cashback = np.where(rng.random(rows) < 0.1, np.floor(np.abs(amounts) / 100), np.nan)
+
+    df = pd.DataFrame({
+        'Дата операции': operation_dates,
+        'Дата платежа': payment_dates,
+        'Номер карты': _categorical(card_codes, categories=card_numbers),
+        'Статус': _categorical((rng.random(rows) < 0.006).astype(np.int8), categories=['OK', 'FAILED']),
+        'Сумма операции': amounts,
+        'Валюта операции': _categorical(rng.choice(len(CURRENCIES), rows, p=CURRENCY_SHARES), CURRENCIES),
+        'Сумма платежа': amounts,
+        'Валюта платежа': _categorical(np.zeros(rows, dtype=np.int8), categories=['RUB']),
+        'Кэшбэк': cashback,
+        'Категория': _categorical(category_codes, categories=[profile[0] for profile in CATEGORY_PROFILES]),
+        'MCC': pd.Series(np.where(mcc < 0, np.nan, mcc)).astype('Int32'),
+        'Описание': _categorical(description_codes, categories=description_names),
+        'Бонусы (включая кэшбэк)': np.where(amounts < 0, np.abs(amounts) // 100, 0).astype(np.int64),
+        'Округление на инвесткопилку': np.zeros(rows, dtype=np.int64),
+        'Сумма операции с округлением': np.abs(amounts),
+    })
+    return add_base_amounts(apply_schema(df))
+
+
+def to_export_format(df: pd.DataFrame) -> pd.DataFrame:
+    """Операции в виде, в котором их читает pd.read_excel: даты и категории - строками"""
+    raw = df.drop(columns=[BASE_AMOUNT_COLUMN], errors='ignore')
+    for column, date_format in DATE_COLUMNS.items():
+        raw[column] = raw[column].dt.strftime(date_format)
+    for column in raw.columns:
+        if isinstance(raw[column].dtype, pd.CategoricalDtype):
+            raw[column] = raw[column].astype(object)
+    raw['MCC'] = raw['MCC'].astype('float64')
+    return raw
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    file_path = sys.argv[2] if len(sys.argv) > 2 else 'operations_synthetic.xlsx'
+    raw = to_export_format(generate_operations(rows))
+    if file_path.endswith('.csv'):
+        raw.to_csv(file_path, index=False)
+    else:
+        raw.to_excel(file_path, index=False)
+    print(f"Записано {rows} операций в {file_path}")
+
+
+if __name__ == "__main__":
+    main()
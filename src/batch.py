@@ -0,0 +1,236 @@
+"""
+Пакетный режим: много запросов к одному файлу операций за один запуск процесса.
+
+Задания - файл JSON Lines, по одному заданию в строке:
+    {"id": "h1", "type": "home", "date": "2021-12-31 16:44:00", "settings": "data/user_settings.json"}
+    {"id": "c1", "type": "cashback", "year": 2021, "month": 12}
+    {"id": "s1", "type": "search", "query": "Колхоз", "offset": 0, "limit": 10}
+    {"id": "p1", "type": "spending", "category": "Супермаркеты", "year": 2021, "month": 12, "day": 31}
+    {"id": "t1", "type": "series", "freq": "month", "by": "category", "start": "2021-01-01", "end": "2021-12-31"}
+
+Запуск:
+    python -m src.main batch jobs.jsonl --workers 4 --output results.jsonl
+
+Операции загружаются один раз, индексы (поисковый, куб агрегатов, индекс по датам) строятся
+один раз и общие для всех заданий. Результаты выводятся JSON Lines в порядке заданий по мере
+готовности: id, type, status (ok / error), result или error и время выполнения в секундах.
+Ошибка в одном задании не останавливает остальные.
+"""
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import IO, Any, Callable, Deque, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from src import operations
+from src.cube import snapshot_cube
+from src.encoding import dumps
+from src.reports import spending_by_category
+from src.search_index import snapshot_search_index
+from src.services import analyze_cashback_categories, search_transactions
+from src.time_index import get_time_index
+from src.timeseries import ROLLING_WINDOWS, series_records, spending_series
+from src.utils import get_file_paths, load_user_settings
+from src.views import base_func_module_one
+
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '1'))
+# Сколько заданий выполняется или ждет вывода одновременно на один поток
+BATCH_QUEUE_PER_WORKER = 4
+# Как часто (в заданиях) выводится прогресс
+BATCH_PROGRESS_EVERY = int(os.getenv('BATCH_PROGRESS_EVERY', '1000'))
+
+Job = Mapping[str, Any]
+
+
+class BatchContext:
+    """Общие для всех заданий данные: снимок операций и загруженные настройки пользователей"""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self._settings: Dict[str, Dict[str, Any]] = {}
+
+    def settings(self, value: Any) -> Dict[str, Any]:
+        """Настройки задания: словарь, путь к JSON файлу или None (настройки проекта); файлы читаются один раз"""
+        if isinstance(value, dict):
+            return value
+        path = os.path.abspath(value or get_file_paths()[0])
+        if path not in self._settings:
+            self._settings[path] = load_user_settings(path)
+        return self._settings[path]
+
+
+def _date_parts(job: Job) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """Год, месяц и день задания: из 'date' ('YYYY-MM-DD HH:MM:SS') или из 'year', 'month', 'day'"""
+    if job.get('date'):
+        date = datetime.strptime(job['date'], '%Y-%m-%d %H:%M:%S')
+        return date.year, date.month, date.day
+    return job.get('year'), job.get('month'), job.get('day')
+
+
+def home_job(context: BatchContext, job: Job) -> Any:
+    """Страница «Главная» на дату задания (по умолчанию - текущую)"""
+    date_str = job.get('date') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return json.loads(base_func_module_one(date_str, context.df, context.settings(job.get('settings'))))
+
+
+def cashback_job(context: BatchContext, job: Job) -> Any:
+    """Топ категорий по кешбэку за месяц задания"""
+    year, month, _ = _date_parts(job)
+    if year is None or month is None:
+        raise ValueError("Для анализа кешбэка нужны 'year' и 'month' или 'date'")
+    return json.loads(analyze_cashback_categories(int(year), int(month), context.df))
+
+
+def search_job(context: BatchContext, job: Job) -> Any:
+    """Поиск транзакций по запросу задания ('query', необязательные 'offset' и 'limit')"""
+    if not job.get('query'):
+        raise ValueError("Для поиска нужен запрос ('query')")
+    return json.loads(search_transactions(str(job['query']), context.df, int(job.get('offset', 0)), job.get('limit')))
+
+
+def spending_job(context: BatchContext, job: Job) -> Any:
+    """Траты по категории задания ('category') за 90 дней до даты задания"""
+    if not job.get('category'):
+        raise ValueError("Для анализа трат нужна категория ('category')")
+    # Отчет вызывается без декоратора: тысячи заданий не должны перезаписывать файл отчета
+    spending = getattr(spending_by_category, '__wrapped__', spending_by_category)
+    return spending(context.df, job['category'], *_date_parts(job))
+
+
+def series_job(context: BatchContext, job: Job) -> Any:
+    """Ряды трат и кешбэка ('freq', 'by', 'windows', необязательные 'start' и 'end' - 'YYYY-MM-DD')"""
+    series = spending_series(context.df, job.get('freq', 'month'), job.get('by', 'category'),
+                             tuple(job.get('windows', ROLLING_WINDOWS)), job.get('start'), job.get('end'))
+    return series_records(series)
+
+
+JOB_TYPES: Dict[str, Callable[[BatchContext, Job], Any]] = {
+    'home': home_job,
+    'cashback': cashback_job,
+    'search': search_job,
+    'spending': spending_job,
+    'series': series_job,
+}
+
+
+def parse_jobs(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """
+    Номера строк и задания из строк JSON Lines (пустые строки пропускаются).
+    Строка, которая не разбирается, возвращается как исключение - она станет заданием с ошибкой.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("задание должно быть JSON объектом")
+        except ValueError as e:
+            yield number, ValueError(f"Строка {number} не разобрана: {str(e)}")
+        else:
+            yield number, job
+
+
+def warm_up(df: pd.DataFrame, types: Iterable[str]) -> None:
+    """Строит общие индексы для типов заданий до запуска потоков, чтобы они не строили их одновременно"""
+    types = set(types)
+    if 'search' in types:
+        snapshot_search_index(df)
+    if types & {'cashback', 'series'}:
+        snapshot_cube(df)
+    if types & {'home', 'spending'}:
+        get_time_index(df)
+
+
+def run_job(context: BatchContext, number: int, job: Any) -> Dict[str, Any]:
+    """Выполняет одно задание; результат - словарь с id, type, status, result или error и временем"""
+    start = time.perf_counter()
+    record: Dict[str, Any] = {"id": number, "type": None}
+    try:
+        if isinstance(job, Exception):
+            raise job
+        record.update(id=job.get('id', number), type=job.get('type'))
+        if job.get('type') not in JOB_TYPES:
+            raise ValueError(f"Неизвестный тип задания: {job.get('type')}, доступны: {', '.join(JOB_TYPES)}")
+        record.update(status="ok", result=JOB_TYPES[job['type']](context, job))
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {str(e)}")
+    record["seconds"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def run_jobs(jobs: Iterable[Tuple[int, Any]], file_path: Optional[str] = None,
+             workers: int = BATCH_WORKERS) -> Iterator[Dict[str, Any]]:
+    """
+    Выполняет задания (номер, задание) над одним снимком файла операций и возвращает результаты
+    в порядке заданий по мере готовности. При workers > 1 задания выполняются в пуле потоков
+    над общими индексами; заданий в работе не больше BATCH_QUEUE_PER_WORKER на поток.
+    """
+    jobs = list(jobs)
+    context = BatchContext(operations.load_operations(file_path))
+    warm_up(context.df, (str(job.get('type')) for _, job in jobs if isinstance(job, dict)))
+
+    if workers <= 1:
+        for number, job in jobs:
+            yield run_job(context, number, job)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+        pending: Deque[Future] = deque()
+        for number, job in jobs:
+            pending.append(executor.submit(run_job, context, number, job))
+            if len(pending) >= workers * BATCH_QUEUE_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_results(results: Iterable[Dict[str, Any]], output: IO[str],
+                  progress: Optional[IO[str]] = None) -> Dict[str, Any]:
+    """
+    Пишет результаты строками JSON Lines и возвращает сводку: число заданий, ошибок, общее время
+    и среднее время по типам заданий. Если задан progress, туда выводится прогресс и сводка.
+    """
+    start = time.perf_counter()
+    count = errors = 0
+    by_type: Dict[str, Tuple[int, float]] = {}
+    for record in results:
+        output.write(dumps(record) + '\n')
+        count += 1
+        errors += record["status"] != "ok"
+        jobs, seconds = by_type.get(str(record["type"]), (0, 0.0))
+        by_type[str(record["type"])] = (jobs + 1, seconds + record["seconds"])
+        if progress is not None and count % BATCH_PROGRESS_EVERY == 0:
+            output.flush()
+            progress.write(f"Выполнено заданий: {count}, ошибок: {errors}, "
+                           f"{time.perf_counter() - start:.1f} с\n")
+
+    summary = {
+        "jobs": count,
+        "errors": errors,
+        "seconds": round(time.perf_counter() - start, 3),
+        "mean_seconds": {name: round(seconds / jobs, 6) for name, (jobs, seconds) in by_type.items()},
+    }
+    if progress is not None:
+        progress.write(f"Итого: {dumps(summary)}\n")
+    return summary
+
+
+def run_batch_file(jobs_path: str, output_path: Optional[str] = None, file_path: Optional[str] = None,
+                   workers: int = BATCH_WORKERS, quiet: bool = False) -> Dict[str, Any]:
+    """Задания из файла jobs_path ('-' - stdin), результаты - в output_path или stdout, прогресс - в stderr"""
+    jobs_file = sys.stdin if jobs_path == '-' else open(jobs_path, encoding='utf-8')
+    output = sys.stdout if output_path is None else open(output_path, 'w', encoding='utf-8')
+    try:
+        results = run_jobs(parse_jobs(jobs_file), file_path, workers)
+        return write_results(results, output, None if quiet else sys.stderr)
+    finally:
+        if jobs_file is not sys.stdin:
+            jobs_file.close()
+        if output is not sys.stdout:
+            output.close()
@@ -0,0 +1,60 @@
+from typing import Any, Dict, List, Sequence
+
+import pandas as pd
+
+from src.currency import base_amounts
+
+CARD_COLUMN = 'Номер карты'
+CATEGORY_COLUMN = 'Категория'
+
+DEFAULT_CARD_METRICS = ('total_spent', 'cashback')
+CARD_METRICS = ('total_spent', 'cashback', 'count', 'mean', 'max', 'categories')
+
+
+def aggregate_cards(df: pd.DataFrame, metrics: Sequence[str] = DEFAULT_CARD_METRICS) -> List[Dict[str, Any]]:
+    """
+    Считает показатели по картам за один проход groupby по парам (карта, категория).
+    Доступные показатели: total_spent, cashback (1 рубль на каждые 100 рублей), count, mean, max
+    и categories - траты карты в разбивке по категориям.
+    Суммы берутся в базовой валюте (см. src.currency). Карты возвращаются в порядке первого появления в данных.
+    """
+    unknown = set(metrics) - set(CARD_METRICS)
+    if unknown:
+        raise ValueError(f"Неизвестные показатели по картам: {sorted(unknown)}")
+
+    cards = df[df[CARD_COLUMN].notna()]
+    if cards.empty:
+        return []
+
+    category = cards[CATEGORY_COLUMN] if CATEGORY_COLUMN in cards.columns else pd.Series('', index=cards.index)
+    keys = [cards[CARD_COLUMN], category.rename(CATEGORY_COLUMN)]
+    by_category = (base_amounts(cards).groupby(keys, sort=False, dropna=False, observed=True)
+                   .agg(['sum', 'count', 'max']))
+    by_card = by_category.groupby(level=0, sort=False, observed=True).agg({'sum': 'sum', 'count': 'sum', 'max': 'max'})
+
+    categories: Dict[Any, Dict[str, float]] = {}
+    if 'categories' in metrics:
+        index = by_category.index
+        for card_number, name, amount in zip(index.get_level_values(0), index.get_level_values(1), by_category['sum']):
+            if isinstance(name, str):
+                categories.setdefault(card_number, {})[name] = round(float(amount), 2)
+
+    result = []
+    for card, totals in by_card.iterrows():
+        total_spent = float(totals['sum'])
+        record: Dict[str, Any] = {"last_digits": str(card)[-4:]}
+        if 'total_spent' in metrics:
+            record["total_spent"] = round(total_spent, 2)
+        if 'cashback' in metrics:
+            record["cashback"] = round(total_spent / -100, 2)
+        if 'count' in metrics:
+            record["count"] = int(totals['count'])
+        if 'mean' in metrics:
+            record["mean"] = round(total_spent / totals['count'], 2) if totals['count'] else 0.0
+        if 'max' in metrics:
+            record["max"] = round(float(totals['max']), 2)
+        if 'categories' in metrics:
+            record["categories"] = categories.get(card, {})
+        result.append(record)
+
+    return result
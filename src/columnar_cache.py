@@ -0,0 +1,138 @@
+import glob
+import hashlib
+import logging
+import os
+import pickle
+from typing import Any, Optional
+
+import pandas as pd
+
+from src.schema import SCHEMA_VERSION
+
+try:
+    import pyarrow.feather as feather_module  # type: ignore[import-not-found, import-untyped, unused-ignore]
+    feather: Any = feather_module
+except ImportError:  # pragma: no cover - зависит от окружения
+    feather = None
+
+CACHE_DIR_NAME = '.operations_cache'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_file_hash(file_path: str) -> str:
+    """Вычисляет SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cache_dir(file_path: str) -> str:
+    """Каталог кэша рядом с исходным файлом"""
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME)
+
+
+def _get_cache_prefix(file_path: str, content_hash: str) -> str:
+    """Общее начало имен файлов кэша для данной версии исходного файла и схемы типов"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(get_cache_dir(file_path), f"{stem}.{content_hash[:16]}.s{SCHEMA_VERSION}.")
+
+
+def get_cache_path(file_path: str, content_hash: str) -> str:
+    """Путь к файлу кэша: Feather при наличии pyarrow, иначе pickle"""
+    extension = 'feather' if feather is not None else 'pkl'
+    return _get_cache_prefix(file_path, content_hash) + extension
+
+
+def get_object_cache_path(file_path: str, content_hash: str, name: str) -> str:
+    """Путь к кэшу производного объекта (например, поискового индекса) для версии файла"""
+    return _get_cache_prefix(file_path, content_hash) + f"{name}.pkl"
+
+
+def get_database_path(file_path: str, content_hash: str) -> str:
+    """Путь к базе SQLite с операциями версии файла (см. src.repository)"""
+    return _get_cache_prefix(file_path, content_hash) + "sqlite"
+
+
+def _remove_stale_versions(file_path: str, content_hash: str) -> None:
+    """Удаляет кэш прежних версий исходного файла"""
+    prefix = _get_cache_prefix(file_path, content_hash)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    for stale_path in glob.glob(os.path.join(get_cache_dir(file_path), f"{glob.escape(stem)}.*")):
+        if not stale_path.startswith(prefix):
+            os.remove(stale_path)
+
+
+def load_cached_frame(file_path: str, content_hash: str) -> Optional[pd.DataFrame]:
+    """Загружает DataFrame из кэша, если для данного содержимого файла он уже построен"""
+    cache_path = get_cache_path(file_path, content_hash)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        if feather is not None:
+            # Файл записан без сжатия, поэтому читается через отображение в память
+            df: pd.DataFrame = feather.read_table(cache_path, memory_map=True).to_pandas()
+        else:
+            df = pd.read_pickle(cache_path)
+        return df
+    except Exception as e:
+        logging.warning(f"Не удалось прочитать кэш {cache_path}: {str(e)}")
+        return None
+
+
+def save_cached_frame(file_path: str, content_hash: str, df: pd.DataFrame) -> Optional[str]:
+    """Сохраняет DataFrame в кэш и удаляет кэш прежних версий этого файла"""
+    cache_path = get_cache_path(file_path, content_hash)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+
+    try:
+        if feather is not None:
+            feather.write_feather(df.reset_index(drop=True), tmp_path, compression='uncompressed')
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logging.warning(f"Не удалось записать кэш {cache_path}: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    _remove_stale_versions(file_path, content_hash)
+    return cache_path
+
+
+def load_cached_object(file_path: str, content_hash: str, name: str) -> Optional[Any]:
+    """Загружает производный объект, сохраненный для данной версии файла"""
+    cache_path = get_object_cache_path(file_path, content_hash, name)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        logging.warning(f"Не удалось прочитать кэш {cache_path}: {str(e)}")
+        return None
+
+
+def save_cached_object(file_path: str, content_hash: str, name: str, value: Any) -> Optional[str]:
+    """Сохраняет производный объект рядом с кэшем операций"""
+    cache_path = get_object_cache_path(file_path, content_hash, name)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logging.warning(f"Не удалось записать кэш {cache_path}: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    _remove_stale_versions(file_path, content_hash)
+    return cache_path
@@ -0,0 +1,35 @@
+import logging
+import os
+import threading
+from typing import Optional, Tuple
+
+# Переменные окружения из .env загружаются один раз на процесс, при первом обращении к настройкам
+_environment_loaded = False
+_environment_lock = threading.Lock()
+
+
+def load_environment() -> None:
+    """Загружает переменные окружения из .env файла (повторные вызовы ничего не делают)"""
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    with _environment_lock:
+        if not _environment_loaded:
+            # python-dotenv импортируется только здесь, чтобы не замедлять импорт модулей проекта
+            from dotenv import load_dotenv
+            load_dotenv()
+            _environment_loaded = True
+
+
+def get_api_keys() -> Tuple[Optional[str], Optional[str]]:
+    """Ключи API курсов валют (EXCHANGE_RATES_API_KEY) и цен акций (ALPHA_VANTAGE_API_KEY)"""
+    load_environment()
+    return os.getenv('EXCHANGE_RATES_API_KEY'), os.getenv('ALPHA_VANTAGE_API_KEY')
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """
+    Настраивает логирование процесса. Модули проекта логирование не настраивают - это делают
+    точки входа (src.main, src.server, src.runner, src.currency); повторные вызовы ничего не меняют.
+    """
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -0,0 +1,239 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src import operations
+from src.currency import base_amounts
+from src.metrics import record_cache, stage
+
+CUBE_DIMENSIONS = ['day', 'category', 'card']
+# Сколько кубов хранится для DataFrame, которые не являются снимками файла операций
+FRAME_CUBE_LIMIT = 4
+
+# Кубы загруженных операций: путь -> (DataFrame, по которому построен куб, куб)
+_cube_cache: Dict[str, Tuple[pd.DataFrame, 'OperationsCube']] = {}
+# Кубы переданных DataFrame: id DataFrame -> (DataFrame, куб)
+_frame_cube_cache: 'OrderedDict[int, Tuple[pd.DataFrame, OperationsCube]]' = OrderedDict()
+_cube_lock = threading.Lock()
+
+DateLike = Union[str, datetime, pd.Timestamp]
+
+
+def build_cells(df: pd.DataFrame) -> pd.DataFrame:
+    """Сумма (в базовой валюте) и количество операций по дням, категориям и картам, отсортированные по дню"""
+    df = operations.ensure_normalized(df)
+    days = df['Дата операции'].dt.normalize()
+    category = df['Категория'] if 'Категория' in df.columns else pd.Series(np.nan, index=df.index)
+    card = df['Номер карты'] if 'Номер карты' in df.columns else pd.Series(np.nan, index=df.index)
+
+    keys = [days.rename('day'), category.rename('category'), card.rename('card')]
+    cells = (base_amounts(df).groupby(keys, dropna=False, observed=True)
+             .agg(['sum', 'count'])
+             .rename(columns={'sum': 'amount'})
+             .reset_index())
+    return cells[cells['day'].notna()].sort_values('day', kind='stable').reset_index(drop=True)
+
+
+def _concat_cells(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """Объединяет ячейки, пропуская пустые таблицы (pandas не должен выводить по ним типы столбцов)"""
+    non_empty = [frame for frame in frames if not frame.empty]
+    return pd.concat(non_empty) if non_empty else frames[0]
+
+
+def month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    """Начало месяца и начало следующего месяца"""
+    start_date = datetime(year, month, 1)
+    end_date = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start_date, end_date
+
+
+def rank_cashback(totals: Dict[str, float], n: int = 3, excluded: Sequence[str] = ()) -> Dict[str, float]:
+    """Топ-N категорий по кешбэку (1% от суммы операций) из сумм по категориям"""
+    # Категории в алфавитном порядке, чтобы при равенстве порядок совпадал с pandas nlargest
+    cashback = [(category, abs(amount) / 100) for category, amount in sorted(totals.items())
+                if category not in excluded]
+    cashback.sort(key=lambda item: -item[1])
+    return dict(cashback[:n])
+
+
+def _to_day(value: DateLike) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).normalize(), 'ns')
+
+
+class OperationsCube:
+    """
+    Куб агрегатов операций (день x категория x карта) с суммами и количеством.
+    Запросы отвечаются по заранее посчитанным помесячным итогам и накопленным суммам по дням,
+    без просмотра исходных операций.
+    """
+
+    def __init__(self, cells: pd.DataFrame) -> None:
+        self.cells = cells
+        self._monthly: Optional[Dict[Tuple[int, int], Dict[str, float]]] = None
+        self._cumulative: Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray]]] = {}
+
+    @classmethod
+    def from_operations(cls, df: pd.DataFrame) -> 'OperationsCube':
+        """Строит куб по операциям"""
+        return cls(build_cells(df))
+
+    def extended(self, new_rows: pd.DataFrame) -> 'OperationsCube':
+        """Новый куб: ячейки этого куба и новые операции. Этот куб не изменяется - его могут читать другие потоки"""
+        cube = OperationsCube(self.cells)
+        cube._monthly = dict(self._monthly) if self._monthly is not None else None
+        cube.append(new_rows)
+        return cube
+
+    def append(self, new_rows: pd.DataFrame) -> None:
+        """Добавляет в куб новые операции, пересчитывая только ячейки затронутых дней"""
+        delta = build_cells(new_rows)
+        if delta.empty:
+            return
+
+        touched = self.cells['day'].isin(delta['day'].unique())
+        merged = (_concat_cells([self.cells[touched], delta])
+                  .groupby(CUBE_DIMENSIONS, dropna=False, observed=True)[['amount', 'count']].sum()
+                  .reset_index())
+        self.cells = (_concat_cells([self.cells[~touched], merged])
+                      .sort_values('day', kind='stable').reset_index(drop=True))
+
+        # Помесячные итоги пересчитываются только для затронутых месяцев
+        if self._monthly is not None:
+            months = {(day.year, day.month) for day in pd.DatetimeIndex(delta['day'].unique())}
+            for year_month in months:
+                self._monthly.pop(year_month, None)
+            self._monthly.update(self._monthly_totals(months))
+        self._cumulative.clear()
+
+    def _monthly_totals(self,
+                        months: Optional[Set[Tuple[int, int]]] = None) -> Dict[Tuple[int, int], Dict[str, float]]:
+        """Суммы по категориям для каждого месяца (или только для переданных месяцев)"""
+        cells = self.cells[self.cells['category'].notna()]
+        days = cells['day'].dt
+        if months is not None:
+            month_keys = [year * 100 + month for year, month in months]
+            cells = cells[(days.year * 100 + days.month).isin(month_keys)]
+            days = cells['day'].dt
+        totals = cells.groupby([days.year, days.month, cells['category']], observed=True)['amount'].sum()
+
+        monthly: Dict[Tuple[int, int], Dict[str, float]] = {}
+        index = totals.index
+        for year, month, category, amount in zip(index.get_level_values(0), index.get_level_values(1),
+                                                 index.get_level_values(2), totals.to_numpy()):
+            monthly.setdefault((int(year), int(month)), {})[str(category)] = float(amount)
+        return monthly
+
+    def monthly_category_totals(self, year: int, month: int) -> Dict[str, float]:
+        """Суммы операций по категориям за месяц"""
+        if self._monthly is None:
+            self._monthly = self._monthly_totals()
+        return self._monthly.get((year, month), {})
+
+    def top_cashback_categories(self, year: int, month: int, n: int = 3,
+                                excluded: Sequence[str] = ()) -> Dict[str, float]:
+        """Топ-N категорий по кешбэку (1% от суммы операций) за месяц"""
+        return rank_cashback(self.monthly_category_totals(year, month), n, excluded)
+
+    def _cumulative_by(self, dimension: str) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Для каждого значения измерения: дни и накопленные суммы по ним"""
+        if dimension not in self._cumulative:
+            cells = self.cells[self.cells[dimension].notna()]
+            series: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+            for value, group in cells.groupby(dimension, sort=False, observed=True):
+                daily = group.groupby('day')['amount'].sum()
+                cumulative = np.concatenate(([0.0], np.cumsum(daily.to_numpy(dtype=float))))
+                series[str(value)] = (daily.index.to_numpy(), cumulative)
+            self._cumulative[dimension] = series
+        return self._cumulative[dimension]
+
+    def _window(self, days: np.ndarray, cumulative: np.ndarray, start: DateLike,
+                end: DateLike) -> Tuple[float, int]:
+        """Сумма и число дней с операциями в полуинтервале [start, end)"""
+        lo = np.searchsorted(days, _to_day(start), side='left')
+        hi = np.searchsorted(days, _to_day(end), side='left')
+        return float(cumulative[hi] - cumulative[lo]), int(hi - lo)
+
+    def category_spending(self, category: str, start: DateLike, end: DateLike) -> float:
+        """Сумма операций категории за дни из полуинтервала [start, end)"""
+        series = self._cumulative_by('category').get(category)
+        if series is None:
+            return 0.0
+        return round(self._window(*series, start, end)[0], 2)
+
+
+def get_operations_cube(file_path: Optional[str] = None) -> OperationsCube:
+    """Куб для актуальной версии файла операций, строится один раз на версию"""
+    path, _, df = operations.load_snapshot(file_path)
+    return _snapshot_cube(path, df)
+
+
+def snapshot_cube(df: pd.DataFrame) -> 'OperationsCube':
+    """
+    Куб для операций: общий куб версии файла, если df - загруженный снимок файла операций.
+    Для других DataFrame куб строится один раз на DataFrame (хранятся последние FRAME_CUBE_LIMIT),
+    поэтому переданный DataFrame не должен изменяться между запросами
+    """
+    found = operations.find_snapshot(df)
+    if found is not None:
+        return _snapshot_cube(found[0], df)
+
+    with _cube_lock:
+        cached = _frame_cube_cache.get(id(df))
+        if cached is not None and cached[0] is df:
+            _frame_cube_cache.move_to_end(id(df))
+            record_cache('cube', True)
+            return cached[1]
+
+    record_cache('cube', False)
+    with stage('build_cube') as measured:
+        cube = OperationsCube.from_operations(df)
+        measured.add_rows(len(df))
+    with _cube_lock:
+        _frame_cube_cache[id(df)] = (df, cube)
+        while len(_frame_cube_cache) > FRAME_CUBE_LIMIT:
+            _frame_cube_cache.popitem(last=False)
+    return cube
+
+
+def _snapshot_cube(path: str, df: pd.DataFrame) -> 'OperationsCube':
+    """Куб, построенный по снимку df файла path (строится один раз на снимок)"""
+    cached = _cube_cache.get(path)
+    record_cache('cube', cached is not None and cached[0] is df)
+    if cached is not None and cached[0] is df:
+        return cached[1]
+
+    with stage('build_cube') as measured:
+        cube = OperationsCube.from_operations(df)
+        measured.add_rows(len(df))
+    logging.info(f"Построен куб агрегатов: {len(cube.cells)} ячеек")
+    with _cube_lock:
+        _cube_cache[path] = (df, cube)
+    return cube
+
+
+def extend_operations_cube(file_path: Optional[str], df: pd.DataFrame, new_df: pd.DataFrame) -> None:
+    """
+    Строит по кубу, построенному для df, новый куб с добавленными строками new_df после len(df)
+    и запоминает его для new_df; куб df не изменяется. Если для df куб еще не строился,
+    он будет построен для new_df при первом запросе.
+    """
+    path = os.path.abspath(file_path or operations.OPERATIONS_FILE_PATH)
+    cached = _cube_cache.get(path)
+    if cached is not None and cached[0] is df:
+        cube = cached[1].extended(new_df.iloc[len(df):])
+        with _cube_lock:
+            if _cube_cache.get(path) is cached:
+                _cube_cache[path] = (new_df, cube)
+
+
+def clear_cube_cache() -> None:
+    """Очищает кэш кубов в памяти"""
+    with _cube_lock:
+        _cube_cache.clear()
+        _frame_cube_cache.clear()
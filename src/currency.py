@@ -0,0 +1,205 @@
+"""
+Пересчет сумм операций в базовую валюту по курсам из локальной таблицы.
+
+Таблица курсов - CSV файл со столбцами date, currency, rate: сколько единиц базовой валюты
+стоит одна единица валюты currency на дату date. Курсы на сегодня добавляются в таблицу командой
+    python -m src.currency --currency USD --currency EUR
+(по умолчанию - валюты user_currencies из пользовательских настроек).
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_CURRENCY = os.getenv('BASE_CURRENCY', 'RUB')
+RATES_FILE_PATH = os.getenv('CURRENCY_RATES_PATH',
+                            os.path.join(os.path.dirname(__file__), '../data/currency_rates.csv'))
+RATE_COLUMNS = ['date', 'currency', 'rate']
+
+# Столбец с суммой операции в базовой валюте, по которому считаются все агрегаты
+BASE_AMOUNT_COLUMN = 'Сумма в базовой валюте'
+# Суммы и их валюты в порядке предпочтения: сначала то, что списано со счета, затем сумма операции
+AMOUNT_CURRENCY_COLUMNS = [('Сумма платежа', 'Валюта платежа'), ('Сумма операции', 'Валюта операции')]
+DATE_COLUMN = 'Дата операции'
+
+# Загруженные таблицы курсов: путь -> ((mtime, размер), таблица)
+_rates_cache: Dict[str, Tuple[Tuple[int, int], pd.DataFrame]] = {}
+_rates_lock = threading.Lock()
+
+
+def _empty_rates() -> pd.DataFrame:
+    return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), 'currency': pd.Series(dtype=object),
+                         'rate': pd.Series(dtype='float64')})
+
+
+def _prepare_rates(rates: pd.DataFrame) -> pd.DataFrame:
+    """Таблица курсов в общих типах, отсортированная по дате, без пропусков и повторов (валюта, дата)"""
+    missing = [column for column in RATE_COLUMNS if column not in rates.columns]
+    if missing:
+        raise ValueError(f"В таблице курсов нет столбцов: {missing}")
+    rates = pd.DataFrame({
+        'date': pd.to_datetime(rates['date']).dt.normalize().astype('datetime64[ns]'),
+        'currency': rates['currency'].astype(str).str.upper(),
+        'rate': pd.to_numeric(rates['rate'], errors='coerce'),
+    }).dropna()
+    return (rates.drop_duplicates(['currency', 'date'], keep='last')
+            .sort_values(['date', 'currency'], kind='stable').reset_index(drop=True))
+
+
+def load_rate_table(file_path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Таблица курсов из CSV файла (читается один раз, пока файл не изменился).
+    Если файла нет, возвращается пустая таблица: пересчитываются только суммы, уже выраженные в базовой валюте.
+    """
+    path = os.path.abspath(file_path or RATES_FILE_PATH)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return _empty_rates()
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _rates_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with _rates_lock:
+        rates = _prepare_rates(pd.read_csv(path))
+        _rates_cache[path] = (signature, rates)
+    logging.info(f"Загружена таблица курсов {path}: {len(rates)} курсов")
+    return rates
+
+
+def lookup_rates(dates: pd.Series, currencies: pd.Series, rates: pd.DataFrame) -> np.ndarray:
+    """
+    Курсы валют на даты операций одним соединением по дате (merge_asof): берется последний курс
+    не позже даты операции, а для операций раньше начала таблицы - первый известный курс валюты.
+    Возвращает массив в порядке строк, для строк без курса - NaN.
+    """
+    result = np.full(len(dates), np.nan)
+    query = pd.DataFrame({'date': dates.to_numpy(dtype='datetime64[ns]'),
+                          'currency': currencies.astype(object).to_numpy(),
+                          'position': np.arange(len(dates))})
+    query = query[query['date'].notna() & query['currency'].notna()]
+    if query.empty or rates.empty:
+        return result
+    query = query.astype({'currency': str}).sort_values('date', kind='stable')
+
+    backward = pd.merge_asof(query, rates, on='date', by='currency', direction='backward')
+    forward = pd.merge_asof(query, rates, on='date', by='currency', direction='forward')
+    result[query['position'].to_numpy()] = backward['rate'].fillna(forward['rate']).to_numpy()
+    return result
+
+
+def convert_amounts(df: pd.DataFrame, rates: Optional[pd.DataFrame] = None,
+                    base: str = BASE_CURRENCY) -> pd.Series:
+    """
+    Суммы операций в базовой валюте, посчитанные для всех строк сразу.
+    Берется сумма платежа, если она в базовой валюте, иначе сумма операции в базовой валюте,
+    иначе сумма платежа (или операции) по курсу на дату операции. Сумма без столбца валюты
+    считается суммой в базовой валюте. Строки, для которых нет курса, получают NaN.
+    """
+    pairs = [(amount, currency) for amount, currency in AMOUNT_CURRENCY_COLUMNS if amount in df.columns]
+    result = np.full(len(df), np.nan)
+    amounts = {amount: pd.to_numeric(df[amount], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+               for amount, _ in pairs}
+
+    for amount, currency in pairs:
+        in_base = (df[currency] == base).to_numpy(dtype=bool) if currency in df.columns else True
+        take = np.isnan(result) & in_base & ~np.isnan(amounts[amount])
+        result[take] = amounts[amount][take]
+
+    # Остальные суммы пересчитываются по курсу; курсы ищутся только для этих строк
+    for amount, currency in pairs:
+        if currency not in df.columns or DATE_COLUMN not in df.columns:
+            continue
+        todo = np.isnan(result) & ~np.isnan(amounts[amount]) & df[currency].notna().to_numpy()
+        if not todo.any():
+            continue
+        if rates is None:
+            rates = load_rate_table()
+        elif not rates['date'].is_monotonic_increasing:
+            rates = _prepare_rates(rates)
+        result[todo] = amounts[amount][todo] * lookup_rates(df[DATE_COLUMN][todo], df[currency][todo], rates)
+
+    unconverted = np.zeros(len(df), dtype=bool)
+    for values in amounts.values():
+        unconverted |= np.isnan(result) & ~np.isnan(values)
+    if unconverted.any():
+        currencies = sorted({str(value) for _, currency in pairs if currency in df.columns
+                             for value in df[currency][unconverted].dropna().unique()})
+        logging.warning(f"Нет курса к {base} для валют {currencies}: {int(unconverted.sum())} операций "
+                        f"без суммы в базовой валюте")
+    return pd.Series(result, index=df.index, name=BASE_AMOUNT_COLUMN)
+
+
+def add_base_amounts(df: pd.DataFrame, rates: Optional[pd.DataFrame] = None,
+                     base: str = BASE_CURRENCY) -> pd.DataFrame:
+    """Добавляет (или пересчитывает) столбец сумм в базовой валюте. Изменяет и возвращает переданный DataFrame"""
+    df[BASE_AMOUNT_COLUMN] = convert_amounts(df, rates, base)
+    return df
+
+
+def base_amounts(df: pd.DataFrame) -> pd.Series:
+    """Суммы в базовой валюте: готовый столбец, а если его нет (например, в DataFrame из тестов) - пересчет"""
+    if BASE_AMOUNT_COLUMN in df.columns:
+        return df[BASE_AMOUNT_COLUMN]
+    return convert_amounts(df)
+
+
+def rates_from_quotes(quotes: Sequence[Dict[str, Any]], date: Optional[datetime] = None,
+                      base: str = BASE_CURRENCY) -> pd.DataFrame:
+    """
+    Таблица курсов к базовой валюте из ответа get_currency_rates (курсы к валюте API:
+    сколько единиц валюты стоит одна единица валюты API). Базовая валюта должна быть среди курсов.
+    """
+    quoted = {str(quote["currency"]).upper(): float(quote["rate"]) for quote in quotes if quote.get("rate")}
+    if base not in quoted:
+        raise ValueError(f"В курсах нет базовой валюты {base}")
+    day = pd.Timestamp(date or datetime.now()).normalize()
+    return _prepare_rates(pd.DataFrame(
+        [(day, currency, quoted[base] / rate) for currency, rate in quoted.items() if currency != base],
+        columns=RATE_COLUMNS))
+
+
+def save_rates(rates: pd.DataFrame, file_path: Optional[str] = None) -> pd.DataFrame:
+    """Добавляет курсы в таблицу (новые курсы заменяют курсы той же валюты на ту же дату) и возвращает ее"""
+    path = os.path.abspath(file_path or RATES_FILE_PATH)
+    table = _prepare_rates(pd.concat([load_rate_table(path), rates], ignore_index=True))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    table.to_csv(tmp_path, index=False, date_format='%Y-%m-%d')
+    os.replace(tmp_path, path)
+    return table
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Добавление курсов валют на сегодня в таблицу курсов")
+    parser.add_argument('--currency', action='append', help="валюта (можно несколько раз), "
+                                                            "по умолчанию - user_currencies из настроек")
+    parser.add_argument('--file', help="таблица курсов (CSV), по умолчанию - data/currency_rates.csv")
+    args = parser.parse_args(argv)
+
+    # Модули с запросами к API импортируются только здесь: src.operations импортирует этот модуль
+    from src.config import get_api_keys, setup_logging
+    setup_logging()
+    from src.utils import get_currency_rates, get_file_paths, load_user_settings
+
+    api_key = get_api_keys()[0]
+    if api_key is None:
+        raise ValueError("EXCHANGE_RATES_API_KEY не установлен.")
+    currencies = args.currency or load_user_settings(get_file_paths()[0]).get("user_currencies", [])
+    rates = rates_from_quotes(get_currency_rates(api_key))
+    if currencies:
+        rates = rates[rates['currency'].isin([currency.upper() for currency in currencies])]
+    table = save_rates(rates, args.file)
+    logging.info(f"Добавлено курсов: {len(rates)}, всего в таблице: {len(table)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
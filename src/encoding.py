@@ -0,0 +1,91 @@
+import json
+import os
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson as orjson_module  # type: ignore[import-not-found, unused-ignore]
+    orjson: Any = orjson_module
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+# Быстрый кодировщик orjson можно отключить переменной окружения JSON_BACKEND=json
+JSON_BACKEND = 'orjson' if orjson is not None and os.getenv('JSON_BACKEND', 'orjson') != 'json' else 'json'
+
+STREAM_CHUNK_SIZE = 1000
+
+
+def dumps(obj: Any) -> str:
+    """Компактный JSON без экранирования кириллицы (одинаковый для обоих кодировщиков)"""
+    if JSON_BACKEND == 'orjson':
+        result: str = orjson.dumps(obj).decode('utf-8')
+        return result
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def format_dates(values: pd.Series, date_format: str) -> List[Optional[str]]:
+    """Даты в виде строк заданного формата, пустые даты - None"""
+    missing = values.isna().to_numpy()
+    if date_format in ('%d.%m.%Y %H:%M:%S', '%d.%m.%Y'):
+        # ISO строки numpy переставляются срезами - быстрее, чем strftime для каждой даты
+        iso = np.datetime_as_string(values.to_numpy(dtype='datetime64[s]'), unit='s')
+        with_time = date_format.endswith('%S')
+        return [None if is_missing else f"{s[8:10]}.{s[5:7]}.{s[:4]} {s[11:19]}" if with_time
+                else f"{s[8:10]}.{s[5:7]}.{s[:4]}" for s, is_missing in zip(iso, missing)]
+    formatted = values.dt.strftime(date_format)
+    return [None if is_missing else value for value, is_missing in zip(formatted, missing)]
+
+
+def _column_values(values: pd.Series, date_format: Optional[str]) -> List[Any]:
+    """Значения столбца в виде объектов Python, пригодных для JSON (пропуски - None)"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if date_format is not None:
+            return format_dates(values, date_format)
+        return [None if pd.isna(value) else value.isoformat() for value in values]
+    missing = values.isna().to_numpy()
+    if values.dtype == 'float32':
+        # Через строку, чтобы 1.1 в float32 не превращалось в 1.100000023841858
+        result: List[Any] = [float(value) for value in values.astype(str)]
+    else:
+        result = values.astype(object).tolist()
+    if missing.any():
+        result = [None if is_missing else value for value, is_missing in zip(result, missing)]
+    return result
+
+
+def encode_records(df: pd.DataFrame, date_formats: Optional[Mapping[str, str]] = None) -> List[Dict[str, Any]]:
+    """
+    Строки DataFrame в виде списка словарей за один проход по столбцам.
+    Даты форматируются по date_formats (столбец -> формат strftime), остальные - в ISO формате.
+    """
+    date_formats = date_formats or {}
+    columns = [str(column) for column in df.columns]
+    values = [_column_values(df.iloc[:, position], date_formats.get(column))
+              for position, column in enumerate(columns)]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def iter_json_document(key: str, df: pd.DataFrame, date_formats: Optional[Mapping[str, str]] = None,
+                       chunk_size: int = STREAM_CHUNK_SIZE, rows: Optional[Sequence[int]] = None,
+                       extra: Optional[Mapping[str, Any]] = None,
+                       columns: Optional[Sequence[str]] = None) -> Iterator[str]:
+    """
+    Части JSON документа {"key": [строки df], ...extra}, в каждой не больше chunk_size строк.
+    rows - позиции строк df в нужном порядке (по умолчанию все строки), columns - выводимые столбцы
+    (по умолчанию все); строки выбираются по мере кодирования, поэтому копия всех строк не создается.
+    Склеенные части совпадают с dumps({key: encode_records(df.iloc[rows]), **extra}).
+    """
+    positions: Sequence[int] = range(len(df)) if rows is None else rows
+    column_positions = np.arange(df.shape[1]) if columns is None else df.columns.get_indexer(pd.Index(columns))
+    yield '{' + dumps(key) + ':['
+    first = True
+    for start in range(0, len(positions), chunk_size):
+        chunk = df.iloc[list(positions[start:start + chunk_size]), column_positions]
+        body = dumps(encode_records(chunk, date_formats))[1:-1]
+        if body:
+            yield body if first else ',' + body
+            first = False
+    tail = dumps(dict(extra))[1:-1] if extra else ''
+    yield ']' + (',' + tail if tail else '') + '}'
@@ -0,0 +1,98 @@
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src import operations
+from src.cube import extend_operations_cube
+from src.metrics import stage
+from src.schema import concat_operations
+from src.search_index import extend_search_index
+from src.time_index import DATE_COLUMN, extend_time_index, get_time_index
+
+# Столбцы, по которым операция считается уже загруженной
+TRANSACTION_KEY = ['Дата операции', 'Номер карты', 'Сумма операции', 'Валюта операции', 'Описание']
+# Сколько раз повторить добавление, если во время него файл операций был перечитан
+APPEND_ATTEMPTS = 3
+
+Source = Union[str, pd.DataFrame, List[dict]]
+
+_ingest_lock = threading.Lock()
+
+
+def read_new_operations(source: Source) -> pd.DataFrame:
+    """
+    Читает новые операции из xlsx или csv файла, DataFrame или списка словарей
+    (в формате выгрузки, как для search_transactions) и приводит их к типам схемы.
+    """
+    if isinstance(source, str):
+        df = pd.read_csv(source) if source.lower().endswith('.csv') else pd.read_excel(source)
+    elif isinstance(source, pd.DataFrame):
+        df = source.copy()
+    else:
+        df = pd.DataFrame(source)
+    return operations.normalize_operations(df).reset_index(drop=True)
+
+
+def _key_hashes(df: pd.DataFrame, key: Sequence[str]) -> np.ndarray:
+    """Хэши ключей операций по значениям, поэтому они не зависят от набора категорий столбца"""
+    columns = [column for column in key if column in df.columns]
+    # Категории переводятся в значения: иначе хэшировался бы весь список категорий снимка
+    values = df[columns].astype({column: object for column in columns
+                                 if isinstance(df[column].dtype, pd.CategoricalDtype)})
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def find_new_rows(df: pd.DataFrame, new_rows: pd.DataFrame,
+                  key: Sequence[str] = TRANSACTION_KEY) -> np.ndarray:
+    """
+    Маска строк new_rows, которых еще нет в df и которые не повторяют друг друга.
+    Дата операции входит в ключ, поэтому сравниваются только операции df за период new_rows
+    (выборка по индексу дат), а не все загруженные строки.
+    """
+    new_hashes = _key_hashes(new_rows, key)
+    dates = new_rows[DATE_COLUMN]
+    if DATE_COLUMN in key and not dates.empty and dates.notna().all():
+        existing = get_time_index(df).window(dates.min(), dates.max())
+    else:
+        existing = df
+    unique = ~pd.Series(new_hashes).duplicated().to_numpy()
+    return unique & ~np.isin(new_hashes, _key_hashes(existing, key))
+
+
+def append_operations(source: Source, file_path: Optional[str] = None,
+                      key: Sequence[str] = TRANSACTION_KEY) -> Dict[str, int]:
+    """
+    Добавляет новые операции к загруженной версии файла операций без перечитывания файла.
+    Операции, которые уже есть (по столбцам key), пропускаются. Снимок операций, поисковый индекс,
+    куб агрегатов и индекс по датам дополняются только новыми строками.
+    Добавленные операции действуют до изменения файла операций - тогда загружается новая версия файла.
+    Возвращает число полученных, добавленных и повторяющихся операций.
+    """
+    new_rows = read_new_operations(source)
+    with _ingest_lock, stage('append_operations') as measured:
+        for _ in range(APPEND_ATTEMPTS):
+            path, content_hash, df = operations.load_snapshot(file_path)
+            added = new_rows[find_new_rows(df, new_rows, key)]
+            result = {"received": len(new_rows), "added": len(added), "duplicates": len(new_rows) - len(added)}
+            if added.empty:
+                logging.info(f"Новых операций нет: {result}")
+                return result
+
+            new_df = concat_operations(df, added)
+            # Версия данных меняется вместе с содержимым: от прежней версии и ключей добавленных строк
+            digest = hashlib.sha256(content_hash.encode('utf-8'))
+            digest.update(_key_hashes(added, key).tobytes())
+            if not operations.replace_snapshot(path, df, digest.hexdigest(), new_df):
+                continue
+            extend_search_index(path, df, new_df)
+            extend_operations_cube(path, df, new_df)
+            extend_time_index(df, new_df)
+            measured.add_rows(len(added))
+            logging.info(f"Добавлены операции: {result}, всего {len(new_df)} строк")
+            return result
+    raise RuntimeError(f"Не удалось добавить операции: файл {file_path or operations.OPERATIONS_FILE_PATH} "
+                       f"перечитывался во время добавления")
@@ -1,34 +1,135 @@
+"""
+Командная строка проекта:
+    python -m src.main home --date "2021-12-31 16:44:00"
+    python -m src.main cashback --year 2021 --month 12
+    python -m src.main search Колхоз --limit 10
+    python -m src.main spending --category Супермаркеты --year 2021 --month 12 --day 31
+    python -m src.main batch jobs.jsonl --workers 4 --output results.jsonl
+Без команды функции вызываются по очереди с вводом параметров (как раньше).
+
+pandas, requests и модули анализа импортируются только внутри команд, поэтому
+`--help` и ошибки в аргументах не тратят время на их загрузку.
+"""
+import argparse
 import json
-import os
-from typing import Any
+import logging
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union
 
-from dotenv import load_dotenv
+from src.config import setup_logging
 
-from src.reports import spending_by_category
-from src.services import analyze_cashback_categories, search_transactions
-from src.utils import get_file_paths, read_operations_data
-from src.views import base_func_module_one
 
-load_dotenv()
+def _operations(file_path: Optional[str]) -> Any:
+    """Операции из файла (по умолчанию - data/operations.xlsx из настроек проекта)"""
+    from src.utils import get_file_paths, read_operations_data
+    return read_operations_data(file_path or get_file_paths()[1])
 
-EXCHANGE_RATES_API_KEY = os.getenv('EXCHANGE_RATES_API_KEY')
-ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
 
+def run_home(args: argparse.Namespace) -> str:
+    """Страница «Главная» на дату"""
+    from src.utils import get_file_paths, load_user_settings
+    from src.views import base_func_module_one
+    user_settings = load_user_settings(args.settings or get_file_paths()[0])
+    return base_func_module_one(args.date, _operations(args.file), user_settings)
 
-def main() -> None:
+
+def run_cashback(args: argparse.Namespace) -> str:
+    """Топ категорий по кешбэку за месяц"""
+    from src.services import analyze_cashback_categories
+    return analyze_cashback_categories(args.year, args.month, _operations(args.file) if args.file else None)
+
+
+def run_search(args: argparse.Namespace) -> str:
+    """Поиск транзакций по описанию и категории"""
+    from src.services import search_transactions
+    return search_transactions(args.query, _operations(args.file) if args.file else None, args.offset, args.limit)
+
+
+def run_spending(args: argparse.Namespace) -> str:
+    """Траты по категории за 90 дней до даты"""
+    from src.reports import spending_by_category
+    result = spending_by_category(_operations(args.file), args.category, args.year, args.month, args.day)
+    return json.dumps(result, ensure_ascii=False)
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """Задания из файла JSON Lines (см. src.batch); результаты выводятся сами, код выхода 1 при ошибках"""
+    from src.batch import BATCH_WORKERS, run_batch_file
+    workers = BATCH_WORKERS if args.workers is None else args.workers
+    summary = run_batch_file(args.jobs, args.output, args.file, workers, args.quiet)
+    return 1 if summary["errors"] else 0
+
+
+# Команда возвращает текст для вывода или код выхода, если выводит результат сама
+COMMANDS: Dict[str, Callable[[argparse.Namespace], Union[str, int]]] = {
+    'home': run_home,
+    'cashback': run_cashback,
+    'search': run_search,
+    'spending': run_spending,
+    'batch': run_batch,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m src.main', description="Анализ банковских операций")
+    parser.add_argument('--verbose', action='store_true', help="подробный лог (по умолчанию - только предупреждения)")
+    commands = parser.add_subparsers(dest='command', metavar='команда')
+
+    home = commands.add_parser('home', help="страница «Главная»")
+    home.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                      help="дата 'YYYY-MM-DD HH:MM:SS' (по умолчанию - текущая)")
+    home.add_argument('--settings', help="файл пользовательских настроек")
+
+    cashback = commands.add_parser('cashback', help="топ категорий по кешбэку за месяц")
+    cashback.add_argument('--year', type=int, required=True)
+    cashback.add_argument('--month', type=int, required=True, choices=range(1, 13), metavar='1-12')
+
+    search = commands.add_parser('search', help="поиск транзакций")
+    search.add_argument('query', help="слова или подстрока для поиска")
+    search.add_argument('--offset', type=int, default=0)
+    search.add_argument('--limit', type=int)
+
+    spending = commands.add_parser('spending', help="траты по категории за 90 дней до даты")
+    spending.add_argument('--category', required=True)
+    spending.add_argument('--year', type=int)
+    spending.add_argument('--month', type=int)
+    spending.add_argument('--day', type=int)
+
+    batch = commands.add_parser('batch', help="задания из файла JSON Lines за один запуск")
+    batch.add_argument('jobs', help="файл заданий JSON Lines ('-' - stdin)")
+    batch.add_argument('--output', help="файл результатов JSON Lines (по умолчанию - stdout)")
+    batch.add_argument('--workers', type=int, help="число потоков (по умолчанию BATCH_WORKERS или 1)")
+    batch.add_argument('--quiet', action='store_true', help="без прогресса и сводки в stderr")
+
+    for command in (home, cashback, search, spending, batch):
+        command.add_argument('--file', help="файл операций (xlsx), по умолчанию - data/operations.xlsx")
+    return parser
+
+
+def interactive() -> None:
     """
     Царь-функция - здесь нет ничего особенного, она просто
     объединяет функционал из разных модулей
     """
+    from src.reports import spending_by_category
+    from src.services import analyze_cashback_categories, search_transactions
+    from src.utils import get_file_paths, load_user_settings, read_operations_data
+    from src.views import base_func_module_one
+
     settings_file_path: str
     excel_file_path: str
     settings_file_path, excel_file_path = get_file_paths()
 
     df: Any = read_operations_data(excel_file_path)
+    user_settings = load_user_settings(settings_file_path)
     date_str = input("Введите дату (например, '2020-05-02 20:00:00'): ")
-    print(base_func_module_one(date_str))
+    print(base_func_module_one(date_str, df, user_settings))
+
+    cashback_year: int = int(input("Введите год для анализа CashBack (например, 2021): "))
+    cashback_month: int = int(input("Введите месяц для анализа CashBack (например, 12): "))
 
-    cashback_result = analyze_cashback_categories()
+    cashback_result = analyze_cashback_categories(cashback_year, cashback_month, df)
     print("Анализ кешбэка:", cashback_result)
 
     query: str = input("Введите слово для поиска в транзакциях: ")
@@ -42,10 +143,26 @@ def main() -> None:
 
     month: int = int(input("Введите месяц (1-12): "))
 
-    spending_result = spending_by_category(df, category, year, month)
+    day: int = int(input("Введите день (1-31): "))
+
+    spending_result = spending_by_category(df, category, year, month, day)
 
     print("Расходы по категории:", json.dumps(spending_result, ensure_ascii=False))
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    # Логирование настраивается один раз, до выполнения команды
+    setup_logging(logging.INFO if args.verbose or args.command is None else logging.WARNING)
+    if args.command is None:
+        interactive()
+        return 0
+    result = COMMANDS[args.command](args)
+    if isinstance(result, int):
+        return result
+    print(result)
+    return 0
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple, TypeVar, cast
+
+# Время жизни данных по источникам (секунды): пока оно не истекло, API не вызывается
+MARKET_DATA_TTL: Dict[str, float] = {
+    "currency_rates": 60.0,
+    "stock_price": 60.0,
+}
+# Дольше этого срока устаревшие данные не отдаются без обновления (кроме случаев ошибки API)
+MARKET_DATA_MAX_STALE: Dict[str, float] = {
+    "currency_rates": 24 * 60 * 60.0,
+    "stock_price": 24 * 60 * 60.0,
+}
+MARKET_CACHE_SIZE = 256
+# Файл для хранения кэша между перезапусками (необязательно)
+MARKET_CACHE_FILE = os.getenv('MARKET_CACHE_FILE')
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class TTLCache:
+    """
+    Кэш с временем жизни записей и вытеснением давно не использованных (LRU).
+    Устаревшая запись отдается сразу, а обновляется в фоне; при ошибке загрузки
+    возвращается последнее известное значение.
+    """
+
+    def __init__(self, max_size: int = MARKET_CACHE_SIZE, store_path: Optional[str] = None) -> None:
+        self.max_size = max_size
+        self.store_path = store_path
+        self._entries: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "errors": 0}
+        if store_path:
+            self._load_store()
+
+    def get(self, key: str, loader: Callable[[], Any], ttl: float, max_stale: float) -> Any:
+        """Значение по ключу: из кэша, если оно свежее, иначе через loader"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = time.time() - entry[1]
+                if age < ttl:
+                    self._stats["hits"] += 1
+                    return entry[0]
+                if age < max_stale:
+                    self._stats["stale"] += 1
+                    self._refresh_in_background(key, loader)
+                    return entry[0]
+            self._stats["misses"] += 1
+
+        return self._load(key, loader)
+
+    def _load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Загружает значение и сохраняет его; при ошибке отдает последнее известное"""
+        try:
+            value = loader()
+        except Exception as e:
+            logging.error(f"Ошибка при обновлении {key}: {str(e)}")
+            value = None
+
+        with self._lock:
+            if value:
+                self._set(key, value)
+                return value
+            self._stats["errors"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                logging.warning(f"Используется последнее известное значение {key}")
+                return entry[0]
+            return value
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Any]) -> None:
+        """Запускает фоновое обновление ключа, если оно еще не идет"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                self._load(key, loader)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _set(self, key: str, value: Any) -> None:
+        self._entries[key] = (value, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        if self.store_path:
+            self._save_store()
+
+    def _load_store(self) -> None:
+        """Читает записи кэша из файла"""
+        try:
+            with open(str(self.store_path), encoding='utf-8') as f:
+                data = json.load(f)
+            for key, (value, timestamp) in data.items():
+                self._entries[key] = (value, float(timestamp))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Не удалось прочитать кэш рыночных данных {self.store_path}: {str(e)}")
+
+    def _save_store(self) -> None:
+        """Сохраняет записи кэша в файл"""
+        tmp_path = f"{self.store_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({key: [value, timestamp] for key, (value, timestamp) in self._entries.items()}, f,
+                          ensure_ascii=False)
+            os.replace(tmp_path, str(self.store_path))
+        except Exception as e:
+            logging.warning(f"Не удалось записать кэш рыночных данных {self.store_path}: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики попаданий и промахов кэша"""
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        """Очищает записи и счетчики"""
+        with self._lock:
+            self._entries.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+
+
+market_cache = TTLCache(store_path=MARKET_CACHE_FILE)
+
+
+def cached_market_data(source: str) -> Callable[[F], F]:
+    """
+    Декоратор для функций получения рыночных данных вида func(api_key, *args).
+    Ключ кэша строится по источнику и аргументам без API ключа.
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(api_key: str, *args: Any, **kwargs: Any) -> Any:
+            key = json.dumps([source, args, kwargs], ensure_ascii=False, sort_keys=True)
+            return market_cache.get(key, lambda: func(api_key, *args, **kwargs),
+                                    ttl=MARKET_DATA_TTL[source], max_stale=MARKET_DATA_MAX_STALE[source])
+
+        return cast(F, wrapper)
+
+    return decorator
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+EXCHANGE_RATES_URL = "https://api.apilayer.com/exchangerates_data/latest"
+ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+
+REQUEST_TIMEOUT = 10
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+MAX_WORKERS = 8
+
+# Ограничение числа запросов в минуту для каждого сервиса (бесплатный тариф Alpha Vantage - 5 в минуту)
+CALLS_PER_MINUTE: Dict[str, int] = {
+    "www.alphavantage.co": 5,
+}
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class RateLimiter:
+    """Ограничивает число запросов в скользящем окне (по умолчанию - в минуту)"""
+
+    def __init__(self, max_calls: int, period: float = 60.0) -> None:
+        self.max_calls = max_calls
+        self.period = period
+        self._calls: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Ждет, пока в окне освободится место для нового запроса"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_rate_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_session() -> requests.Session:
+    """Общая HTTP-сессия с пулом keep-alive соединений и повторами с задержкой"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=MAX_RETRIES, backoff_factor=RETRY_BACKOFF,
+                          status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",),
+                          respect_retry_after_header=True, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def get_rate_limiter(url: str) -> Optional[RateLimiter]:
+    """Ограничитель запросов для сервиса по адресу запроса"""
+    host = urlsplit(url).netloc
+    if host not in CALLS_PER_MINUTE:
+        return None
+    with _session_lock:
+        if host not in _rate_limiters:
+            _rate_limiters[host] = RateLimiter(CALLS_PER_MINUTE[host])
+        return _rate_limiters[host]
+
+
+def http_get(url: str, params: Optional[Dict[str, str]] = None,
+             headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    """GET-запрос через общую сессию с тайм-аутом и ограничением частоты запросов"""
+    rate_limiter = get_rate_limiter(url)
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    return get_session().get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+
+
+def fetch_all(func: Callable[[T], R], items: Sequence[T], max_workers: int = MAX_WORKERS) -> List[R]:
+    """Выполняет func для всех элементов параллельно, сохраняя порядок результатов"""
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def run_parallel(*calls: Callable[[], Any]) -> List[Any]:
+    """Запускает независимые вызовы одновременно и возвращает их результаты по порядку"""
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
@@ -0,0 +1,211 @@
+import cProfile
+import functools
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from types import TracebackType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar, cast
+
+# Замеры включаются переменной окружения METRICS_ENABLED=1 (или set_enabled); выключенные почти ничего не стоят
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '0') == '1'
+# Каталог для файлов cProfile (по одному на вызов профилируемой функции); профилирование выключено, если не задан
+METRICS_PROFILE_DIR = os.getenv('METRICS_PROFILE_DIR')
+METRICS_PREFIX = 'projectone'
+
+F = TypeVar('F', bound=Callable[..., Any])
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Счетчики и суммарные времена в памяти процесса с выводом в текстовом формате Prometheus"""
+
+    def __init__(self, prefix: str = METRICS_PREFIX) -> None:
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._summaries: Dict[str, Dict[Labels, List[float]]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Dict[str, Dict[Labels, float]]]] = []
+
+    def inc(self, name: str, value: float = 1.0, help_text: str = '', **labels: str) -> None:
+        """Увеличивает счетчик"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+            self._help.setdefault(name, help_text)
+
+    def observe(self, name: str, value: float, help_text: str = '', **labels: str) -> None:
+        """Добавляет наблюдение (например, длительность) в сводку: число, сумма и максимум"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            summary = self._summaries.setdefault(name, {}).setdefault(key, [0, 0.0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = max(summary[2], value)
+            self._help.setdefault(name, help_text)
+
+    def add_collector(self, collector: Callable[[], Dict[str, Dict[Labels, float]]]) -> None:
+        """Функция, значения которой (текущие показатели) добавляются при каждом выводе"""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Текущие значения: счетчики и сводки по именам и меткам"""
+        with self._lock:
+            return {
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "summaries": {name: {labels: list(values) for labels, values in series.items()}
+                              for name, series in self._summaries.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        """Все показатели в текстовом формате Prometheus"""
+        lines: List[str] = []
+        data = self.snapshot()
+        for name, series in sorted(data["counters"].items()):
+            full_name = f"{self.prefix}_{name}"
+            self._header(lines, full_name, name, 'counter')
+            lines.extend(f"{full_name}{_format_labels(labels)} {value:g}" for labels, value in sorted(series.items()))
+        for name, series in sorted(data["summaries"].items()):
+            full_name = f"{self.prefix}_{name}"
+            self._header(lines, full_name, name, 'summary')
+            for labels, (count, total, maximum) in sorted(series.items()):
+                lines.append(f"{full_name}_count{_format_labels(labels)} {count:g}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {total:.6f}")
+                lines.append(f"{full_name}_max{_format_labels(labels)} {maximum:.6f}")
+        for collector in self._collectors:
+            for name, series in sorted(collector().items()):
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {full_name} gauge")
+                lines.extend(f"{full_name}{_format_labels(labels)} {value:g}"
+                             for labels, value in sorted(series.items()))
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines: List[str], full_name: str, name: str, metric_type: str) -> None:
+        if self._help.get(name):
+            lines.append(f"# HELP {full_name} {self._help[name]}")
+        lines.append(f"# TYPE {full_name} {metric_type}")
+
+    def clear(self) -> None:
+        """Сбрасывает накопленные значения"""
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+def _escape_label_value(value: str) -> str:
+    """Значение метки по правилам текстового формата Prometheus: экранируются \\, " и перевод строки"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (f'{key}="{_escape_label_value(value)}"' for key, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+registry = MetricsRegistry()
+
+_enabled = METRICS_ENABLED
+
+
+def set_enabled(enabled: bool) -> None:
+    """Включает или выключает замеры во время работы"""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class Stage:
+    """Замер одного этапа: длительность и число обработанных строк"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rows: Optional[int] = None
+        self._start = 0.0
+
+    def add_rows(self, rows: int) -> None:
+        """Число строк, обработанных на этапе"""
+        self.rows = (self.rows or 0) + rows
+
+    def __enter__(self) -> 'Stage':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        elapsed = time.perf_counter() - self._start
+        status = 'ok' if exc_type is None else 'error'
+        registry.observe('stage_seconds', elapsed, "Длительность этапов обработки", stage=self.name, status=status)
+        if self.rows is not None:
+            registry.inc('stage_rows_total', self.rows, "Строки, обработанные на этапах", stage=self.name)
+        rows = f", строк: {self.rows}" if self.rows is not None else ''
+        logging.info(f"Этап {self.name}: {elapsed * 1000:.1f} мс{rows}")
+
+
+class _NoopStage(Stage):
+    """Этап при выключенных замерах: ничего не измеряет и не записывает"""
+
+    def add_rows(self, rows: int) -> None:
+        pass
+
+    def __enter__(self) -> 'Stage':
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        pass
+
+
+_NOOP_STAGE = _NoopStage('noop')
+
+
+def stage(name: str) -> Stage:
+    """
+    Контекстный менеджер для замера этапа:
+        with stage('cards') as s:
+            s.add_rows(len(df))
+    """
+    return Stage(name) if _enabled else _NOOP_STAGE
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Декоратор: замеряет каждый вызов функции как этап name (и профилирует, если задан METRICS_PROFILE_DIR)"""
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Stage(name):
+                if METRICS_PROFILE_DIR:
+                    return _profile_call(name, func, *args, **kwargs)
+                return func(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def _profile_call(name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Выполняет функцию под cProfile и сохраняет статистику в METRICS_PROFILE_DIR"""
+    profile_dir = str(METRICS_PROFILE_DIR)
+    os.makedirs(profile_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        path = os.path.join(profile_dir, f"{name}-{datetime.now():%Y%m%d-%H%M%S-%f}.prof")
+        profiler.dump_stats(path)
+        logging.info(f"Профиль {name} сохранен в {path}")
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Учитывает обращение к кэшу (попадание или промах)"""
+    if _enabled:
+        registry.inc('cache_requests_total', 1, "Обращения к кэшам", cache=cache, result='hit' if hit else 'miss')
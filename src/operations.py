@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.columnar_cache import compute_file_hash, load_cached_frame, save_cached_frame
+from src.currency import add_base_amounts
+from src.metrics import record_cache, stage
+from src.schema import apply_schema, memory_usage, validate_operations
+
+OPERATIONS_FILE_PATH = os.path.join(os.path.dirname(__file__), '../data/operations.xlsx')
+
+# Колоночный кэш на диске можно отключить переменной окружения OPERATIONS_DISK_CACHE=0
+DISK_CACHE_ENABLED = os.getenv('OPERATIONS_DISK_CACHE', '1') != '0'
+
+# Кэш загруженных операций: путь -> ((mtime, размер), версия данных, DataFrame, хэш содержимого файла).
+# Версия данных совпадает с хэшем файла, пока к снимку не добавлены операции (см. replace_snapshot)
+_operations_cache: Dict[str, Tuple[Tuple[int, int], str, pd.DataFrame, str]] = {}
+_load_lock = threading.Lock()
+
+
+def _file_signature(file_path: str) -> Tuple[int, int]:
+    """Возвращает время изменения и размер файла, по которым определяется актуальность кэша"""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def normalize_operations(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит столбцы операций к типам схемы (см. src.schema), предупреждает о проблемах
+    и добавляет суммы в базовой валюте (см. src.currency)
+    """
+    df = apply_schema(df)
+    for problem in validate_operations(df):
+        logging.warning(problem)
+    return add_base_amounts(df)
+
+
+def ensure_normalized(df: pd.DataFrame) -> pd.DataFrame:
+    """Возвращает DataFrame с приведенными типами, не изменяя переданный"""
+    if 'Дата операции' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Дата операции']):
+        return normalize_operations(df.copy())
+    return df
+
+
+def load_snapshot(file_path: Optional[str]) -> Tuple[str, str, pd.DataFrame]:
+    """Возвращает путь, хэш содержимого и DataFrame актуальной версии файла операций"""
+    path = os.path.abspath(file_path or OPERATIONS_FILE_PATH)
+    signature = _file_signature(path)
+
+    cached = _operations_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        record_cache('operations', True)
+        return path, cached[1], cached[2]
+
+    record_cache('operations', False)
+    # Файл перечитывает один поток, остальные ждут и получают уже загруженную версию
+    with _load_lock:
+        cached = _operations_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return path, cached[1], cached[2]
+        try:
+            return _load_file(path, signature)
+        except Exception as e:
+            if cached is None:
+                raise
+            # Файл может быть еще не дописан - отдаем прежнюю версию, пока файл не изменится снова:
+            # неудачная версия запоминается, чтобы не разбирать ее заново на каждом запросе
+            logging.warning(f"Не удалось перечитать {path}, используется прежняя версия: {str(e)}")
+            _operations_cache[path] = (signature, cached[1], cached[2], cached[3])
+            return path, cached[1], cached[2]
+
+
+def _load_file(path: str, signature: Tuple[int, int]) -> Tuple[str, str, pd.DataFrame]:
+    """Читает файл операций (из колоночного кэша или Excel) и запоминает его версию"""
+    with stage('load_operations') as measured:
+        content_hash = compute_file_hash(path)
+        df = load_cached_frame(path, content_hash) if DISK_CACHE_ENABLED else None
+        if DISK_CACHE_ENABLED:
+            record_cache('operations_disk', df is not None)
+        if df is not None:
+            logging.info(f"Операции загружены из кэша для {path}: {len(df)} строк")
+            # Таблица курсов могла измениться независимо от файла операций
+            df = add_base_amounts(df)
+        else:
+            df = pd.read_excel(path)
+            raw_size = memory_usage(df)
+            df = normalize_operations(df)
+            logging.info(f"Операции загружены из {path}: {len(df)} строк, "
+                         f"память {raw_size / 2**20:.1f} -> {memory_usage(df) / 2**20:.1f} МБ")
+            if DISK_CACHE_ENABLED:
+                save_cached_frame(path, content_hash, df)
+        measured.add_rows(len(df))
+
+    _operations_cache[path] = (signature, content_hash, df, content_hash)
+    return path, content_hash, df
+
+
+def load_operations(file_path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Загружает операции из Excel файла один раз и возвращает один и тот же DataFrame
+    при повторных вызовах, пока файл не изменился (по времени изменения и размеру).
+    Разобранный Excel сохраняется в колоночный кэш рядом с файлом, поэтому следующий
+    запуск процесса читает его без openpyxl.
+    Возвращаемый DataFrame общий для всех модулей - изменять его на месте нельзя.
+    """
+    return load_snapshot(file_path)[2]
+
+
+def get_operations_version(file_path: Optional[str] = None) -> str:
+    """Версия загруженных операций - хэш содержимого файла"""
+    return load_snapshot(file_path)[1]
+
+
+def find_snapshot(df: pd.DataFrame) -> Optional[Tuple[str, str]]:
+    """Путь и хэш версии файла, загруженный DataFrame которой - df (None, если df не из кэша операций)"""
+    for path, (_, content_hash, cached, _) in list(_operations_cache.items()):
+        if cached is df:
+            return path, content_hash
+    return None
+
+
+def replace_snapshot(file_path: Optional[str], previous: pd.DataFrame, content_hash: str,
+                     df: pd.DataFrame) -> bool:
+    """
+    Заменяет DataFrame загруженной версии файла (например, после добавления новых операций),
+    если текущий DataFrame - previous. Возвращает False, если версия успела смениться.
+    Замена действует, пока файл не изменится: новая версия файла загружается как обычно.
+    """
+    path = os.path.abspath(file_path or OPERATIONS_FILE_PATH)
+    with _load_lock:
+        cached = _operations_cache.get(path)
+        if cached is None or cached[2] is not previous:
+            return False
+        _operations_cache[path] = (cached[0], content_hash, df, cached[3])
+        return True
+
+
+def is_file_version(file_path: Optional[str], content_hash: str) -> bool:
+    """
+    True, если версия данных - содержимое файла на диске, а не снимок с добавленными операциями.
+    Только для таких версий можно читать и записывать кэш на диске: он привязан к хэшу файла.
+    """
+    cached = _operations_cache.get(os.path.abspath(file_path or OPERATIONS_FILE_PATH))
+    return cached is not None and cached[1] == content_hash == cached[3]
+
+
+def clear_operations_cache() -> None:
+    """Очищает кэш загруженных операций"""
+    _operations_cache.clear()
@@ -0,0 +1,204 @@
+import abc
+import atexit
+import copy
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import string
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, TextIO
+
+# Политики fsync: never - не вызывать, batch - один раз на пачку отчетов, always - после каждого отчета
+FSYNC_POLICIES = ('never', 'batch', 'always')
+
+REPORT_BATCH_SIZE = 100
+REPORT_FLUSH_INTERVAL = 0.05
+
+
+def _sync(f: TextIO) -> None:
+    """Сбрасывает буферы файла на диск"""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class ReportSink(abc.ABC):
+    """Базовый приемник отчетов: записывает пачку отчетов в хранилище"""
+
+    key = ''
+
+    @abc.abstractmethod
+    def write_batch(self, reports: List[Dict[str, Any]], fsync: str) -> None:
+        """Записывает пачку отчетов с политикой fsync"""
+
+
+class FileSink(ReportSink):
+    """Один JSON файл, который перезаписывается последним отчетом"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.key = f"file:{os.path.abspath(path)}"
+
+    def write_batch(self, reports: List[Dict[str, Any]], fsync: str) -> None:
+        # Файл все равно перезаписывается, поэтому из пачки важен только последний отчет
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(reports[-1]['result'], f, ensure_ascii=False)
+            if fsync != 'never':
+                _sync(f)
+
+
+class JsonLinesSink(ReportSink):
+    """Файл JSON Lines, в который отчеты только дописываются"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.key = f"jsonl:{os.path.abspath(path)}"
+
+    def write_batch(self, reports: List[Dict[str, Any]], fsync: str) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for report in reports:
+                f.write(json.dumps(report, ensure_ascii=False, default=str) + '\n')
+                if fsync == 'always':
+                    _sync(f)
+            if fsync == 'batch':
+                _sync(f)
+
+
+class TemplateFileSink(ReportSink):
+    """
+    Отдельный файл на каждый отчет. Имя строится по шаблону с полями
+    {report} - имя функции отчета, {seq} - номер отчета, {timestamp} - время создания.
+    Нумерация продолжается с наибольшего номера среди уже записанных по шаблону файлов,
+    поэтому новый процесс не перезаписывает отчеты прежних запусков.
+    """
+
+    def __init__(self, template: str) -> None:
+        self.template = template
+        self.key = f"template:{os.path.abspath(template)}"
+        self._seq = self._last_seq()
+
+    def _last_seq(self) -> int:
+        """Наибольший номер {seq} среди существующих файлов, подходящих под шаблон"""
+        pattern, regex, has_seq = '', '', False
+        for literal, field, _, _ in string.Formatter().parse(self.template):
+            pattern += glob.escape(literal)
+            regex += re.escape(literal)
+            if field is None:
+                continue
+            pattern += '*'
+            if field == 'seq':
+                regex += r'(?P=seq)' if has_seq else r'(?P<seq>\d+)'
+                has_seq = True
+            else:
+                regex += '.*?'
+        if not has_seq:
+            return 0
+        numbers = [int(match.group('seq')) for match in map(re.compile(regex).fullmatch, glob.glob(pattern))
+                   if match is not None]
+        return max(numbers, default=0)
+
+    def write_batch(self, reports: List[Dict[str, Any]], fsync: str) -> None:
+        for report in reports:
+            self._seq += 1
+            path = self.template.format(report=report['report'], seq=self._seq,
+                                        timestamp=report['created'].strftime('%Y%m%d%H%M%S%f'))
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report['result'], f, ensure_ascii=False)
+                if fsync != 'never':
+                    _sync(f)
+
+
+class BackgroundWriter:
+    """Фоновый поток, который пачками передает отчеты приемнику"""
+
+    def __init__(self, sink: ReportSink, fsync: str = 'batch', batch_size: int = REPORT_BATCH_SIZE,
+                 flush_interval: float = REPORT_FLUSH_INTERVAL) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Неизвестная политика fsync: {fsync}")
+        self.sink = sink
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue[Optional[Dict[str, Any]]] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, report: str, result: Dict[str, Any]) -> None:
+        """Ставит в очередь на запись копию отчета: вызывающий код может изменять результат дальше"""
+        self._queue.put({"report": report, "created": datetime.now(), "result": copy.deepcopy(result)})
+
+    def flush(self) -> None:
+        """Ждет, пока все поставленные в очередь отчеты будут записаны"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Записывает оставшиеся отчеты и останавливает поток"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            batch = [item]
+            # Добираем пачку из того, что успело накопиться
+            while len(batch) < self.batch_size:
+                try:
+                    next_item = self._queue.get(timeout=self.flush_interval if len(batch) == 1 else 0)
+                except queue.Empty:
+                    break
+                if next_item is None:
+                    stopped = True
+                    self._queue.task_done()
+                    break
+                batch.append(next_item)
+
+            try:
+                self.sink.write_batch(batch, self.fsync)
+                logging.info(f"Записано отчетов: {len(batch)} ({self.sink.key})")
+            except Exception as e:
+                logging.error(f"Ошибка при записи отчетов ({self.sink.key}): {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+_writers: Dict[str, BackgroundWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(sink: ReportSink, fsync: str = 'batch') -> BackgroundWriter:
+    """
+    Фоновый писатель для приемника (один на приемник). Если писатель уже создан с более слабой
+    политикой fsync, она усиливается до запрошенной: приемник пишется со строжайшей из политик.
+    """
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"Неизвестная политика fsync: {fsync}")
+    with _writers_lock:
+        writer = _writers.get(sink.key)
+        if writer is None:
+            writer = BackgroundWriter(sink, fsync)
+            _writers[sink.key] = writer
+        elif FSYNC_POLICIES.index(fsync) > FSYNC_POLICIES.index(writer.fsync):
+            writer.fsync = fsync
+        return writer
+
+
+def flush_reports() -> None:
+    """Дожидается записи всех отчетов во всех приемниках"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.flush()
+
+
+atexit.register(flush_reports)
@@ -1,75 +1,146 @@
-import json
+import functools
 import logging
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union, overload
 
+import numpy as np
 import pandas as pd
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
+from src.cube import snapshot_cube
+from src.currency import base_amounts
+from src.metrics import timed
+from src.operations import ensure_normalized
+from src.report_sinks import FileSink, ReportSink, get_writer
+from src.repository import OperationsRepository
+from src.response_cache import memoize_response
 
+ReportFunc = Callable[..., Dict[str, Any]]
 
-def log_report_result(func: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+DEFAULT_REPORT_FILE = 'spending_report.json'
+
+
+@overload
+def log_report_result(func: ReportFunc) -> ReportFunc:
+    ...
+
+
+@overload
+def log_report_result(*, sink: Optional[ReportSink] = None,
+                      fsync: str = 'batch') -> Callable[[ReportFunc], ReportFunc]:
+    ...
+
+
+def log_report_result(func: Optional[ReportFunc] = None, *, sink: Optional[ReportSink] = None,
+                      fsync: str = 'batch') -> Union[ReportFunc, Callable[[ReportFunc], ReportFunc]]:
     """
     Декоратор для логирования результата выполнения функции и записи его в JSON-файл.
+    Запись выполняется фоновым потоком (см. report_sinks), поэтому не замедляет отчет.
+    Приемник задается параметром sink (по умолчанию файл spending_report.json перезаписывается),
+    а при вызове отчета файл можно указать аргументом filename.
     """
-    def wrapper(*args: Any, **kwargs: Any) -> Dict[str, Any]:
-        result = func(*args, **kwargs)
-        # Определяем имя файла для записи результата
-        filename = kwargs.get('filename', 'spending_report.json')
+    def decorator(report_func: ReportFunc) -> ReportFunc:
+        @functools.wraps(report_func)
+        def wrapper(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            # Определяем приемник для записи результата
+            filename = kwargs.pop('filename', None)
+            target = FileSink(filename) if filename else sink or FileSink(DEFAULT_REPORT_FILE)
+
+            result = report_func(*args, **kwargs)
+            get_writer(target, fsync).submit(report_func.__name__, result)
 
-        # Записываем результат в файл с ensure_ascii=False
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False)
+            logging.info(f'Result queued for {target.key}')
+            return result
 
-        logging.info(f'Result written to {filename}')
-        return result
+        return wrapper
 
-    return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 
 @log_report_result
-def spending_by_category(transactions: pd.DataFrame,
+@timed('spending_by_category')
+def spending_by_category(transactions: Union[pd.DataFrame, OperationsRepository],
                          category: str,
                          year: Optional[int] = None,
                          month: Optional[int] = None,
                          day: Optional[int] = None) -> Dict[str, Any]:
     """
-    Вычисляет общие траты по заданной категории за последние три месяца до указанной даты.
-    Если год, месяц или день не указаны, запрашивает их у пользователя.
+    Вычисляет общие траты по заданной категории за последние три месяца до указанной даты
+    (90 дней до даты и сама дата целиком). Если год, месяц или день не указаны, используются значения текущей даты.
+    Вместо DataFrame можно передать репозиторий операций (src.repository).
+    Сумма округляется до копеек, как в spending_by_category_batch.
     """
 
-    # Запрос года, месяца и дня у пользователя, если они не указаны
-    if year is None or month is None or day is None:
-        if year is None:
-            year = int(input("Введите год (например, 2020): "))
-        if month is None:
-            month = int(input("Введите месяц (1-12): "))
-        if day is None:
-            day = int(input("Введите день (1-31): "))
+    # Недостающие части даты берем из текущей даты
+    today = datetime.now()
+    date = datetime(year if year is not None else today.year,
+                    month if month is not None else today.month,
+                    day if day is not None else today.day)
 
-    # Создаем дату на основе введенного года, месяца и дня
-    date = datetime(year, month, day)
-
-    # Определяем дату три месяца назад
+    # Определяем дату три месяца назад и начало следующего за датой дня
     three_months_ago = date - timedelta(days=90)
+    next_day = date + timedelta(days=1)
 
-    # Преобразуем столбец 'Дата операции' в формат datetime
-    transactions['Дата операции'] = pd.to_datetime(transactions['Дата операции'], format='%d.%m.%Y %H:%M:%S',
-                                                   errors='coerce')
-
-    # Фильтруем транзакции по категории и дате (включая верхнюю границу)
-    filtered_transactions = transactions[
-        (transactions['Категория'] == category) &
-        (transactions['Дата операции'] >= three_months_ago) &
-        (transactions['Дата операции'] <= date + timedelta(days=1))
-        ]
-
-    # Суммируем траты по выбранной категории (используем абсолютное значение суммы)
-    total_spending = float(filtered_transactions['Сумма операции'].sum())
+    if isinstance(transactions, OperationsRepository):
+        # Репозиторий включает верхнюю границу, поэтому берется последняя секунда даты
+        totals = transactions.category_totals(three_months_ago, next_day - timedelta(seconds=1), [category])
+        return {'category': category, 'total_spending': round(totals.get(category, 0.0), 2),
+                'date': date.strftime('%Y-%m-%d')}
 
     return {
         'category': category,
-        'total_spending': total_spending,
+        'total_spending': category_spending(transactions, category, three_months_ago, next_day),
         'date': date.strftime('%Y-%m-%d')
     }
+
+
+@memoize_response('category_spending')
+def category_spending(transactions: pd.DataFrame, category: str, start: datetime, end: datetime) -> float:
+    """
+    Сумма операций категории в базовой валюте за дни из полуинтервала [start, end), до копеек.
+    Считается по кубу агрегатов (см. src.cube) без просмотра операций; для загруженной версии файла
+    операций куб общий, а результат запоминается (см. src.response_cache).
+    """
+    return snapshot_cube(transactions).category_spending(category, start, end)
+
+
+def spending_by_category_batch(transactions: pd.DataFrame,
+                               pairs: Optional[Sequence[Tuple[str, Union[str, datetime]]]] = None,
+                               categories: Optional[Sequence[str]] = None,
+                               start: Optional[Union[str, datetime]] = None,
+                               end: Optional[Union[str, datetime]] = None) -> pd.DataFrame:
+    """
+    Вычисляет траты за 90 дней до даты (как spending_by_category) сразу для многих пар (категория, дата).
+    Пары передаются списком pairs или как список категорий categories с диапазоном дат start - end (по дням).
+    Суммы берутся из накопленных сумм по отсортированным датам через searchsorted, без повторной фильтрации.
+    Возвращает таблицу со столбцами category, date, total_spending (до копеек, как в spending_by_category).
+    Результат в файл не записывается.
+    """
+    if pairs is None:
+        if categories is None or start is None or end is None:
+            raise ValueError("Нужно передать pairs или categories вместе со start и end")
+        dates = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq='D')
+        pairs = [(category, date) for category in categories for date in dates]
+
+    queries = pd.DataFrame(list(pairs), columns=['category', 'date'])
+    queries['date'] = pd.to_datetime(queries['date']).dt.normalize()
+    queries['total_spending'] = 0.0
+
+    transactions = ensure_normalized(transactions)
+    selected = transactions['Категория'].isin(queries['category'].unique()) & transactions['Дата операции'].notna()
+    operations = transactions.loc[selected, ['Категория', 'Дата операции']].assign(
+        amount=base_amounts(transactions)[selected].to_numpy()
+    ).sort_values(['Категория', 'Дата операции'], kind='stable')
+
+    for category, group in operations.groupby('Категория', sort=False, observed=True):
+        mask = (queries['category'] == category).to_numpy()
+        operation_dates = group['Дата операции'].to_numpy()
+        # Накопленная сумма с нулем в начале: сумма строк [lo, hi) = cumulative[hi] - cumulative[lo]
+        cumulative = np.concatenate(([0.0], np.nancumsum(group['amount'].to_numpy(dtype=float))))
+        window_end = queries.loc[mask, 'date'].to_numpy()
+        lo = np.searchsorted(operation_dates, window_end - np.timedelta64(90, 'D'), side='left')
+        hi = np.searchsorted(operation_dates, window_end + np.timedelta64(1, 'D'), side='left')
+        queries.loc[mask, 'total_spending'] = np.round(cumulative[hi] - cumulative[lo], 2)
+
+    return queries
@@ -0,0 +1,264 @@
+import abc
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from src import operations
+from src.columnar_cache import compute_file_hash, get_database_path
+from src.currency import BASE_AMOUNT_COLUMN, add_base_amounts, base_amounts
+from src.schema import DATE_COLUMNS, apply_schema
+from src.search_index import SEARCH_COLUMNS, SearchIndex, tokenize
+from src.streaming import CHUNK_SIZE, iter_operation_chunks
+from src.time_index import get_time_index
+
+DATE_COLUMN = 'Дата операции'
+# Суммы по категориям считаются в базовой валюте (см. src.currency)
+AMOUNT_COLUMN = BASE_AMOUNT_COLUMN
+CATEGORY_COLUMN = 'Категория'
+CARD_COLUMN = 'Номер карты'
+# Даты хранятся в базе ISO строками: при сравнении строк порядок совпадает с порядком дат
+SQL_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+DateLike = Union[str, datetime, pd.Timestamp]
+
+
+class OperationsRepository(abc.ABC):
+    """
+    Источник операций для анализов: выборки по датам и категориям, суммы по категориям и поиск.
+    Анализы, которым передан репозиторий вместо DataFrame, запрашивают только нужные строки.
+    """
+
+    @abc.abstractmethod
+    def between(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                categories: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Операции с датой в отрезке [start, end] (включительно) и категорией из categories"""
+
+    @abc.abstractmethod
+    def category_totals(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                        categories: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """Суммы операций по категориям за отрезок [start, end]"""
+
+    @abc.abstractmethod
+    def search(self, query: str) -> Tuple[pd.DataFrame, List[int]]:
+        """Найденные операции и их позиции в порядке ранжирования (как SearchIndex.search)"""
+
+
+class FrameRepository(OperationsRepository):
+    """Репозиторий над загруженным DataFrame: выборки по индексу дат, поиск по поисковому индексу"""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = operations.ensure_normalized(df)
+        self._index: Optional[SearchIndex] = None
+
+    def between(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                categories: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        dates = self.df[DATE_COLUMN]
+        if start is not None and end is not None:
+            rows = get_time_index(self.df).window(start, end)
+        else:
+            mask = pd.Series(True, index=self.df.index)
+            if start is not None:
+                mask &= dates >= pd.Timestamp(start)
+            if end is not None:
+                mask &= dates <= pd.Timestamp(end)
+            rows = self.df[mask]
+        if categories is not None:
+            rows = rows[rows[CATEGORY_COLUMN].isin(categories)]
+        return rows
+
+    def category_totals(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                        categories: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        rows = self.between(start, end, categories)
+        totals = base_amounts(rows).groupby(rows[CATEGORY_COLUMN], observed=True).sum()
+        return {str(category): float(amount) for category, amount in totals.items()}
+
+    def search(self, query: str) -> Tuple[pd.DataFrame, List[int]]:
+        if self._index is None:
+            self._index = SearchIndex(self.df)
+        return self.df, self._index.search(query)
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _sql_date(value: DateLike) -> str:
+    return pd.Timestamp(value).strftime(SQL_DATE_FORMAT)
+
+
+def _to_sql_rows(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Пачка операций в виде для записи в SQLite: даты - ISO строками, категории - строками,
+    с суммами в базовой валюте
+    """
+    chunk = chunk.copy()
+    if BASE_AMOUNT_COLUMN not in chunk.columns:
+        add_base_amounts(chunk)
+    for column in chunk.columns:
+        values = chunk[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            chunk[column] = values.dt.strftime(SQL_DATE_FORMAT)
+        elif isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_extension_array_dtype(values):
+            chunk[column] = values.astype(object).where(values.notna(), None)
+    return chunk
+
+
+class SQLiteRepository(OperationsRepository):
+    """
+    Операции во встроенной базе SQLite с индексами по дате, категории и карте
+    и полнотекстовым индексом (FTS5) по описанию и категории. В памяти процесса
+    оказываются только строки, выбранные запросом.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"База операций {db_path} не найдена")
+        self.db_path = db_path
+        self._local = threading.local()
+        self._terms: Optional[List[str]] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Соединение текущего потока (соединение SQLite нельзя использовать из разных потоков)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(Path(self.db_path).resolve().as_uri() + '?mode=ro', uri=True)
+            connection.create_function('casefold', 1, lambda text: text.casefold() if text else text,
+                                       deterministic=True)
+            # Словарь полнотекстового индекса и вхождения его слов по строкам - для поиска подстрок
+            connection.execute("CREATE VIRTUAL TABLE temp.operations_terms USING fts5vocab(main, operations_fts, row)")
+            connection.execute("CREATE VIRTUAL TABLE temp.operations_instances "
+                               "USING fts5vocab(main, operations_fts, instance)")
+            self._local.connection = connection
+        return connection
+
+    @classmethod
+    def build(cls, chunks: Iterable[pd.DataFrame], db_path: str) -> 'SQLiteRepository':
+        """
+        Создает базу из пачек операций (в типах схемы) и строит индексы после загрузки всех строк.
+        База пишется во временный файл и заменяет прежнюю только целиком.
+        """
+        tmp_path = f"{db_path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        connection = sqlite3.connect(tmp_path)
+        try:
+            rows = 0
+            columns: List[str] = []
+            for chunk in chunks:
+                _to_sql_rows(chunk).to_sql('operations', connection, if_exists='append', index=False)
+                columns = columns or [str(column) for column in chunk.columns]
+                rows += len(chunk)
+            if not columns:
+                raise ValueError("Нет операций для загрузки в базу")
+            cls._create_indexes(connection, columns)
+            connection.commit()
+        except Exception:
+            connection.close()
+            os.remove(tmp_path)
+            raise
+        connection.close()
+        os.replace(tmp_path, db_path)
+        logging.info(f"Операции загружены в базу {db_path}: {rows} строк")
+        return cls(db_path)
+
+    @staticmethod
+    def _create_indexes(connection: sqlite3.Connection, columns: Sequence[str]) -> None:
+        for name, indexed in (('date', [DATE_COLUMN]), ('category', [CATEGORY_COLUMN, DATE_COLUMN]),
+                              ('card', [CARD_COLUMN, DATE_COLUMN])):
+            if all(column in columns for column in indexed):
+                connection.execute(f"CREATE INDEX operations_{name} ON operations "
+                                   f"({', '.join(_quote(column) for column in indexed)})")
+        fts_columns = [column for column in SEARCH_COLUMNS if column in columns]
+        if fts_columns:
+            quoted = ', '.join(_quote(column) for column in fts_columns)
+            # remove_diacritics 0: иначе «й» и «ё» совпадали бы с «и» и «е»
+            connection.execute(f"CREATE VIRTUAL TABLE operations_fts USING fts5({quoted}, content='operations', "
+                               f"content_rowid='rowid', tokenize='unicode61 remove_diacritics 0')")
+            connection.execute("INSERT INTO operations_fts(operations_fts) VALUES('rebuild')")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, db_path: str, chunk_size: int = CHUNK_SIZE) -> 'SQLiteRepository':
+        """Создает базу из DataFrame операций"""
+        df = operations.ensure_normalized(df)
+        return cls.build((df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size)), db_path)
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> pd.DataFrame:
+        """Строки запроса в типах схемы (даты из ISO строк, повторяющиеся строки - category)"""
+        df = pd.read_sql_query(sql, self.connection, params=list(params))
+        for column in DATE_COLUMNS:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column], format=SQL_DATE_FORMAT)
+        return apply_schema(df)
+
+    def _where(self, start: Optional[DateLike], end: Optional[DateLike],
+               categories: Optional[Sequence[str]]) -> Tuple[str, List[Any]]:
+        conditions: List[str] = []
+        params: List[Any] = []
+        if start is not None:
+            conditions.append(f"{_quote(DATE_COLUMN)} >= ?")
+            params.append(_sql_date(start))
+        if end is not None:
+            conditions.append(f"{_quote(DATE_COLUMN)} <= ?")
+            params.append(_sql_date(end))
+        if categories is not None:
+            conditions.append(f"{_quote(CATEGORY_COLUMN)} IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        return (' WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+    def between(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                categories: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        where, params = self._where(start, end, categories)
+        return self._query(f"SELECT * FROM operations{where} ORDER BY rowid", params)
+
+    def category_totals(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                        categories: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        where, params = self._where(start, end, categories)
+        category = _quote(CATEGORY_COLUMN)
+        where = f"{where} AND {category} IS NOT NULL" if where else f" WHERE {category} IS NOT NULL"
+        rows = self.connection.execute(f"SELECT {category}, SUM({_quote(AMOUNT_COLUMN)}) FROM operations{where} "
+                                       f"GROUP BY {category}", params).fetchall()
+        return {str(name): float(amount) for name, amount in rows}
+
+    def search(self, query: str) -> Tuple[pd.DataFrame, List[int]]:
+        """
+        Кандидаты - строки, где каждое слово запроса встречается внутри какого-нибудь слова строки:
+        подходящие слова ищутся в словаре полнотекстового индекса, строки - по вхождениям этих слов.
+        Среди кандидатов есть и совпадения по префиксу, и подстроки; они ранжируются так же, как в SearchIndex.
+        """
+        words = tokenize(query)
+        if words:
+            if self._terms is None:
+                # База открыта только на чтение, поэтому словарь читается один раз
+                self._terms = [term for (term,) in self.connection.execute("SELECT term FROM operations_terms")]
+            containing = ("rowid IN (SELECT doc FROM operations_instances "
+                          "WHERE term IN (SELECT value FROM json_each(?)))")
+            params = [json.dumps([term for term in self._terms if word in term], ensure_ascii=False) for word in words]
+            candidates = self._query(f"SELECT * FROM operations WHERE {' AND '.join([containing] * len(words))} "
+                                     f"ORDER BY rowid", params)
+        else:
+            # Запрос без букв и цифр не попадает в словарь индекса - строки просматриваются целиком
+            conditions = ' OR '.join(f"instr(casefold({_quote(column)}), ?) > 0" for column in SEARCH_COLUMNS)
+            candidates = self._query(f"SELECT * FROM operations WHERE {conditions} ORDER BY rowid",
+                                     [query.casefold()] * len(SEARCH_COLUMNS))
+        return candidates, SearchIndex(candidates).search(query)
+
+
+def get_sqlite_repository(file_path: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> SQLiteRepository:
+    """
+    База SQLite для файла операций (xlsx или csv) рядом с колоночным кэшем. Строится один раз
+    на версию файла, файл читается пачками, поэтому он не загружается в память целиком.
+    """
+    path = os.path.abspath(file_path or operations.OPERATIONS_FILE_PATH)
+    db_path = get_database_path(path, compute_file_hash(path))
+    if os.path.exists(db_path):
+        return SQLiteRepository(db_path)
+    return SQLiteRepository.build(iter_operation_chunks(path, chunk_size), db_path)
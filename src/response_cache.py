@@ -0,0 +1,138 @@
+import functools
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar, cast
+
+import pandas as pd
+
+from src import operations
+from src.metrics import record_cache
+
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '1024'))
+# Кэш ответов можно отключить переменной окружения RESPONSE_CACHE=0
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE', '1') != '0'
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class ResponseCache:
+    """
+    Кэш результатов анализов с вытеснением давно не использованных (LRU).
+    Записи относятся к версии файла операций - загруженному DataFrame (снимку): при появлении
+    нового снимка файла записи прежнего удаляются. Одновременные запросы с одним ключом
+    ждут одного вычисления, а не считают каждый заново.
+    """
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[Tuple[str, Hashable], Any] = OrderedDict()
+        self._pending: Dict[Tuple[str, int, Hashable], Future] = {}
+        self._snapshots: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidated": 0}
+
+    def get(self, path: str, snapshot: pd.DataFrame, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Результат по ключу для снимка файла path: из кэша, из идущего вычисления или через compute"""
+        # Снимок жив, пока идет вычисление, поэтому его id не может достаться другому DataFrame
+        pending_key = (path, id(snapshot), key)
+        with self._lock:
+            if self._snapshots.get(path) is not snapshot:
+                self._invalidate(path)
+                self._snapshots[path] = snapshot
+            if (path, key) in self._entries:
+                self._entries.move_to_end((path, key))
+                self._stats["hits"] += 1
+                record_cache('responses', True)
+                return self._entries[(path, key)]
+            pending = self._pending.get(pending_key)
+            owner = pending is None
+            if pending is None:
+                pending = self._pending[pending_key] = Future()
+                self._stats["misses"] += 1
+                record_cache('responses', False)
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            # Ошибка не запоминается: следующий запрос вычисляет результат заново
+            with self._lock:
+                self._pending.pop(pending_key, None)
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            self._pending.pop(pending_key, None)
+            if self._snapshots.get(path) is snapshot:
+                self._entries[(path, key)] = value
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        pending.set_result(value)
+        return value
+
+    def _invalidate(self, path: str) -> None:
+        """Удаляет записи прежнего снимка файла (вызывается под блокировкой)"""
+        stale = [entry_key for entry_key in self._entries if entry_key[0] == path]
+        for entry_key in stale:
+            del self._entries[entry_key]
+        self._stats["invalidated"] += len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики попаданий, промахов и объединенных запросов"""
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        """Очищает записи и счетчики"""
+        with self._lock:
+            self._entries.clear()
+            self._snapshots.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+
+
+response_cache = ResponseCache()
+
+
+def find_operations_snapshot(data: Any, file_path: Optional[str] = None) -> Optional[Tuple[str, pd.DataFrame]]:
+    """
+    Путь и загруженный снимок файла операций для данных анализа: None - актуальная версия файла
+    file_path, DataFrame - он сам, если это загруженный снимок файла. Для других данных снимка нет.
+    """
+    if data is None:
+        path, _, df = operations.load_snapshot(file_path)
+        return path, df
+    if isinstance(data, pd.DataFrame):
+        found = operations.find_snapshot(data)
+        return (found[0], data) if found is not None else None
+    return None
+
+
+def memoize_response(name: str, file_path: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Декоратор для функций анализа вида func(data, *args), где data - операции (DataFrame)
+    или None (операции из файла file_path). Результат запоминается по имени, аргументам и версии
+    файла операций. Для DataFrame, который не является загруженным снимком файла, и для репозиториев
+    функция вызывается без кэша. Запомненный результат общий для всех вызовов - изменять его нельзя.
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(data: Any, *args: Any, **kwargs: Any) -> Any:
+            snapshot = find_operations_snapshot(data, file_path) if RESPONSE_CACHE_ENABLED else None
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                snapshot = None
+            if snapshot is None:
+                return func(data, *args, **kwargs)
+            return response_cache.get(*snapshot, key, lambda: func(data, *args, **kwargs))
+
+        return cast(F, wrapper)
+
+    return decorator
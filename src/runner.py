@@ -0,0 +1,331 @@
+"""
+Запуск анализов для многих файлов операций (или настроек пользователей) в пуле процессов.
+
+Запуск:
+    python -m src.runner data/a.xlsx data/b.xlsx --analysis cashback --date "2021-12-31 16:44:00"
+    python -m src.runner --tasks tasks.json --workers 4 --timeout 60 --output results.json
+
+Каждый файл сначала один раз загружается в колоночный кэш (Feather), после чего задачи по нему
+читают кэш через отображение в память, а не разбирают Excel заново в каждом процессе.
+Ошибка или превышение времени в одной задаче не останавливает остальные, аварийное завершение
+процесса пула - тоже: пул создается заново, ошибку получает только задача, уронившая процесс.
+Ограничение времени работает через SIGALRM и срабатывает только между инструкциями Python: задачу,
+зависшую внутри кода на C (openpyxl, pandas), оно не прервет.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from types import FrameType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple, Union, cast
+
+import pandas as pd
+
+from src import operations
+from src.config import setup_logging
+from src.reports import spending_by_category
+from src.services import analyze_cashback_categories
+from src.utils import load_user_settings
+from src.views import base_func_module_one
+
+RUNNER_WORKERS = int(os.getenv('RUNNER_WORKERS', str(os.cpu_count() or 1)))
+# Время (секунды) на одну задачу; 0 - без ограничения
+RUNNER_TIMEOUT = float(os.getenv('RUNNER_TIMEOUT', '300'))
+# spawn одинаково работает на всех платформах и не копирует в процессы блокировки и кэши родителя
+RUNNER_START_METHOD = os.getenv('RUNNER_START_METHOD', 'spawn')
+
+Task = Mapping[str, Any]
+Analysis = Callable[[pd.DataFrame, Task], Any]
+
+
+class TaskTimeout(TimeoutError):
+    """Задача не уложилась в отведенное время"""
+
+
+def _task_date(task: Task) -> datetime:
+    """Дата анализа задачи ('date' в формате 'YYYY-MM-DD HH:MM:SS'), по умолчанию - текущая"""
+    date_str = task.get('date')
+    return datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S') if date_str else datetime.now()
+
+
+def home_page_analysis(df: pd.DataFrame, task: Task) -> Any:
+    """Страница «Главная» на дату задачи с настройками задачи ('settings' - путь к JSON или словарь)"""
+    settings = task.get('settings')
+    if isinstance(settings, str):
+        settings = load_user_settings(settings)
+    return json.loads(base_func_module_one(_task_date(task).strftime('%Y-%m-%d %H:%M:%S'), df, settings))
+
+
+def cashback_analysis(df: pd.DataFrame, task: Task) -> Any:
+    """Топ категорий по кешбэку за месяц даты задачи"""
+    date = _task_date(task)
+    return json.loads(analyze_cashback_categories(date.year, date.month, df))
+
+
+def spending_analysis(df: pd.DataFrame, task: Task) -> Any:
+    """Траты по категории задачи ('category') за 90 дней до даты задачи"""
+    if not task.get('category'):
+        raise ValueError("Для анализа трат нужна категория ('category')")
+    date = _task_date(task)
+    # Отчет вызывается без декоратора: процессы не должны одновременно писать в один файл отчета
+    spending = getattr(spending_by_category, '__wrapped__', spending_by_category)
+    return spending(df, task['category'], date.year, date.month, date.day)
+
+
+ANALYSES: Dict[str, Analysis] = {
+    'home_page': home_page_analysis,
+    'cashback': cashback_analysis,
+    'spending': spending_analysis,
+}
+
+
+def _raise_timeout(signum: int, frame: Optional[FrameType]) -> None:
+    raise TaskTimeout()
+
+
+def _call_with_timeout(func: Callable[[], Any], timeout: float) -> Any:
+    """
+    Вызывает функцию с ограничением времени через SIGALRM (в главном потоке процесса на Unix).
+    Где сигнал недоступен, функция выполняется без ограничения. Сигнал обрабатывается между
+    инструкциями Python, поэтому долгий вызов кода на C (openpyxl, pandas) он не прерывает.
+    """
+    if timeout <= 0 or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        return func()
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _outcome(func: Callable[[], Any], timeout: float) -> Dict[str, Any]:
+    """Результат вызова в виде словаря: status ok / error / timeout, результат или текст ошибки, время"""
+    start = time.perf_counter()
+    try:
+        outcome: Dict[str, Any] = {"status": "ok", "result": _call_with_timeout(func, timeout)}
+    except TaskTimeout:
+        outcome = {"status": "timeout", "error": f"Превышено время выполнения ({timeout:g} с)"}
+    except Exception as e:
+        outcome = {"status": "error", "error": f"{type(e).__name__}: {str(e)}"}
+    outcome["seconds"] = round(time.perf_counter() - start, 3)
+    return outcome
+
+
+def prepare_file(file_path: str, timeout: float = RUNNER_TIMEOUT) -> Dict[str, Any]:
+    """Загружает файл операций и сохраняет его колоночный кэш (выполняется в процессе пула)"""
+    return _outcome(lambda: operations.get_operations_version(file_path), timeout)
+
+
+def run_task(file_path: str, analysis: Union[str, Analysis], task: Task,
+             timeout: float = RUNNER_TIMEOUT) -> Dict[str, Any]:
+    """Выполняет один анализ для файла операций (выполняется в процессе пула)"""
+    def call() -> Any:
+        func = ANALYSES[analysis] if isinstance(analysis, str) else analysis
+        return func(operations.load_operations(file_path), task)
+
+    return _outcome(call, timeout)
+
+
+def _normalize_task(task: Union[str, Task]) -> Dict[str, Any]:
+    """Задача в виде словаря с абсолютным путем к файлу операций"""
+    spec = {"file_path": task} if isinstance(task, str) else dict(task)
+    if not spec.get('file_path'):
+        raise ValueError(f"В задаче не указан файл операций ('file_path'): {task}")
+    spec['file_path'] = os.path.abspath(spec['file_path'])
+    return spec
+
+
+# Очередь, в которую процесс пула записывает номер вызова перед его выполнением
+_started_queue: Any = None
+
+
+def _init_worker(started_queue: Any, log_level: int) -> None:
+    global _started_queue
+    _started_queue = started_queue
+    # Процесс пула запускается заново (spawn) и логирование в нем настраивается так же, как в основном
+    setup_logging(log_level)
+
+
+def _tracked_call(number: int, func: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+    """Отмечает начало вызова (запись в SimpleQueue синхронная и не теряется при падении процесса)"""
+    if _started_queue is not None:
+        _started_queue.put(number)
+    return func(*args)
+
+
+def _crashed(error: BaseException) -> Dict[str, Any]:
+    return {"status": "error", "error": f"Процесс пула завершился аварийно: {str(error) or type(error).__name__}",
+            "seconds": 0.0}
+
+
+Call = Tuple[Callable[..., Dict[str, Any]], Tuple[Any, ...]]
+
+
+class RecoveringPool:
+    """
+    Пул процессов, который переживает аварийное завершение процесса (segfault, нехватка памяти, os._exit).
+    Если пул сломался, он создается заново и незавершенные вызовы отправляются повторно; ошибку получает
+    только вызов, выполнявшийся в упавшем процессе. Если в момент падения выполнялось несколько вызовов,
+    каждый из них повторяется отдельно в своем процессе, чтобы найти тот, который роняет процесс.
+    """
+
+    def __init__(self, workers: int, context: Any) -> None:
+        self.workers = workers
+        self.context = context
+        self._started = context.SimpleQueue()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _new_executor(self, workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=self.context,
+                                   initializer=_init_worker,
+                                   initargs=(self._started, logging.getLogger().getEffectiveLevel()))
+
+    def _drain_started(self) -> Set[int]:
+        started = set()
+        while not self._started.empty():
+            started.add(self._started.get())
+        return started
+
+    def _run_alone(self, number: int, call: Call) -> Dict[str, Any]:
+        """Выполняет вызов в отдельном процессе: если процесс падает, виноват именно этот вызов"""
+        with self._new_executor(1) as executor:
+            try:
+                return executor.submit(_tracked_call, number, call[0], *call[1]).result()
+            except BrokenProcessPool as e:
+                return _crashed(e)
+
+    def run(self, calls: Sequence[Call]) -> List[Dict[str, Any]]:
+        """Выполняет вызовы (функция, аргументы) и возвращает их результаты по порядку"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+        pending = list(range(len(calls)))
+        while pending:
+            if self._executor is None:
+                self._executor = self._new_executor(self.workers)
+            self._drain_started()
+            futures = [(number, self._executor.submit(_tracked_call, number, calls[number][0], *calls[number][1]))
+                       for number in pending]
+            crashed: List[int] = []
+            error: Optional[BaseException] = None
+            for number, future in futures:
+                try:
+                    results[number] = future.result()
+                except BrokenProcessPool as e:
+                    crashed.append(number)
+                    error = e
+            if not crashed:
+                break
+
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            # Вызовы, которые начались, но не завершились, выполнялись в момент падения
+            started = self._drain_started()
+            suspects = [number for number in crashed if number in started] or crashed
+            logging.warning(f"Процесс пула завершился аварийно, пул создан заново: {len(suspects)} подозрительных "
+                            f"и {len(crashed) - len(suspects)} отложенных вызовов")
+            if len(suspects) == 1 and error is not None:
+                results[suspects[0]] = _crashed(error)
+            else:
+                for number in suspects:
+                    results[number] = self._run_alone(number, calls[number])
+            pending = [number for number in crashed if number not in suspects]
+        return cast(List[Dict[str, Any]], results)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> 'RecoveringPool':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def run_analyses(tasks: Sequence[Union[str, Task]],
+                 analyses: Sequence[Union[str, Analysis]] = ('cashback',),
+                 workers: int = RUNNER_WORKERS,
+                 timeout: float = RUNNER_TIMEOUT) -> List[Dict[str, Any]]:
+    """
+    Выполняет анализы для каждой задачи в пуле из workers процессов и возвращает результаты
+    в порядке задач и анализов. Задача - путь к файлу операций или словарь с 'file_path' и параметрами
+    анализов ('date', 'settings', 'category'). Анализ - имя из ANALYSES или функция (df, task),
+    доступная для импорта в процессах пула. workers=0 - выполнение в текущем процессе.
+    """
+    specs = [_normalize_task(task) for task in tasks]
+    files = list(dict.fromkeys(spec['file_path'] for spec in specs))
+    jobs = [(index, spec, analysis) for index, spec in enumerate(specs) for analysis in analyses]
+
+    if workers <= 0:
+        prepared = dict(zip(files, (prepare_file(path, timeout) for path in files)))
+        outcomes = [run_task(spec['file_path'], analysis, spec, timeout)
+                    if prepared[spec['file_path']]["status"] == "ok" else prepared[spec['file_path']]
+                    for _, spec, analysis in jobs]
+    else:
+        context = multiprocessing.get_context(RUNNER_START_METHOD)
+        with RecoveringPool(workers, context) as pool:
+            # Сначала каждый файл загружается один раз, затем задачи по нему читают готовый кэш
+            prepared = dict(zip(files, pool.run([(prepare_file, (path, timeout)) for path in files])))
+            ready = [position for position, (_, spec, _) in enumerate(jobs)
+                     if prepared[spec['file_path']]["status"] == "ok"]
+            completed = dict(zip(ready, pool.run([(run_task, (jobs[position][1]['file_path'], jobs[position][2],
+                                                              jobs[position][1], timeout)) for position in ready])))
+            outcomes = [completed.get(position, prepared[spec['file_path']])
+                        for position, (_, spec, _) in enumerate(jobs)]
+
+    results = []
+    for (index, spec, analysis), outcome in zip(jobs, outcomes):
+        name = analysis if isinstance(analysis, str) else getattr(analysis, '__name__', str(analysis))
+        results.append({"task": index, "file_path": spec['file_path'], "analysis": name, **outcome})
+        if outcome["status"] != "ok":
+            logging.error(f"Задача {index} ({name}, {spec['file_path']}): {outcome['error']}")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Анализы для многих файлов операций в пуле процессов")
+    parser.add_argument('files', nargs='*', help="файлы операций (xlsx)")
+    parser.add_argument('--tasks', help="JSON файл со списком задач: пути или словари с 'file_path'")
+    parser.add_argument('--analysis', action='append', choices=sorted(ANALYSES),
+                        help="анализ (можно несколько раз), по умолчанию - cashback")
+    parser.add_argument('--date', help="дата анализа 'YYYY-MM-DD HH:MM:SS' для задач без даты")
+    parser.add_argument('--category', help="категория для анализа трат для задач без категории")
+    parser.add_argument('--settings', help="файл пользовательских настроек для задач без настроек")
+    parser.add_argument('--workers', type=int, default=RUNNER_WORKERS, help="число процессов (0 - без пула)")
+    parser.add_argument('--timeout', type=float, default=RUNNER_TIMEOUT, help="время на одну задачу, секунды")
+    parser.add_argument('--output', help="файл для результатов в формате JSON (по умолчанию - stdout)")
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    tasks: List[Union[str, Task]] = list(args.files)
+    if args.tasks:
+        with open(args.tasks, encoding='utf-8') as f:
+            tasks.extend(json.load(f))
+    if not tasks:
+        parser.error("не указаны файлы операций или --tasks")
+    defaults = {key: value for key, value in
+                (('date', args.date), ('category', args.category), ('settings', args.settings)) if value}
+    specs = [{**defaults, **_normalize_task(task)} for task in tasks]
+
+    results = run_analyses(specs, args.analysis or ['cashback'], args.workers, args.timeout)
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import logging
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+# Версия схемы типов: при ее изменении колоночный кэш на диске строится заново
+SCHEMA_VERSION = 3
+
+# Даты разбираются один раз, в формате выгрузки банка
+DATE_COLUMNS = {
+    'Дата операции': '%d.%m.%Y %H:%M:%S',
+    'Дата платежа': '%d.%m.%Y',
+}
+# Суммы, которые складываются в отчетах, остаются 64-битными, чтобы не терять копейки
+AMOUNT_COLUMNS = ['Сумма операции', 'Сумма платежа', 'Сумма операции с округлением']
+# Вспомогательные числовые столбцы хранятся в минимальном подходящем типе
+COMPACT_FLOAT_COLUMNS = ['Кэшбэк']
+# Целые столбцы с дробными значениями остаются float64, чтобы не отбрасывать дробную часть
+COMPACT_INT_COLUMNS = ['MCC', 'Бонусы (включая кэшбэк)', 'Округление на инвесткопилку']
+# Строки с небольшим числом различных значений хранятся как category
+CATEGORICAL_COLUMNS = ['Номер карты', 'Статус', 'Валюта операции', 'Валюта платежа', 'Категория', 'Описание']
+
+REQUIRED_COLUMNS = ['Дата операции', 'Сумма операции', 'Категория', 'Описание']
+
+
+def _has_fractions(values: pd.Series) -> bool:
+    """Есть ли среди чисел столбца значения с дробной частью"""
+    numbers = pd.to_numeric(values, errors='coerce').dropna()
+    return bool((numbers % 1 != 0).any())
+
+
+def validate_operations(df: pd.DataFrame) -> List[str]:
+    """Список проблем со столбцами операций (пустой, если все ожидаемые столбцы на месте)"""
+    problems = [f"Нет столбца '{column}'" for column in REQUIRED_COLUMNS if column not in df.columns]
+    problems += [f"В столбце '{column}' есть дробные значения, он хранится как float64"
+                 for column in COMPACT_INT_COLUMNS if column in df.columns and _has_fractions(df[column])]
+    return problems
+
+
+def memory_usage(df: pd.DataFrame) -> int:
+    """Занимаемая DataFrame память в байтах (с учетом строк)"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _parse_dates(values: pd.Series, date_format: str) -> pd.Series:
+    """Разбирает даты в формате выгрузки, остальные строки - как дату с днем в начале"""
+    parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+    unparsed = parsed.isna() & values.notna()
+    if unparsed.any():
+        parsed[unparsed] = pd.to_datetime(values[unparsed], errors='coerce', format='mixed', dayfirst=True)
+        invalid = int((parsed.isna() & values.notna()).sum())
+        if invalid:
+            logging.warning(f"В столбце '{values.name}' не удалось разобрать дат: {invalid}")
+    return parsed
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит столбцы операций к компактным типам: даты - datetime64, суммы - 64-битные числа,
+    вспомогательные числа - минимальный целый или float32, повторяющиеся строки - category.
+    Изменяет и возвращает переданный DataFrame.
+    """
+    for column, date_format in DATE_COLUMNS.items():
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = _parse_dates(df[column], date_format)
+
+    for column in AMOUNT_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+
+    for column in COMPACT_FLOAT_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float32')
+
+    for column in COMPACT_INT_COLUMNS:
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors='coerce')
+            if _has_fractions(values):
+                df[column] = values.astype('float64')
+            elif values.isna().any():
+                # Пропуски хранятся в целочисленном типе с поддержкой NA
+                df[column] = values.astype('Int32')
+            else:
+                df[column] = pd.to_numeric(values.astype('int64'), downcast='integer')
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            values = df[column]
+            df[column] = values.where(values.isna(), values.astype(str)).astype('category')
+
+    return df
+
+
+def concat_operations(df: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Новый DataFrame: строки df, за которыми идут new_rows (оба в типах схемы).
+    Категориальные столбцы склеиваются по кодам с дополненным списком категорий:
+    pd.concat сравнивал бы категории целиком, а при разных категориях превращал столбец в object.
+    """
+    new_rows = new_rows.reindex(columns=df.columns)
+    columns: Dict[str, Union[pd.Series, pd.Categorical]] = {}
+    for column in df.columns:
+        old, new = df[column], new_rows[column]
+        if isinstance(old.dtype, pd.CategoricalDtype):
+            new = new.astype(object)
+            new = new.where(new.isna(), new.astype(str))
+            categories = old.cat.categories
+            missing = pd.Index(new.dropna().unique()).difference(categories)
+            dtype = pd.CategoricalDtype(categories.append(missing)) if len(missing) else old.dtype
+            codes = np.concatenate([old.cat.codes.to_numpy(), dtype.categories.get_indexer(pd.Index(new))])
+            columns[column] = pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+        else:
+            columns[column] = pd.concat([old, new], ignore_index=True)
+    return pd.DataFrame(columns)
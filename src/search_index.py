@@ -0,0 +1,228 @@
+import bisect
+import copy
+import itertools
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from src import operations
+from src.columnar_cache import load_cached_object, save_cached_object
+from src.metrics import record_cache, stage
+
+SEARCH_COLUMNS = ['Описание', 'Категория']
+INDEX_CACHE_NAME = 'search_index.v1'
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Сколько индексов хранится для DataFrame, которые не являются снимками файла операций
+FRAME_INDEX_LIMIT = 4
+
+# Индексы загруженных операций: путь -> (DataFrame, по которому построен индекс, индекс)
+_index_cache: Dict[str, Tuple[pd.DataFrame, 'SearchIndex']] = {}
+# Индексы переданных DataFrame: id DataFrame -> (DataFrame, индекс)
+_frame_index_cache: 'OrderedDict[int, Tuple[pd.DataFrame, SearchIndex]]' = OrderedDict()
+_frame_index_lock = threading.Lock()
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на слова без учета регистра (кириллица и латиница)"""
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class SearchIndex:
+    """
+    Инвертированный индекс по описанию и категории операций.
+    Слова запроса ищутся по префиксу, строки должны содержать все слова запроса. К ним добавляются
+    строки, где запрос встречается как подстрока внутри слова (запрос «кафе» находит «Антикафе»).
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.texts: List[List[str]] = []
+        postings: Dict[str, Set[int]] = {}
+
+        columns = [df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+                   for column in SEARCH_COLUMNS]
+        for position, values in enumerate(zip(*columns)):
+            row_texts = [value.casefold() if isinstance(value, str) else '' for value in values]
+            self.texts.append(row_texts)
+            for text in row_texts:
+                for token in tokenize(text):
+                    postings.setdefault(token, set()).add(position)
+
+        self.tokens: List[str] = sorted(postings)
+        self.postings: Dict[str, List[int]] = {token: sorted(rows) for token, rows in postings.items()}
+
+    def extended(self, new_rows: pd.DataFrame) -> 'SearchIndex':
+        """
+        Индекс для операций, к которым в конец добавлены new_rows. Прежний индекс не изменяется:
+        копируются только списки строк слов, которые встречаются в новых строках.
+        """
+        delta = SearchIndex(new_rows)
+        offset = len(self.texts)
+        index = copy.copy(self)
+        index.texts = self.texts + delta.texts
+        index.postings = dict(self.postings)
+        for token, rows in delta.postings.items():
+            index.postings[token] = self.postings.get(token, []) + [offset + row for row in rows]
+        new_tokens = [token for token in delta.tokens if token not in self.postings]
+        if new_tokens:
+            index.tokens = sorted(self.tokens + new_tokens)
+        return index
+
+    def _match_prefix(self, prefix: str) -> Dict[int, int]:
+        """Строки со словами, начинающимися с префикса, и вес совпадения (2 - слово целиком)"""
+        matches: Dict[int, int] = {}
+        start = bisect.bisect_left(self.tokens, prefix)
+        for token in self.tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            weight = 2 if token == prefix else 1
+            for position in self.postings[token]:
+                if matches.get(position, 0) < weight:
+                    matches[position] = weight
+        return matches
+
+    def search(self, query: str) -> List[int]:
+        """
+        Позиции строк, где все слова запроса найдены по префиксу или запрос встречается как подстрока:
+        сначала строки с запросом целиком, затем более точные совпадения по словам, затем в порядке строк
+        """
+        needle = query.casefold()
+        if TOKEN_PATTERN.fullmatch(needle):
+            return self._search_word(needle)
+
+        scores: Optional[Dict[int, int]] = None
+        for token in tokenize(query):
+            matches = self._match_prefix(token)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {position: score + matches[position] for position, score in scores.items()
+                          if position in matches}
+            if not scores:
+                break
+
+        # Запрос из нескольких слов может пересекать границы слов, поэтому строки проверяются целиком,
+        # но только те, где каждое слово запроса встречается внутри какого-нибудь слова строки
+        candidates: Optional[Set[int]] = None
+        for word in tokenize(query):
+            rows = set(itertools.chain.from_iterable(self._containing(word)))
+            candidates = rows if candidates is None else candidates & rows
+            if not candidates:
+                break
+        substring = set(self._search_substring(query, candidates))
+
+        # Строки, где запрос встречается целиком, поднимаются выше остальных
+        ranked = {position: (position in substring, (scores or {}).get(position, 0))
+                  for position in substring.union(scores or {})}
+        return sorted(ranked, key=lambda position: (not ranked[position][0], -ranked[position][1], position))
+
+    def _containing(self, word: str) -> Iterator[List[int]]:
+        """Списки строк слов словаря, которые содержат word"""
+        return (self.postings[token] for token in self.tokens if word in token)
+
+    def _search_word(self, word: str) -> List[int]:
+        """
+        Поиск одного слова по словарю индекса вместо просмотра строк: подстрока внутри строки - это
+        подстрока одного из ее слов. Строки со словом целиком идут первыми, затем с префиксом, затем остальные.
+        """
+        groups: Tuple[List[List[int]], List[List[int]], List[List[int]]] = ([], [], [])
+        for token in self.tokens:
+            if word in token:
+                groups[2 if token == word else 1 if token.startswith(word) else 0].append(self.postings[token])
+
+        found: List[int] = []
+        seen: Set[int] = set()
+        for postings in reversed(groups):
+            rows = set(itertools.chain.from_iterable(postings)) - seen
+            found.extend(sorted(rows))
+            seen |= rows
+        return found
+
+    def _search_substring(self, query: str, rows: Optional[Set[int]] = None) -> List[int]:
+        """Поиск запроса как подстроки без учета регистра (среди строк rows, если они заданы)"""
+        needle = query.casefold()
+        positions = range(len(self.texts)) if rows is None else sorted(rows)
+        return [position for position in positions if any(needle in text for text in self.texts[position])]
+
+
+def get_search_index(file_path: Optional[str] = None) -> Tuple[pd.DataFrame, SearchIndex]:
+    """
+    Возвращает операции и поисковый индекс для актуальной версии файла.
+    Индекс строится один раз на версию файла и сохраняется рядом с колоночным кэшем.
+    """
+    path, content_hash, df = operations.load_snapshot(file_path)
+    return df, _snapshot_index(path, content_hash, df)
+
+
+def snapshot_search_index(df: pd.DataFrame) -> 'SearchIndex':
+    """
+    Индекс для операций: общий индекс версии файла, если df - загруженный снимок файла операций.
+    Для других DataFrame индекс строится один раз на DataFrame (хранятся последние FRAME_INDEX_LIMIT),
+    поэтому переданный DataFrame не должен изменяться между поисками
+    """
+    found = operations.find_snapshot(df)
+    if found is not None:
+        return _snapshot_index(found[0], found[1], df)
+
+    with _frame_index_lock:
+        cached = _frame_index_cache.get(id(df))
+        if cached is not None and cached[0] is df:
+            _frame_index_cache.move_to_end(id(df))
+            record_cache('search_index', True)
+            return cached[1]
+
+    record_cache('search_index', False)
+    with stage('build_search_index') as measured:
+        index = SearchIndex(df)
+        measured.add_rows(len(df))
+    with _frame_index_lock:
+        _frame_index_cache[id(df)] = (df, index)
+        while len(_frame_index_cache) > FRAME_INDEX_LIMIT:
+            _frame_index_cache.popitem(last=False)
+    return index
+
+
+def _snapshot_index(path: str, content_hash: str, df: pd.DataFrame) -> 'SearchIndex':
+    """Индекс, построенный по снимку df файла path (строится один раз на снимок)"""
+    cached = _index_cache.get(path)
+    record_cache('search_index', cached is not None and cached[0] is df)
+    if cached is not None and cached[0] is df:
+        return cached[1]
+
+    # Для снимка с добавленными операциями (src.ingest) кэша на диске нет: его версия - не хэш файла
+    on_disk = operations.DISK_CACHE_ENABLED and operations.is_file_version(path, content_hash)
+    index = load_cached_object(path, content_hash, INDEX_CACHE_NAME) if on_disk else None
+    if not isinstance(index, SearchIndex) or len(index.texts) != len(df):
+        with stage('build_search_index') as measured:
+            index = SearchIndex(df)
+            measured.add_rows(len(df))
+        logging.info(f"Построен поисковый индекс: {len(index.tokens)} слов")
+        if on_disk:
+            save_cached_object(path, content_hash, INDEX_CACHE_NAME, index)
+
+    _index_cache[path] = (df, index)
+    return index
+
+
+def extend_search_index(file_path: Optional[str], df: pd.DataFrame, new_df: pd.DataFrame) -> None:
+    """
+    Дополняет индекс, построенный для df, строками new_df после len(df) и запоминает его для new_df.
+    Если для df индекс еще не строился, он будет построен для new_df при первом поиске.
+    """
+    path = os.path.abspath(file_path or operations.OPERATIONS_FILE_PATH)
+    cached = _index_cache.get(path)
+    if cached is not None and cached[0] is df:
+        _index_cache[path] = (new_df, cached[1].extended(new_df.iloc[len(df):]))
+
+
+def clear_search_index_cache() -> None:
+    """Очищает кэш поисковых индексов в памяти"""
+    _index_cache.clear()
+    with _frame_index_lock:
+        _frame_index_cache.clear()
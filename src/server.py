@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from src import operations
+from src.config import setup_logging
+from src.cube import get_operations_cube
+from src.market_cache import market_cache
+from src.metrics import Labels, registry
+from src.report_sinks import flush_reports
+from src.reports import spending_by_category
+from src.response_cache import response_cache
+from src.search_index import get_search_index
+from src.services import analyze_cashback_categories, iter_search_transactions, search_transactions
+from src.time_index import get_time_index
+from src.timeseries import FREQUENCIES, ROLLING_WINDOWS, SERIES_DIMENSIONS, series_records, spending_series
+from src.views import base_func_module_one
+
+SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(os.getenv('SERVER_PORT', '8000'))
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', '8'))
+# Как часто (секунды) проверять, не изменился ли файл операций
+RELOAD_INTERVAL = float(os.getenv('SERVER_RELOAD_INTERVAL', '1'))
+
+Params = Dict[str, str]
+# Ответ обработчика: JSON строка или части JSON документа для потоковой отдачи
+Response = Union[str, Iterator[str]]
+
+
+class BadRequest(ValueError):
+    """Ошибка в параметрах запроса"""
+
+
+def _param(params: Params, name: str) -> str:
+    value = params.get(name)
+    if value is None or value == '':
+        raise BadRequest(f"Не указан параметр '{name}'")
+    return value
+
+
+def _int_param(params: Params, name: str) -> Optional[int]:
+    if name not in params:
+        return None
+    try:
+        return int(params[name])
+    except ValueError:
+        raise BadRequest(f"Параметр '{name}' должен быть целым числом")
+
+
+def handle_home(params: Params) -> str:
+    """Страница «Главная»: /home?date=2021-12-31 16:44:00"""
+    date_str = params.get('date') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise BadRequest("Параметр 'date' должен быть в формате 'YYYY-MM-DD HH:MM:SS'")
+    return base_func_module_one(date_str)
+
+
+def handle_search(params: Params) -> Response:
+    """
+    Поиск транзакций: /search?q=Колхоз. Страница результатов - &offset=0&limit=100,
+    потоковый ответ частями без сборки всего JSON в памяти - &stream=1
+    """
+    query = _param(params, 'q')
+    if params.get('stream') == '1':
+        return iter_search_transactions(query)
+    limit = _int_param(params, 'limit')
+    offset = _int_param(params, 'offset') or 0
+    if offset < 0 or (limit is not None and limit < 0):
+        raise BadRequest("Параметры 'offset' и 'limit' не могут быть отрицательными")
+    return search_transactions(query, offset=offset, limit=limit)
+
+
+def handle_cashback(params: Params) -> str:
+    """Топ категорий по кешбэку: /cashback?year=2021&month=12"""
+    year = _int_param(params, 'year')
+    month = _int_param(params, 'month')
+    if year is None or month is None or not 1 <= month <= 12:
+        raise BadRequest("Нужны параметры 'year' и 'month' (1-12)")
+    return analyze_cashback_categories(year, month)
+
+
+def handle_spending(params: Params) -> str:
+    """Траты по категории за 90 дней: /spending?category=Супермаркеты&year=2021&month=12&day=31"""
+    category = _param(params, 'category')
+    year, month, day = _int_param(params, 'year'), _int_param(params, 'month'), _int_param(params, 'day')
+    # Недостающие части даты берутся из текущей даты, как в отчете
+    today = datetime.now()
+    try:
+        datetime(year if year is not None else today.year, month if month is not None else today.month,
+                 day if day is not None else today.day)
+    except ValueError:
+        raise BadRequest("Параметры 'year', 'month' и 'day' должны задавать существующую дату")
+    df = operations.load_operations()
+    # Отчет вызывается без декоратора: запросы сервера не должны перезаписывать файл отчета
+    spending = getattr(spending_by_category, '__wrapped__', spending_by_category)
+    return json.dumps(spending(df, category, year, month, day), ensure_ascii=False)
+
+
+def _date_param(params: Params, name: str) -> Optional[datetime]:
+    if not params.get(name):
+        return None
+    try:
+        return datetime.strptime(params[name], '%Y-%m-%d')
+    except ValueError:
+        raise BadRequest(f"Параметр '{name}' должен быть в формате 'YYYY-MM-DD'")
+
+
+def handle_series(params: Params) -> str:
+    """Ряды трат и кешбэка: /series?freq=month&by=category&start=2021-01-01&end=2021-12-31"""
+    freq = params.get('freq') or 'month'
+    by = params.get('by') or 'category'
+    if freq not in FREQUENCIES or by not in SERIES_DIMENSIONS:
+        raise BadRequest(f"Параметр 'freq' - одно из {', '.join(FREQUENCIES)}, "
+                         f"'by' - одно из {', '.join(SERIES_DIMENSIONS)}")
+    series = spending_series(None, freq, by, ROLLING_WINDOWS, _date_param(params, 'start'), _date_param(params, 'end'))
+    return json.dumps({"series": series_records(series)}, ensure_ascii=False)
+
+
+def handle_stats(params: Params) -> str:
+    """Состояние сервиса: версия данных и счетчики кэшей рыночных данных и ответов"""
+    return json.dumps({"operations_version": operations.get_operations_version(),
+                       "market_cache": market_cache.stats(),
+                       "response_cache": response_cache.stats()}, ensure_ascii=False)
+
+
+def handle_metrics(params: Params) -> str:
+    """Показатели замеров в текстовом формате Prometheus (заполняются при METRICS_ENABLED=1)"""
+    return registry.render_prometheus()
+
+
+def _market_cache_metrics() -> Dict[str, Dict[Labels, float]]:
+    """Счетчики кэшей рыночных данных и ответов для вывода вместе с остальными показателями"""
+    return {cache_name: {(("counter", name),): float(value) for name, value in cache.stats().items()}
+            for cache_name, cache in (("market_cache", market_cache), ("response_cache", response_cache))}
+
+
+registry.add_collector(_market_cache_metrics)
+
+ROUTES: Dict[str, Callable[[Params], Response]] = {
+    '/home': handle_home,
+    '/search': handle_search,
+    '/cashback': handle_cashback,
+    '/spending': handle_spending,
+    '/series': handle_series,
+    '/stats': handle_stats,
+    '/metrics': handle_metrics,
+}
+# Тип содержимого ответов, которые не являются JSON
+CONTENT_TYPES = {'/metrics': 'text/plain; version=0.0.4; charset=utf-8'}
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+
+def warm_up(file_path: Optional[str] = None) -> str:
+    """
+    Загружает актуальную версию операций и строит по ней индексы и куб.
+    Если файл не изменился, все берется из кэшей и вызов почти ничего не стоит.
+    """
+    _, content_hash, df = operations.load_snapshot(file_path)
+    get_search_index(file_path)
+    get_operations_cube(file_path)
+    get_time_index(df)
+    return content_hash
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Обработчик HTTP запросов: GET /home, /search, /cashback, /spending, /series, /stats, /metrics"""
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        route = url.path.rstrip('/') or '/'
+        handler = ROUTES.get(route)
+        if handler is None:
+            self._reply(404, json.dumps({"error": f"Неизвестный адрес {url.path}"}, ensure_ascii=False))
+            return
+
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            body = handler(params)
+        except BadRequest as e:
+            self._reply(400, json.dumps({"error": str(e)}, ensure_ascii=False))
+            return
+        except Exception as e:
+            logging.error(f"Ошибка при обработке {self.path}: {str(e)}")
+            self._reply(500, json.dumps({"error": str(e)}, ensure_ascii=False))
+            return
+        if isinstance(body, str):
+            self._reply(200, body, CONTENT_TYPES.get(route, JSON_CONTENT_TYPE))
+        else:
+            self._stream(body)
+
+    def _reply(self, status: int, body: str, content_type: str = JSON_CONTENT_TYPE) -> None:
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, parts: Iterator[str]) -> None:
+        """Отдает ответ по частям по мере кодирования; конец ответа - закрытие соединения (HTTP/1.0)"""
+        self.send_response(200)
+        self.send_header('Content-Type', JSON_CONTENT_TYPE)
+        self.end_headers()
+        try:
+            for part in parts:
+                self.wfile.write(part.encode('utf-8'))
+        except Exception as e:
+            # Заголовки уже отправлены, поэтому ошибка только записывается в лог, а ответ обрывается
+            logging.error(f"Ошибка при потоковой отдаче {self.path}: {str(e)}")
+        self.close_connection = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.info(f"{self.address_string()} {format % args}")
+
+
+class PooledHTTPServer(ThreadingHTTPServer):
+    """HTTP сервер, который обрабатывает запросы в пуле потоков фиксированного размера"""
+
+    def __init__(self, address: Tuple[str, int], workers: int = SERVER_WORKERS) -> None:
+        super().__init__(address, RequestHandler)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='request')
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+class SnapshotWatcher(threading.Thread):
+    """Фоновый поток, который при изменении файла операций заранее загружает новую версию"""
+
+    def __init__(self, file_path: Optional[str] = None, interval: float = RELOAD_INTERVAL) -> None:
+        super().__init__(daemon=True)
+        self.file_path = file_path
+        self.interval = interval
+        self.version: Optional[str] = None
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def check(self) -> None:
+        """Обновляет данные, если файл изменился (при ошибке чтения остается прежняя версия)"""
+        try:
+            version = warm_up(self.file_path)
+        except Exception as e:
+            logging.error(f"Не удалось перечитать операции: {str(e)}")
+            return
+        if version != self.version:
+            if self.version is not None:
+                logging.info(f"Операции перечитаны, новая версия {version[:16]}")
+            self.version = version
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, workers: int = SERVER_WORKERS) -> None:
+    """Запускает сервер: данные загружаются один раз и остаются в памяти между запросами"""
+    setup_logging()
+    watcher = SnapshotWatcher()
+    watcher.check()
+    watcher.start()
+
+    server = PooledHTTPServer((host, port), workers)
+    logging.info(f"Сервер запущен на http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        server.server_close()
+        flush_reports()
+
+
+if __name__ == "__main__":
+    serve()
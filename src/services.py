@@ -1,11 +1,18 @@
 import json
 import logging
 import os
-from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from src.cube import get_operations_cube, month_bounds, rank_cashback, snapshot_cube
+from src.currency import BASE_AMOUNT_COLUMN
+from src.encoding import STREAM_CHUNK_SIZE, dumps, encode_records, iter_json_document
+from src.metrics import stage, timed
+from src.repository import OperationsRepository
+from src.response_cache import memoize_response
+from src.schema import DATE_COLUMNS
+from src.search_index import SearchIndex, get_search_index, snapshot_search_index
 
 FILE_PATH = os.path.join(os.path.dirname(__file__), '../data/operations.xlsx')
 
@@ -13,44 +20,42 @@ FILE_PATH = os.path.join(os.path.dirname(__file__), '../data/operations.xlsx')
 EXCLUDED_CATEGORIES = ['Зарплата', 'Переводы', 'Пополнения']
 
 
-def analyze_cashback_categories() -> str:
+@memoize_response('cashback_categories', FILE_PATH)
+def top_cashback_categories(data: Optional[pd.DataFrame], year: int, month: int) -> Dict[str, float]:
     """
-    Запрашивает год и месяц для анализа, анализирует суммы кешбэка по категориям на основе данных из Excel,
-    исключая заранее определенные категории.
+    Топ-3 категорий по кешбэку за месяц по кубу дневных агрегатов. Для операций из Excel файла
+    (data=None или загруженный снимок файла) куб строится один раз на версию данных,
+    а результат запоминается (см. src.response_cache).
     """
+    cube = get_operations_cube(FILE_PATH) if data is None else snapshot_cube(data)
+    return cube.top_cashback_categories(year, month, n=3, excluded=EXCLUDED_CATEGORIES)
 
-    year = int(input("Введите год для анализа CashBack (например, 2021): "))
-    month = int(input("Введите месяц для анализа CashBack (например, 12): "))
 
-    logging.info(f"Начинаем анализ кешбэка за {month}/{year}")
-
-    try:
-        data = pd.read_excel(FILE_PATH)
-        logging.info("Данные успешно загружены из Excel.")
-    except Exception as e:
-        logging.error(f"Ошибка при чтении файла Excel: {str(e)}")
-        return json.dumps({"error": str(e)}, ensure_ascii=False)  # Убедитесь, что здесь установлен ensure_ascii=False
-
-    data['Дата операции'] = pd.to_datetime(data['Дата операции'], format='%d.%m.%Y %H:%M:%S')
+@timed('analyze_cashback_categories')
+def analyze_cashback_categories(year: int, month: int,
+                                data: pd.DataFrame | OperationsRepository | None = None) -> str:
+    """
+    Анализирует суммы кешбэка по категориям за указанные год и месяц, исключая заранее определенные категории.
+    Если операции не переданы, они берутся из Excel файла. Расчет идет по кубу дневных агрегатов
+    (см. top_cashback_categories). Для репозитория суммы по категориям считаются запросом к нему.
+    """
 
-    start_date = datetime(year, month, 1)
+    logging.info(f"Начинаем анализ кешбэка за {month}/{year}")
 
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1)
+    if isinstance(data, OperationsRepository):
+        start, next_month = month_bounds(year, month)
+        totals = data.category_totals(start, next_month - pd.Timedelta(1, 'ns'))
+        top_categories = rank_cashback(totals, n=3, excluded=EXCLUDED_CATEGORIES)
+    elif data is None:
+        try:
+            top_categories = top_cashback_categories(None, year, month)
+            logging.info("Данные успешно загружены из Excel.")
+        except Exception as e:
+            logging.error(f"Ошибка при чтении файла Excel: {str(e)}")
+            # Убедитесь, что здесь установлен ensure_ascii=False
+            return json.dumps({"error": str(e)}, ensure_ascii=False)
     else:
-        end_date = datetime(year, month + 1, 1)
-
-    filtered_data = data[(data['Дата операции'] >= start_date) & (data['Дата операции'] < end_date)]
-
-    logging.info(f"Количество транзакций за указанный период: {len(filtered_data)}")
-
-    filtered_data = filtered_data[~filtered_data['Категория'].isin(EXCLUDED_CATEGORIES)]
-
-    logging.info(f"Исключены категории: {EXCLUDED_CATEGORIES}. Осталось транзакций: {len(filtered_data)}")
-
-    cashback_summary = filtered_data.groupby('Категория')['Сумма операции'].sum().abs() / 100
-
-    top_categories = cashback_summary.nlargest(3).to_dict()
+        top_categories = top_cashback_categories(data, year, month)
 
     logging.info(f"Топ-3 категорий по кешбеку: {top_categories}")
 
@@ -59,53 +64,90 @@ def analyze_cashback_categories() -> str:
     return result_json
 
 
-# if __name__ == "__main__":
-#     result = analyze_cashback_categories()
-#     print(result)
+def _find_transactions(query: str, transactions: list[dict] | pd.DataFrame | OperationsRepository | None
+                       ) -> Tuple[pd.DataFrame, List[int]]:
+    """Операции и позиции строк, найденных по запросу (через поисковый индекс)"""
+    if isinstance(transactions, OperationsRepository):
+        with stage('search') as measured:
+            data, positions = transactions.search(query)
+            measured.add_rows(len(positions))
+        return data, positions
+    if transactions is None:
+        data, index = get_search_index(FILE_PATH)
+        logging.info("Данные успешно загружены из Excel.")
+    else:
+        if isinstance(transactions, pd.DataFrame):
+            # Для снимка файла операций индекс общий, для другого DataFrame строится один раз и запоминается
+            data, index = transactions, snapshot_search_index(transactions)
+        else:
+            # Список словарей преобразуется в новый DataFrame при каждом вызове, запоминать его индекс незачем
+            data = pd.DataFrame(transactions)
+            index = SearchIndex(data)
+
+    # Поиск по индексу вместо полного просмотра столбцов
+    with stage('search') as measured:
+        positions = index.search(query)
+        measured.add_rows(len(positions))
+    return data, positions
 
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+def _export_columns(data: pd.DataFrame) -> List[str]:
+    """Столбцы выгрузки: сумма в базовой валюте (см. src.currency) в ответ поиска не попадает"""
+    return [column for column in data.columns if column != BASE_AMOUNT_COLUMN]
 
 
-def search_transactions(query: str, transactions: list[dict] | None = None) -> str:
+@timed('search_transactions')
+def search_transactions(query: str, transactions: list[dict] | pd.DataFrame | OperationsRepository | None = None,
+                        offset: int = 0, limit: Optional[int] = None) -> str:
     """
     Ищет транзакции по запросу в описании или категории.
+    Запрос ищется по словам (по префиксу) через поисковый индекс, а если слова не найдены -
+    как обычная подстрока. Более точные совпадения возвращаются первыми.
+    Транзакции можно передать списком словарей, DataFrame или репозиторием (src.repository),
+    иначе они берутся из Excel файла.
+    Если задан limit, возвращается страница из limit транзакций начиная с offset
+    и общее число найденных (total).
     """
 
-    if transactions is None:
-        try:
-            data = pd.read_excel(FILE_PATH)
-            logging.info("Данные успешно загружены из Excel.")
-        except Exception as e:
-            logging.error(f"Ошибка при чтении файла Excel: {str(e)}")
-            return json.dumps({"error": str(e)}, ensure_ascii=False)
-    else:
-        # Преобразуем список словарей в DataFrame
-        data = pd.DataFrame(transactions)
-
-    # Фильтрация данных по запросу
-    filtered_data = data[data['Описание'].str.contains(query, case=False, na=False) |
-                         data['Категория'].str.contains(query, case=False, na=False)]
-
-    if not filtered_data.empty:
-        logging.info(f"Найдено {len(filtered_data)} транзакций по запросу '{query}'.")
-        result_json = {
-            "transactions": json.loads(filtered_data.to_json(orient='records', force_ascii=False))
-        }
-        return json.dumps(result_json, ensure_ascii=False)
-    else:
+    try:
+        data, positions = _find_transactions(query, transactions)
+    except Exception as e:
+        logging.error(f"Ошибка при чтении файла Excel: {str(e)}")
+        return dumps({"error": str(e)})
+
+    if not positions:
         logging.info(f"По запросу '{query}' ничего не найдено.")
-        return json.dumps({"message": "Такого слова не было обнаружено."}, ensure_ascii=False)
-
-
-# if __name__ == "__main__":
-#     sample_transactions = [
-#         {"Описание": "Покупка в магазине", "Категория": "Еда", "Сумма операции": -1000},
-#         {"Описание": "Оплата за услуги", "Категория": "Коммунальные услуги", "Сумма операции": -500},
-#     ]
-#
-#     result_from_list = search_transactions("Коммунальные услуги", sample_transactions)
-#     print(result_from_list)
-#     user_query = input("Введите слово для поиска: ")
-#     result = search_transactions(user_query)
-#     print(result)
+        return dumps({"message": "Такого слова не было обнаружено."})
+
+    logging.info(f"Найдено {len(positions)} транзакций по запросу '{query}'.")
+    page = positions[offset:] if limit is None else positions[offset:offset + limit]
+    # Даты возвращаем в том же формате, в котором они хранятся в Excel; кодируются только строки страницы
+    with stage('encode_transactions') as measured:
+        rows = data.iloc[page][_export_columns(data)]
+        result: Dict[str, Any] = {"transactions": encode_records(rows, DATE_COLUMNS)}
+        measured.add_rows(len(page))
+    if limit is not None:
+        result.update({"total": len(positions), "offset": offset, "limit": limit})
+    return dumps(result)
+
+
+def iter_search_transactions(query: str,
+                             transactions: list[dict] | pd.DataFrame | OperationsRepository | None = None,
+                             chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Результат search_transactions частями: строки кодируются пачками по chunk_size,
+    поэтому широкий запрос не собирает весь ответ в памяти. Склеенные части равны search_transactions.
+    """
+    try:
+        data, positions = _find_transactions(query, transactions)
+    except Exception as e:
+        logging.error(f"Ошибка при чтении файла Excel: {str(e)}")
+        yield dumps({"error": str(e)})
+        return
+
+    if not positions:
+        yield dumps({"message": "Такого слова не было обнаружено."})
+        return
+
+    yield from iter_json_document("transactions", data, DATE_COLUMNS, chunk_size, rows=positions,
+                                  columns=_export_columns(data))
@@ -0,0 +1,188 @@
+import abc
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+from openpyxl import load_workbook  # type: ignore[import-untyped, unused-ignore]
+
+from src.cube import month_bounds, rank_cashback
+from src.currency import BASE_AMOUNT_COLUMN, base_amounts
+from src.operations import normalize_operations
+from src.search_index import SearchIndex
+
+CHUNK_SIZE = 10000
+
+
+def _iter_excel_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Читает лист Excel построчно (openpyxl в режиме только для чтения) и отдает пачки строк"""
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(name) for name in next(rows, ())]
+        chunk: List[Sequence[Any]] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_operation_chunks(file_path: str,
+                          chunk_size: int = CHUNK_SIZE,
+                          start: Optional[datetime] = None,
+                          end: Optional[datetime] = None,
+                          categories: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Читает операции из xlsx или csv пачками по chunk_size строк, не загружая файл целиком.
+    Каждая пачка приводится к общим типам и фильтруется по 'Дата операции' (start и end включительно)
+    и по списку категорий.
+    """
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        chunks: Iterable[pd.DataFrame] = pd.read_csv(file_path, chunksize=chunk_size)
+    else:
+        chunks = _iter_excel_chunks(file_path, chunk_size)
+
+    for chunk in chunks:
+        chunk = normalize_operations(chunk)
+        mask = pd.Series(True, index=chunk.index)
+        if start is not None:
+            mask &= chunk['Дата операции'] >= start
+        if end is not None:
+            mask &= chunk['Дата операции'] <= end
+        if categories is not None:
+            mask &= chunk['Категория'].isin(categories)
+        if mask.any():
+            yield chunk[mask]
+
+
+class ChunkAggregator(abc.ABC):
+    """Агрегат, который накапливает результат по пачкам операций"""
+
+    @abc.abstractmethod
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Учитывает очередную пачку операций"""
+
+    @abc.abstractmethod
+    def result(self) -> Any:
+        """Результат по всем учтенным пачкам"""
+
+
+class CardTotals(ChunkAggregator):
+    """Траты и кешбэк по картам (в формате process_card_data)"""
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        sums = base_amounts(chunk).groupby(chunk['Номер карты'], sort=False, observed=True).sum()
+        for card, amount in sums.items():
+            self.totals[str(card)] = self.totals.get(str(card), 0.0) + float(amount)
+
+    def result(self) -> List[Dict[str, Any]]:
+        return [{"last_digits": card[-4:], "total_spent": round(total, 2), "cashback": round(total / -100, 2)}
+                for card, total in self.totals.items()]
+
+
+class TopTransactions(ChunkAggregator):
+    """Топ-N транзакций по сумме платежа в базовой валюте (в формате get_top_transactions)"""
+
+    def __init__(self, n: int = 5, column: str = BASE_AMOUNT_COLUMN) -> None:
+        self.n = n
+        self.column = column
+        self.top: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self.column == BASE_AMOUNT_COLUMN and BASE_AMOUNT_COLUMN not in chunk.columns:
+            chunk = chunk.assign(**{BASE_AMOUNT_COLUMN: base_amounts(chunk)})
+        candidates = chunk.nlargest(self.n, self.column)
+        merged = candidates if self.top is None else pd.concat([self.top, candidates])
+        self.top = merged.nlargest(self.n, self.column)
+
+    def result(self) -> List[Dict[Hashable, Any]]:
+        if self.top is None:
+            return []
+        top = self.top.assign(**{'Сумма платежа': base_amounts(self.top)})
+        top = top[['Дата операции', 'Сумма платежа', 'Категория', 'Описание']].copy()
+        top['Дата операции'] = top['Дата операции'].dt.strftime('%d.%m.%Y')
+        return top.to_dict(orient='records')
+
+
+class CategorySums(ChunkAggregator):
+    """Суммы операций по категориям с исключением заданных категорий"""
+
+    def __init__(self, excluded: Sequence[str] = ()) -> None:
+        self.excluded = excluded
+        self.sums: Dict[str, float] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        chunk = chunk[~chunk['Категория'].isin(self.excluded)]
+        for category, amount in base_amounts(chunk).groupby(chunk['Категория'], observed=True).sum().items():
+            self.sums[str(category)] = self.sums.get(str(category), 0.0) + float(amount)
+
+    def result(self) -> Dict[str, float]:
+        return dict(self.sums)
+
+
+class SearchHits(ChunkAggregator):
+    """Транзакции, найденные по запросу (как в search_transactions), не больше limit"""
+
+    def __init__(self, query: str, limit: Optional[int] = None) -> None:
+        self.query = query
+        self.limit = limit
+        self.hits: List[pd.DataFrame] = []
+        self.count = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self.limit is not None and self.count >= self.limit:
+            return
+        found = chunk.iloc[SearchIndex(chunk).search(self.query)]
+        if self.limit is not None:
+            found = found.iloc[:self.limit - self.count]
+        if not found.empty:
+            self.hits.append(found)
+            self.count += len(found)
+
+    def result(self) -> pd.DataFrame:
+        return pd.concat(self.hits) if self.hits else pd.DataFrame()
+
+
+def fold_chunks(chunks: Iterable[pd.DataFrame], aggregators: Sequence[ChunkAggregator]) -> List[Any]:
+    """Передает каждую пачку всем агрегатам и возвращает их результаты"""
+    for chunk in chunks:
+        for aggregator in aggregators:
+            aggregator.update(chunk)
+    return [aggregator.result() for aggregator in aggregators]
+
+
+def stream_home_page(file_path: str, input_date: datetime, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Карты и топ транзакций страницы «Главная» (с начала месяца до даты) с ограниченной памятью"""
+    start = month_bounds(input_date.year, input_date.month)[0]
+    chunks = iter_operation_chunks(file_path, chunk_size, start=start, end=input_date)
+    cards, top_transactions = fold_chunks(chunks, [CardTotals(), TopTransactions()])
+    return {"cards": cards, "top_transactions": top_transactions}
+
+
+def stream_cashback(file_path: str, year: int, month: int, excluded: Sequence[str] = (),
+                    chunk_size: int = CHUNK_SIZE) -> Dict[str, float]:
+    """Топ-3 категорий по кешбэку за месяц (как analyze_cashback_categories) с ограниченной памятью"""
+    start, next_month = month_bounds(year, month)
+    end = next_month - timedelta(microseconds=1)
+    (sums,) = fold_chunks(iter_operation_chunks(file_path, chunk_size, start=start, end=end),
+                          [CategorySums(excluded)])
+    return rank_cashback(sums, n=3)
+
+
+def stream_spending(file_path: str, category: str, year: int, month: int, day: int,
+                    chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Траты по категории за 90 дней до даты (как spending_by_category) с ограниченной памятью"""
+    date = datetime(year, month, day)
+    chunks = iter_operation_chunks(file_path, chunk_size, start=date - timedelta(days=90),
+                                   end=date + timedelta(days=1), categories=[category])
+    (sums,) = fold_chunks(chunks, [CategorySums()])
+    return {'category': category, 'total_spending': round(float(sums.get(category, 0.0)), 2),
+            'date': date.strftime('%Y-%m-%d')}
@@ -0,0 +1,163 @@
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Literal, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src import operations
+from src.metrics import record_cache, stage
+
+DATE_COLUMN = 'Дата операции'
+TOP_COLUMN = 'Сумма платежа'
+# Сколько срезов по месяцам хранит один индекс
+MONTH_SLICES_LIMIT = 12
+# Сколько индексов по датам хранится для разных DataFrame
+TIME_INDEX_LIMIT = 4
+
+# Индексы по датам: id DataFrame -> (DataFrame, индекс)
+_time_index_cache: 'OrderedDict[int, Tuple[pd.DataFrame, TimeIndex]]' = OrderedDict()
+_time_index_lock = threading.Lock()
+
+DateLike = Union[str, datetime, pd.Timestamp]
+TopKeep = Literal['first', 'last', 'all']
+
+
+class TimeIndex:
+    """
+    Индекс операций по дате: позиции строк, отсортированные по 'Дата операции'.
+    Выборка за период - два бинарных поиска вместо полного просмотра столбца,
+    срезы по месяцам запоминаются и переиспользуются.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = operations.ensure_normalized(df)
+        dates = self.df[DATE_COLUMN].to_numpy(dtype='datetime64[ns]')
+        valid = np.flatnonzero(~np.isnat(dates))
+        # Сортировка устойчивая: при равных датах сохраняется порядок строк
+        self.positions = valid[np.argsort(dates[valid], kind='stable')]
+        self.dates = dates[self.positions]
+        self._months: 'OrderedDict[Tuple[int, int], pd.DataFrame]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def extended(self, new_df: pd.DataFrame) -> 'TimeIndex':
+        """
+        Индекс для new_df - операций индекса, к которым в конец добавлены новые строки.
+        Новые даты вставляются в отсортированный массив без повторной сортировки всех строк.
+        """
+        offset = len(self.df)
+        dates = new_df[DATE_COLUMN].iloc[offset:].to_numpy(dtype='datetime64[ns]')
+        valid = np.flatnonzero(~np.isnat(dates))
+        order = valid[np.argsort(dates[valid], kind='stable')]
+        # side='right': при равных датах новые строки идут после прежних, как при устойчивой сортировке
+        insert_at = np.searchsorted(self.dates, dates[order], side='right')
+
+        index = copy.copy(self)
+        index.df = new_df
+        index.positions = np.insert(self.positions, insert_at, order + offset)
+        index.dates = np.insert(self.dates, insert_at, dates[order])
+        index._months = OrderedDict()
+        index._lock = threading.Lock()
+        return index
+
+    def window_positions(self, start: DateLike, end: DateLike) -> np.ndarray:
+        """Позиции строк с датой операции в отрезке [start, end] в исходном порядке строк"""
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        return np.sort(self.positions[lo:hi])
+
+    def window(self, start: DateLike, end: DateLike) -> pd.DataFrame:
+        """Операции с датой в отрезке [start, end] (как фильтр по двум маскам, но без просмотра всех строк)"""
+        return self.df.iloc[self.window_positions(start, end)]
+
+    def month(self, year: int, month: int) -> pd.DataFrame:
+        """Операции за месяц; срез строится один раз и запоминается"""
+        key = (year, month)
+        with self._lock:
+            cached = self._months.get(key)
+            if cached is not None:
+                self._months.move_to_end(key)
+                return cached
+
+        start = pd.Timestamp(year, month, 1)
+        end = start + pd.offsets.MonthBegin(1) - pd.Timedelta(1, 'ns')
+        month_df = self.window(start, end)
+        with self._lock:
+            self._months[key] = month_df
+            while len(self._months) > MONTH_SLICES_LIMIT:
+                self._months.popitem(last=False)
+        return month_df
+
+    def month_to_date(self, date: DateLike) -> pd.DataFrame:
+        """Операции с начала месяца до даты включительно (по запомненному срезу месяца)"""
+        date = pd.Timestamp(date)
+        month_df = self.month(date.year, date.month)
+        if month_df.empty or month_df[DATE_COLUMN].max() <= date:
+            return month_df
+        return month_df[month_df[DATE_COLUMN] <= date]
+
+
+def get_time_index(df: pd.DataFrame) -> TimeIndex:
+    """
+    Индекс по датам для DataFrame операций. Строится один раз для каждого DataFrame,
+    поэтому общий снимок операций индексируется один раз на версию файла.
+    """
+    with _time_index_lock:
+        cached = _time_index_cache.get(id(df))
+        if cached is not None and cached[0] is df:
+            _time_index_cache.move_to_end(id(df))
+            record_cache('time_index', True)
+            return cached[1]
+
+    record_cache('time_index', False)
+    with stage('build_time_index') as measured:
+        index = TimeIndex(df)
+        measured.add_rows(len(df))
+    logging.info(f"Построен индекс по датам: {len(index.positions)} операций")
+    _remember(df, index)
+    return index
+
+
+def extend_time_index(df: pd.DataFrame, new_df: pd.DataFrame) -> TimeIndex:
+    """Индекс по датам для new_df (строки df и добавленные после них) на основе индекса df"""
+    index = get_time_index(df).extended(new_df)
+    _remember(new_df, index)
+    return index
+
+
+def _remember(df: pd.DataFrame, index: TimeIndex) -> None:
+    with _time_index_lock:
+        _time_index_cache[id(df)] = (df, index)
+        while len(_time_index_cache) > TIME_INDEX_LIMIT:
+            _time_index_cache.popitem(last=False)
+
+
+def clear_time_index_cache() -> None:
+    """Очищает кэш индексов по датам"""
+    with _time_index_lock:
+        _time_index_cache.clear()
+
+
+def top_n(df: pd.DataFrame, n: int = 5, column: Union[str, pd.Series] = TOP_COLUMN, by: Optional[str] = None,
+          keep: TopKeep = 'first') -> pd.DataFrame:
+    """
+    Топ-N строк по значению столбца (частичная сортировка nlargest, без сортировки всех строк).
+    column - имя столбца или значения, по порядку совпадающие со строками df.
+    by - столбец группировки (например, 'Номер карты' или 'Категория'): топ-N в каждой группе.
+    keep - как поступать с равными значениями на границе топа: 'first', 'last' или 'all'
+    (оставить все строки с равным значением, тогда строк может быть больше N).
+    """
+    if keep not in ('first', 'last', 'all'):
+        raise ValueError(f"Неизвестный способ обработки равных значений: {keep}")
+    # Работаем с позициями строк, чтобы повторяющиеся метки индекса не мешали выборке
+    values = pd.to_numeric(df[column] if isinstance(column, str) else column, errors='coerce').reset_index(drop=True)
+    if by is None:
+        return df.iloc[values.nlargest(n, keep=keep).index]
+
+    groups = df[by].reset_index(drop=True)
+    top = [group_values.nlargest(n, keep=keep).index.to_numpy()
+           for _, group_values in values.groupby(groups, sort=False, observed=True)]
+    return df.iloc[np.concatenate(top)] if top else df.iloc[:0]
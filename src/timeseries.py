@@ -0,0 +1,180 @@
+"""
+Временные ряды трат и кешбэка по дням, неделям и месяцам.
+
+Ряды строятся по ячейкам куба агрегатов (день x категория x карта, см. src.cube): дневные суммы
+раскладываются в плотную таблицу дни x категории (или карты), после чего ресемплинг, скользящие
+суммы за 7/30/90 дней и изменения к прошлому периоду считаются для всех рядов сразу.
+Дневные таблицы строятся один раз на снимок файла операций, готовые ряды запоминаются
+(см. src.response_cache), поэтому график за несколько лет - один вызов.
+"""
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src import operations
+from src.cube import build_cells, snapshot_cube
+from src.encoding import encode_records
+from src.metrics import record_cache, stage
+from src.response_cache import memoize_response
+
+# Период -> (правило ресемплинга, период pandas); периоды подписываются датой начала, неделя - с понедельника
+FREQUENCIES = {
+    'day': ('D', 'D'),
+    'week': ('W-MON', 'W-SUN'),
+    'month': ('MS', 'M'),
+}
+# Ряды по категориям, по картам или один ряд по всем операциям
+SERIES_DIMENSIONS = ('category', 'card', 'total')
+# Скользящие суммы за последние N дней на конец периода
+ROLLING_WINDOWS = (7, 30, 90)
+TOTAL = 'Итого'
+
+# Ряды загруженных операций: путь -> (DataFrame, по которому построены ряды, ряды)
+_series_cache: Dict[str, Tuple[pd.DataFrame, 'SpendingSeries']] = {}
+
+DateLike = Union[str, datetime, pd.Timestamp]
+
+
+class SpendingSeries:
+    """
+    Дневные суммы (в базовой валюте) и количество операций по категориям и картам в виде плотных
+    таблиц дни x значения измерения, из которых ресемплингом получаются ряды любого периода.
+    Кешбэк - 1 рубль на каждые 100 рублей трат (как для карт в src.cards).
+    """
+
+    def __init__(self, cells: pd.DataFrame) -> None:
+        self.cells = cells
+        self._daily: Dict[str, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_operations(cls, df: pd.DataFrame) -> 'SpendingSeries':
+        """Строит ряды по операциям"""
+        return cls(build_cells(df))
+
+    def daily(self, by: str = 'category') -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Суммы и количество операций по дням (строки - все дни от первой до последней операции)
+        и значениям измерения by (столбцы); by='total' - один столбец «Итого»
+        """
+        if by not in SERIES_DIMENSIONS:
+            raise ValueError(f"Неизвестное измерение: {by}, доступны: {', '.join(SERIES_DIMENSIONS)}")
+        with self._lock:
+            cached = self._daily.get(by)
+        if cached is not None:
+            return cached
+
+        cells = self.cells if by == 'total' else self.cells[self.cells[by].notna()]
+        if by == 'total':
+            grouped = cells.groupby('day')[['amount', 'count']].sum()
+            amount, count = grouped[['amount']], grouped[['count']]
+            amount.columns = count.columns = pd.Index([TOTAL])
+        else:
+            grouped = cells.groupby(['day', cells[by].astype(str)], observed=True)[['amount', 'count']].sum()
+            amount = grouped['amount'].unstack(fill_value=0)
+            count = grouped['count'].unstack(fill_value=0)
+
+        days = pd.DatetimeIndex([], name='day')
+        if len(amount):
+            days = pd.date_range(amount.index.min(), amount.index.max(), freq='D', name='day')
+        daily = (amount.reindex(days, fill_value=0.0).astype(float),
+                 count.reindex(days, fill_value=0).astype('int64'))
+        with self._lock:
+            self._daily[by] = daily
+        return daily
+
+    def resample(self, freq: str = 'month', by: str = 'category',
+                 windows: Sequence[int] = ROLLING_WINDOWS,
+                 start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> pd.DataFrame:
+        """
+        Ряды за периоды freq (day, week, month) для каждого значения измерения by: сумма, количество операций,
+        кешбэк, изменение суммы к прошлому периоду (change, change_pct) и скользящие суммы за windows дней
+        на последний день периода (rolling_7d, ...; для последнего периода - на день последней операции).
+        Периоды без операций входят в ряды с нулями.
+        start и end ограничивают выдачу периодами, пересекающими [start, end]; скользящие суммы
+        и изменения первого периода учитывают операции до start.
+        """
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Неизвестный период: {freq}, доступны: {', '.join(FREQUENCIES)}")
+        rule, period = FREQUENCIES[freq]
+        amount, count = self.daily(by)
+        columns = [by, 'period', 'amount', 'count', 'cashback', 'change', 'change_pct'] + \
+            [f'rolling_{window}d' for window in windows]
+        if amount.empty:
+            return pd.DataFrame(columns=columns)
+
+        with stage('resample_series') as measured:
+            options: Dict[str, Any] = {'label': 'left', 'closed': 'left'}
+            totals = amount.resample(rule, **options).sum()
+            previous = totals.shift()
+            frames = {
+                'amount': totals,
+                'count': count.resample(rule, **options).sum(),
+                'cashback': totals / -100,
+                'change': totals - previous,
+                'change_pct': (totals / previous - 1).replace([np.inf, -np.inf], np.nan),
+            }
+            for window in windows:
+                # Дни идут подряд, поэтому окно из window строк - это последние window дней
+                rolling = amount.rolling(window, min_periods=1).sum()
+                frames[f'rolling_{window}d'] = rolling.resample(rule, **options).last()
+
+            periods = totals.index
+            keep = np.ones(len(periods), dtype=bool)
+            if start is not None:
+                keep &= periods >= pd.Timestamp(start).to_period(period).start_time
+            if end is not None:
+                keep &= periods <= pd.Timestamp(end)
+
+            # Длинная таблица: ряд за рядом, внутри ряда - периоды по порядку
+            labels = totals.columns
+            selected = periods[keep]
+            result = pd.DataFrame({
+                by: np.repeat(labels.to_numpy(dtype=object), len(selected)),
+                'period': np.tile(selected.to_numpy(), len(labels)),
+                **{name: frame.to_numpy()[keep].T.ravel() for name, frame in frames.items()},
+            }, columns=columns)
+            measured.add_rows(len(result))
+        return result
+
+
+def snapshot_series(df: pd.DataFrame) -> SpendingSeries:
+    """Ряды для операций: общие для версии файла, если df - загруженный снимок файла операций, иначе новые"""
+    found = operations.find_snapshot(df)
+    cached = _series_cache.get(found[0]) if found is not None else None
+    record_cache('spending_series', cached is not None and cached[0] is df)
+    if cached is not None and cached[0] is df:
+        return cached[1]
+
+    # Ячейки берутся из куба снимка: операции группируются по дням один раз для куба и рядов
+    series = SpendingSeries(snapshot_cube(df).cells)
+    if found is not None:
+        _series_cache[found[0]] = (df, series)
+    return series
+
+
+@memoize_response('spending_series')
+def spending_series(data: Optional[pd.DataFrame], freq: str = 'month', by: str = 'category',
+                    windows: Sequence[int] = ROLLING_WINDOWS,
+                    start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> pd.DataFrame:
+    """
+    Ряды трат и кешбэка (см. SpendingSeries.resample) по операциям data или, если data=None,
+    по операциям из Excel файла. Для загруженной версии файла результат запоминается - изменять его нельзя.
+    """
+    df = operations.load_operations() if data is None else data
+    return snapshot_series(df).resample(freq, by, windows, start, end)
+
+
+def series_records(series: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Ряды в виде списка словарей для JSON: даты периодов - 'YYYY-MM-DD', суммы округлены до копеек"""
+    rounded = series.round({column: 4 if column == 'change_pct' else 2 for column in series.columns
+                            if column not in ('period', 'count') and pd.api.types.is_float_dtype(series[column])})
+    return encode_records(rounded, {'period': '%Y-%m-%d'})
+
+
+def clear_series_cache() -> None:
+    """Очищает кэш рядов в памяти"""
+    _series_cache.clear()
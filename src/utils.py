@@ -2,21 +2,23 @@ import json
 import logging
 import os
 from datetime import datetime
-from typing import Any, Dict, Hashable, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 import requests
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
+from src.cards import aggregate_cards
+from src.currency import base_amounts
+from src.encoding import encode_records
+from src.market_cache import cached_market_data
+from src.market_data import ALPHA_VANTAGE_URL, EXCHANGE_RATES_URL, fetch_all, http_get
+from src.operations import load_operations
+from src.time_index import TopKeep, top_n
 
 
 def read_operations_data(file_path: str) -> pd.DataFrame:
-    """Чтение данных из Excel файла"""
-    df = pd.read_excel(file_path)
-    # Преобразование столбца 'Дата операции' в формат datetime
-    df['Дата операции'] = pd.to_datetime(df['Дата операции'], errors='coerce', dayfirst=True)
-    return df
+    """Чтение данных из Excel файла (через общий кэш операций)"""
+    return load_operations(file_path)
 
 
 def get_greeting(current_time: datetime) -> str:
@@ -32,41 +34,37 @@ def get_greeting(current_time: datetime) -> str:
 
 
 def process_card_data(df: pd.DataFrame) -> List[Dict[str, Any]]:
-    """Обработка данных по картам."""
-    card_data = df['Номер карты'].dropna().unique()
-    result = []
-
-    for card in card_data:
-        card_transactions = df[df['Номер карты'] == card]
-        total_spent = card_transactions['Сумма операции'].sum()
-        cashback = total_spent / -100  # 1 рубль на каждые 100 рублей
-
-        result.append({
-            "last_digits": card[-4:],
-            "total_spent": round(total_spent, 2),
-            "cashback": round(cashback, 2)
-        })
-
-    return result
-
-
-def get_top_transactions(df: pd.DataFrame) -> list[dict[Hashable, Any]]:
-    """Получение топ-5 транзакций по сумме платежа."""
-    top_transactions = df.nlargest(5, 'Сумма платежа')[['Дата операции', 'Сумма платежа', 'Категория', 'Описание']]
-    top_transactions['Дата операции'] = top_transactions['Дата операции'].dt.strftime('%d.%m.%Y')
-
-    # Убедимся, что все ключи являются строками
-    return top_transactions.to_dict(orient='records')
-
-
-def get_currency_rates(api_key: str) -> List[Dict[str, float]]:
-    """Получение курсов валют"""
-    url = "https://api.apilayer.com/exchangerates_data/latest"
+    """Обработка данных по картам: траты и кешбэк за один проход groupby."""
+    return aggregate_cards(df)
+
+
+def get_top_transactions(df: pd.DataFrame, n: int = 5, by: Optional[str] = None,
+                         keep: TopKeep = 'first') -> List[Dict[str, Any]]:
+    """
+    Получение топ-N транзакций по сумме платежа в базовой валюте (по умолчанию топ-5),
+    'Сумма платежа' в ответе - тоже в базовой валюте.
+    by - топ в каждой группе (например, по 'Номер карты' или 'Категория'), keep - см. time_index.top_n.
+    """
+    columns = ['Дата операции', 'Сумма платежа', 'Категория', 'Описание']
+    if by is not None and by not in columns:
+        columns = [by] + columns
+    top = top_n(df, n, base_amounts(df), by=by, keep=keep)
+    top_transactions = top.assign(**{'Сумма платежа': base_amounts(top)})[columns]
+    return encode_records(top_transactions, {'Дата операции': '%d.%m.%Y'})
+
+
+@cached_market_data("currency_rates")
+def get_currency_rates(api_key: str, url: str = EXCHANGE_RATES_URL) -> List[Dict[str, float]]:
+    """Получение курсов валют (кэшируется, см. market_cache)"""
     headers = {
         "apikey": api_key
     }
 
-    response = requests.get(url, headers=headers)
+    try:
+        response = http_get(url, headers=headers)
+    except requests.RequestException as e:
+        logging.error(f"Ошибка при получении курсов валют: {str(e)}")
+        return []
 
     if response.status_code == 200:
         data = response.json()
@@ -76,26 +74,35 @@ def get_currency_rates(api_key: str) -> List[Dict[str, float]]:
         return []
 
 
-def get_stock_prices(api_key: str, stocks: List[str]) -> list[dict[str, object]]:
-    """Получение цен акций"""
-    stock_prices = []
+@cached_market_data("stock_price")
+def get_stock_price(api_key: str, stock: str, url: str = ALPHA_VANTAGE_URL) -> Optional[Dict[str, object]]:
+    """Получение цены одной акции (кэшируется, см. market_cache)"""
+    params = {"function": "TIME_SERIES_INTRADAY", "symbol": stock, "interval": "1min", "apikey": api_key}
 
-    for stock in stocks:
-        url = f"https://www.alphavantage.co/query?function=TIME_SERIES_INTRADAY&symbol={stock}&interval=1min&apikey={api_key}"
-        response = requests.get(url)
+    try:
+        response = http_get(url, params=params)
+    except requests.RequestException as e:
+        logging.error(f"Ошибка при получении цены акций {stock}: {str(e)}")
+        return None
 
-        if response.status_code == 200:
-            data = response.json()
-            if 'Time Series (1min)' in data:
-                latest_time = next(iter(data['Time Series (1min)']))
-                price = float(data['Time Series (1min)'][latest_time]['1. open'])
-                stock_prices.append({"stock": stock, "price": round(price, 2)})
-            else:
-                logging.error(f"Ключ 'Time Series (1min)' отсутствует для {stock}. Ответ: {data}")
+    if response.status_code == 200:
+        data = response.json()
+        if 'Time Series (1min)' in data:
+            latest_time = next(iter(data['Time Series (1min)']))
+            price = float(data['Time Series (1min)'][latest_time]['1. open'])
+            return {"stock": stock, "price": round(price, 2)}
         else:
-            logging.error(f"Ошибка при получении цены акций {stock}: {response.status_code}")
+            logging.error(f"Ключ 'Time Series (1min)' отсутствует для {stock}. Ответ: {data}")
+    else:
+        logging.error(f"Ошибка при получении цены акций {stock}: {response.status_code}")
+
+    return None
+
 
-    return stock_prices
+def get_stock_prices(api_key: str, stocks: List[str], url: str = ALPHA_VANTAGE_URL) -> list[dict[str, object]]:
+    """Получение цен акций: запросы по всем тикерам выполняются параллельно"""
+    prices = fetch_all(lambda stock: get_stock_price(api_key, stock, url), stocks)
+    return [price for price in prices if price is not None]
 
 
 def load_user_settings(file_path: str) -> Dict[str, List[str]]:
@@ -1,61 +1,107 @@
 import json
-import os
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from dotenv import load_dotenv
+import pandas as pd
 
+from src.config import get_api_keys, setup_logging
+from src.cube import month_bounds
+from src.market_data import run_parallel
+from src.metrics import stage, timed
+from src.repository import OperationsRepository
+from src.response_cache import memoize_response
+from src.time_index import get_time_index
 from src.utils import (get_currency_rates, get_file_paths, get_greeting, get_stock_prices, get_top_transactions,
                        load_user_settings, parse_date, process_card_data, read_operations_data)
 
-# Загрузка переменных окружения из .env файла
-load_dotenv()
-
-EXCHANGE_RATES_API_KEY = os.getenv('EXCHANGE_RATES_API_KEY')
-ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
-
-
-def base_func_module_one(date_str: str) -> str:
-    """Основная функция страницы «Главная», тянет данные с utils.py"""
+# Ключи API из переменных окружения (.env загружается один раз на процесс)
+EXCHANGE_RATES_API_KEY, ALPHA_VANTAGE_API_KEY = get_api_keys()
+
+
+@memoize_response('home_operations')
+def month_operations_summary(df: Union[pd.DataFrame, OperationsRepository],
+                             input_date: datetime) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Карты и топ транзакций с начала месяца до даты. Они не зависят от времени запроса,
+    поэтому для загруженной версии файла операций запоминаются (см. src.response_cache).
+    """
+    # Срез месяца берется из индекса по датам и переиспользуется для других дат того же месяца
+    with stage('filter_month') as measured:
+        if isinstance(df, OperationsRepository):
+            filtered_df = df.between(month_bounds(input_date.year, input_date.month)[0], input_date)
+        else:
+            filtered_df = get_time_index(df).month_to_date(input_date)
+        measured.add_rows(len(filtered_df))
+
+    with stage('cards') as measured:
+        cards_info = process_card_data(filtered_df)
+        measured.add_rows(len(filtered_df))
+
+    with stage('top_transactions') as measured:
+        top_transactions_info = get_top_transactions(filtered_df)
+        measured.add_rows(len(filtered_df))
+
+    return cards_info, top_transactions_info
+
+
+@timed('home_page')
+def base_func_module_one(date_str: str,
+                         df: Optional[Union[pd.DataFrame, OperationsRepository]] = None,
+                         user_settings: Optional[Dict[str, List[str]]] = None) -> str:
+    """
+    Основная функция страницы «Главная», тянет данные с utils.py.
+    Операции и пользовательские настройки можно передать заранее загруженными
+    (операции - DataFrame или репозиторием, см. src.repository), иначе они читаются из файлов проекта.
+    """
 
     # Получаем пути к файлам
     settings_file_path, excel_file_path = get_file_paths()
 
     # Загружаем пользовательские настройки
-    user_settings = load_user_settings(settings_file_path)
+    if user_settings is None:
+        user_settings = load_user_settings(settings_file_path)
 
     stocks_to_check = user_settings.get("user_stocks", [])
 
     # Чтение данных операций
-    df = read_operations_data(excel_file_path)
+    if df is None:
+        with stage('read_operations') as measured:
+            df = read_operations_data(excel_file_path)
+            measured.add_rows(len(df))
 
     # Преобразование строки даты в объект datetime
     input_date = parse_date(date_str)
 
     # Получаем данные за текущий месяц до указанной даты
-    start_date = input_date.replace(day=1)
-
-    filtered_df = df[(df['Дата операции'] >= start_date) & (df['Дата операции'] <= input_date)]
+    cards_info, top_transactions_info = month_operations_summary(df, input_date)
 
     # Получаем текущее время для приветствия
     current_time = datetime.now()
 
     greeting = get_greeting(current_time)
 
-    cards_info = process_card_data(filtered_df)
-
-    top_transactions_info = get_top_transactions(filtered_df)
-
     # Проверяем наличие API ключей перед вызовом функций
     if EXCHANGE_RATES_API_KEY is None:
         raise ValueError("EXCHANGE_RATES_API_KEY не установлен.")
 
-    currency_rates_info = get_currency_rates(EXCHANGE_RATES_API_KEY)
-
     if ALPHA_VANTAGE_API_KEY is None:
         raise ValueError("ALPHA_VANTAGE_API_KEY не установлен.")
 
-    stock_prices_info = get_stock_prices(ALPHA_VANTAGE_API_KEY, stocks_to_check)
+    # Курсы валют и цены акций запрашиваются одновременно
+    exchange_rates_api_key: str = EXCHANGE_RATES_API_KEY
+    alpha_vantage_api_key: str = ALPHA_VANTAGE_API_KEY
+
+    # Каждый API замеряется отдельно, чтобы было видно, какой из них медленный
+    def currency_rates() -> List[Dict[str, float]]:
+        with stage('market_data.currency_rates'):
+            return get_currency_rates(exchange_rates_api_key)
+
+    def stock_prices() -> List[Dict[str, object]]:
+        with stage('market_data.stock_prices'):
+            return get_stock_prices(alpha_vantage_api_key, stocks_to_check)
+
+    with stage('market_data'):
+        currency_rates_info, stock_prices_info = run_parallel(currency_rates, stock_prices)
 
     response_json: Dict[str, Any] = {
         "greeting": greeting,
@@ -70,4 +116,5 @@ def base_func_module_one(date_str: str) -> str:
 
 # Пример вызова функции main
 if __name__ == "__main__":
+    setup_logging()
     print(base_func_module_one("2020-05-02 20:00:00"))
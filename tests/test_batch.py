@@ -0,0 +1,90 @@
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from src.batch import parse_jobs, run_jobs, write_results
+from src.main import main
+from src.operations import clear_operations_cache
+from src.response_cache import response_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_caches(monkeypatch: pytest.MonkeyPatch) -> Any:
+    """Очистка кэшей операций и ответов, колоночный кэш на диске отключен."""
+    monkeypatch.setattr('src.operations.DISK_CACHE_ENABLED', False)
+    clear_operations_cache()
+    response_cache.clear()
+    yield
+    clear_operations_cache()
+    response_cache.clear()
+
+
+@pytest.fixture
+def operations_file(tmp_path: Path) -> str:
+    """Файл с тремя операциями за декабрь 2021 года."""
+    path = tmp_path / 'operations.xlsx'
+    pd.DataFrame({
+        'Дата операции': ['01.12.2021 10:00:00', '15.12.2021 12:00:00', '20.12.2021 18:30:00'],
+        'Номер карты': ['*7197', '*7197', '*5091'],
+        'Сумма операции': [-100.0, -250.0, -40.0],
+        'Сумма платежа': [-100.0, -250.0, -40.0],
+        'Кэшбэк': [1.0, 2.5, 0.4],
+        'Категория': ['Супермаркеты', 'Супермаркеты', 'Аптеки'],
+        'Описание': ['Колхоз', 'Пятёрочка', 'Аптека'],
+    }).to_excel(path, index=False)
+    return str(path)
+
+
+JOBS = [
+    '{"id": "c", "type": "cashback", "year": 2021, "month": 12}',
+    '{"id": "s", "type": "search", "query": "Колхоз", "limit": 5}',
+    '',
+    '{"id": "p", "type": "spending", "category": "Супермаркеты", "date": "2021-12-31 00:00:00"}',
+    '{"id": "x", "type": "forecast"}',
+    'не json',
+]
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_jobs_run_in_order_with_errors_isolated(operations_file: str, workers: int) -> None:
+    """Задания выполняются над одним снимком, результаты - в порядке заданий, ошибки не мешают остальным."""
+    results = list(run_jobs(parse_jobs(JOBS), operations_file, workers))
+
+    assert [record["id"] for record in results] == ["c", "s", "p", "x", 6]
+    assert [record["status"] for record in results] == ["ok", "ok", "ok", "error", "error"]
+    assert results[0]["result"] == {"Супермаркеты": 3.5, "Аптеки": 0.4}
+    assert results[1]["result"]["total"] == 1
+    assert results[2]["result"]["total_spending"] == -350.0
+    assert "forecast" in results[3]["error"]
+    assert all(record["seconds"] >= 0 for record in results)
+
+
+def test_batch_command_writes_jsonl(operations_file: str, tmp_path: Path) -> None:
+    """Команда batch пишет результаты JSON Lines в файл и возвращает 1, если были ошибки."""
+    jobs_path, output_path = tmp_path / 'jobs.jsonl', tmp_path / 'results.jsonl'
+    jobs_path.write_text('\n'.join(JOBS[:2]), encoding='utf-8')
+
+    assert main(['batch', str(jobs_path), '--file', operations_file, '--output', str(output_path), '--quiet']) == 0
+    lines = output_path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["c", "s"]
+
+    jobs_path.write_text(JOBS[4], encoding='utf-8')
+    assert main(['batch', str(jobs_path), '--file', operations_file, '--output', str(output_path), '--quiet']) == 1
+
+
+def test_write_results_summary() -> None:
+    """Сводка считает задания, ошибки и среднее время по типам."""
+    records = [{"id": 1, "type": "search", "status": "ok", "result": {}, "seconds": 0.2},
+               {"id": 2, "type": "search", "status": "error", "error": "нет", "seconds": 0.4}]
+    output, progress = io.StringIO(), io.StringIO()
+
+    summary = write_results(records, output, progress)
+
+    assert summary["jobs"] == 2 and summary["errors"] == 1
+    assert summary["mean_seconds"] == {"search": pytest.approx(0.3)}
+    assert len(output.getvalue().splitlines()) == 2
+    assert "Итого" in progress.getvalue()
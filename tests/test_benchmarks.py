@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+from pytest_mock import MockerFixture
+
+from benchmarks.suite import compare, main
+from benchmarks.synthetic import OPERATION_COLUMNS, generate_operations, to_export_format
+from src.currency import BASE_AMOUNT_COLUMN
+from src.operations import normalize_operations
+from src.search_index import SearchIndex
+
+
+def test_generate_operations_matches_schema() -> None:
+    """Синтетические операции совпадают по столбцам и типам с загруженными из выгрузки."""
+    df = generate_operations(2000, seed=1)
+
+    assert list(df.columns) == OPERATION_COLUMNS + [BASE_AMOUNT_COLUMN]
+    assert len(df) == 2000
+    assert df['Дата операции'].is_monotonic_decreasing
+    reloaded = normalize_operations(to_export_format(df))
+    assert reloaded.dtypes.astype(str).to_dict() == df.dtypes.astype(str).to_dict()
+    pd.testing.assert_series_equal(reloaded['Сумма операции'], df['Сумма операции'])
+
+
+def test_compare_flags_regressions() -> None:
+    """Тестирование сравнения с базовыми результатами."""
+    baseline = {"results": [{"case": "search", "rows": 10, "median": 0.1},
+                            {"case": "cards", "rows": 10, "median": 0.001}]}
+    current = {"results": [{"case": "search", "rows": 10, "median": 0.2},
+                           {"case": "cards", "rows": 10, "median": 0.0015},
+                           {"case": "home", "rows": 10, "median": 0.5}]}
+
+    comparison = {row["case"]: row for row in compare(current, baseline, threshold=0.2)}
+
+    assert set(comparison) == {"search", "cards"}
+    assert comparison["search"]["regression"] and comparison["search"]["ratio"] == 2.0
+    # Замедление в полмиллисекунды считается шумом
+    assert not comparison["cards"]["regression"]
+
+
+def test_suite_writes_json_and_compares(tmp_path: Path) -> None:
+    """Тестирование запуска набора замеров и сравнения с сохраненными результатами."""
+    output = tmp_path / "bench.json"
+    args = ["--rows", "500", "--repeat", "1", "--case", "process_card_data", "--case", "home_page"]
+
+    assert main(args + ["--output", str(output)]) == 0
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert [result["case"] for result in report["results"]] == ["process_card_data", "home_page"]
+
+    assert main(args + ["--output", str(output), "--baseline", str(output), "--threshold", "100"]) == 0
+    assert len(json.loads(output.read_text(encoding='utf-8'))["comparison"]) == 2
+
+
+def test_suite_measures_snapshot_cold_and_warm(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Поиск и кешбэк замеряются по снимку файла: отдельно с построением индекса и куба и по готовым."""
+    output = tmp_path / "bench.json"
+    cases = ["search_transactions_cold", "search_transactions",
+             "analyze_cashback_categories_cold", "analyze_cashback_categories"]
+    args = ["--rows", "500", "--repeat", "2", "--output", str(output)]
+    for case in cases:
+        args += ["--case", case]
+
+    build = mocker.spy(SearchIndex, '__init__')
+
+    assert main(args) == 0
+
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert [result["case"] for result in report["results"]] == cases
+    # Холодный замер строит индекс при каждом вызове (прогрев и 2 повтора), теплый - ни разу
+    assert build.call_count == 3
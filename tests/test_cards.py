@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from src.cards import CARD_METRICS, aggregate_cards
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Операции по двум картам и одна операция без карты."""
+    return pd.DataFrame({
+        'Номер карты': ['*7197', '*4556', '*7197', None, '*7197'],
+        'Сумма операции': [-100.0, -50.5, -300.0, -1000.0, 200.0],
+        'Категория': ['Еда', 'Транспорт', 'Транспорт', 'Еда', 'Еда'],
+    })
+
+
+def test_aggregate_cards_default_metrics(operations: pd.DataFrame) -> None:
+    """По умолчанию считаются траты и кешбэк в порядке появления карт."""
+    result = aggregate_cards(operations)
+
+    assert result == [
+        {"last_digits": "7197", "total_spent": -200.0, "cashback": 2.0},
+        {"last_digits": "4556", "total_spent": -50.5, "cashback": 0.51},
+    ]
+
+
+def test_aggregate_cards_all_metrics(operations: pd.DataFrame) -> None:
+    """Дополнительные показатели и разбивка по категориям."""
+    result = aggregate_cards(operations, CARD_METRICS)
+
+    assert result[0] == {
+        "last_digits": "7197",
+        "total_spent": -200.0,
+        "cashback": 2.0,
+        "count": 3,
+        "mean": -66.67,
+        "max": 200.0,
+        "categories": {"Еда": 100.0, "Транспорт": -300.0},
+    }
+    assert result[1]["categories"] == {"Транспорт": -50.5}
+
+
+def test_aggregate_cards_empty() -> None:
+    """Нет операций по картам - пустой результат."""
+    df = pd.DataFrame({'Номер карты': [None], 'Сумма операции': [-10.0], 'Категория': ['Еда']})
+
+    assert aggregate_cards(df) == []
+
+
+def test_aggregate_cards_unknown_metric(operations: pd.DataFrame) -> None:
+    """Неизвестный показатель приводит к ошибке."""
+    with pytest.raises(ValueError):
+        aggregate_cards(operations, ['median'])
@@ -0,0 +1,69 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from src.columnar_cache import compute_file_hash, get_cache_dir, load_cached_frame, save_cached_frame
+
+
+@pytest.fixture
+def source_file(tmp_path: Path) -> str:
+    """Создание временного исходного файла."""
+    file_path = tmp_path / "operations.xlsx"
+    file_path.write_bytes(b"first export")
+    return str(file_path)
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Типизированные операции для записи в кэш."""
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['2021-12-31 16:44:00', '2021-12-30 10:00:00']),
+        'Сумма операции': [-160.89, -64.0],
+        'Категория': ['Супермаркеты', None],
+    })
+
+
+def test_compute_file_hash_depends_on_content(source_file: str) -> None:
+    """Хэш меняется вместе с содержимым файла."""
+    first_hash = compute_file_hash(source_file)
+    with open(source_file, 'wb') as f:
+        f.write(b"second export")
+
+    assert compute_file_hash(source_file) != first_hash
+
+
+def test_save_and_load_cached_frame(source_file: str, operations: pd.DataFrame) -> None:
+    """Сохраненный кэш читается с теми же типами."""
+    content_hash = compute_file_hash(source_file)
+    save_cached_frame(source_file, content_hash, operations)
+
+    loaded = load_cached_frame(source_file, content_hash)
+
+    assert loaded is not None
+    pd.testing.assert_frame_equal(loaded, operations)
+
+
+def test_save_cached_frame_pickle_fallback(mocker: MockerFixture, source_file: str,
+                                           operations: pd.DataFrame) -> None:
+    """Без pyarrow кэш пишется в pickle."""
+    mocker.patch('src.columnar_cache.feather', None)
+    content_hash = compute_file_hash(source_file)
+
+    cache_path = save_cached_frame(source_file, content_hash, operations)
+    loaded = load_cached_frame(source_file, content_hash)
+
+    assert cache_path is not None and cache_path.endswith('.pkl')
+    assert loaded is not None
+    pd.testing.assert_frame_equal(loaded, operations)
+
+
+def test_save_cached_frame_removes_stale_versions(source_file: str, operations: pd.DataFrame) -> None:
+    """Кэш прежней версии файла удаляется."""
+    save_cached_frame(source_file, 'a' * 64, operations)
+    cache_path = save_cached_frame(source_file, 'b' * 64, operations)
+
+    assert os.listdir(get_cache_dir(source_file)) == [os.path.basename(str(cache_path))]
+    assert load_cached_frame(source_file, 'a' * 64) is None
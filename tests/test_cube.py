@@ -0,0 +1,91 @@
+import warnings
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from src.cube import OperationsCube, clear_cube_cache, snapshot_cube
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Операции за два месяца по двум картам."""
+    return pd.DataFrame({
+        'Дата операции': ['30.11.2021 10:00:00', '01.12.2021 12:00:00', '01.12.2021 18:00:00',
+                          '15.12.2021 09:00:00', '31.12.2021 23:59:59', '31.12.2021 16:44:00'],
+        'Номер карты': ['*7197', '*7197', '*4556', '*7197', '*4556', None],
+        'Категория': ['Еда', 'Еда', 'Еда', 'Транспорт', 'Зарплата', 'Такси'],
+        'Сумма операции': [-100.0, -1000.0, -500.0, -700.0, 50000.0, -300.0],
+    })
+
+
+def test_cells_are_aggregated_by_day_category_card(operations: pd.DataFrame) -> None:
+    """Операции одного дня, категории и карты складываются в одну ячейку."""
+    cube = OperationsCube.from_operations(operations)
+
+    assert len(cube.cells) == 6
+    assert cube.cells['count'].sum() == 6
+    assert cube.cells['day'].is_monotonic_increasing
+
+
+def test_top_cashback_categories(operations: pd.DataFrame) -> None:
+    """Топ категорий по кешбэку за месяц с исключенными категориями."""
+    cube = OperationsCube.from_operations(operations)
+
+    assert cube.top_cashback_categories(2021, 12, n=3, excluded=['Зарплата']) == {
+        'Еда': 15.0, 'Транспорт': 7.0, 'Такси': 3.0
+    }
+    assert cube.top_cashback_categories(2021, 12, n=1) == {'Зарплата': 500.0}
+    assert cube.top_cashback_categories(2020, 1) == {}
+
+
+def test_category_spending(operations: pd.DataFrame) -> None:
+    """Суммы по категории за период."""
+    cube = OperationsCube.from_operations(operations)
+
+    assert cube.category_spending('Еда', '2021-11-30', '2021-12-01') == -100.0
+    assert cube.category_spending('Еда', '2021-11-01', '2022-01-01') == -1600.0
+    assert cube.category_spending('Техника', '2021-11-01', '2022-01-01') == 0.0
+
+
+def test_append_matches_full_rebuild(operations: pd.DataFrame) -> None:
+    """Добавление новых операций дает тот же результат, что и построение куба заново."""
+    cube = OperationsCube.from_operations(operations.iloc[:3])
+    cube.top_cashback_categories(2021, 12)
+    cube.category_spending('Еда', '2021-11-01', '2022-01-01')
+
+    cube.append(operations.iloc[3:])
+    full = OperationsCube.from_operations(operations)
+
+    assert cube.top_cashback_categories(2021, 12) == full.top_cashback_categories(2021, 12)
+    assert cube.category_spending('Еда', '2021-11-01', '2022-01-01') == \
+        full.category_spending('Еда', '2021-11-01', '2022-01-01')
+    assert cube.cells['amount'].sum() == full.cells['amount'].sum()
+
+
+def test_extended_does_not_change_original(operations: pd.DataFrame) -> None:
+    """Новый куб строится из копии: исходный куб (его читают другие потоки) не меняется."""
+    cube = OperationsCube.from_operations(operations.iloc[:3])
+    before = cube.top_cashback_categories(2021, 12)
+    cells = cube.cells
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        extended = cube.extended(operations.iloc[3:])
+
+    assert cube.cells is cells and cube.top_cashback_categories(2021, 12) == before
+    assert extended.top_cashback_categories(2021, 12) == \
+        OperationsCube.from_operations(operations).top_cashback_categories(2021, 12)
+
+
+def test_frame_cube_is_reused(mocker: MockerFixture, operations: pd.DataFrame) -> None:
+    """Куб DataFrame, который не является снимком файла, строится один раз на DataFrame."""
+    clear_cube_cache()
+    build = mocker.spy(OperationsCube, 'from_operations')
+
+    first = snapshot_cube(operations)
+
+    assert snapshot_cube(operations) is first
+    assert snapshot_cube(operations.copy()) is not first
+    assert build.call_count == 2
+    clear_cube_cache()
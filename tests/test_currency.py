@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cards import aggregate_cards
+from src.currency import BASE_AMOUNT_COLUMN, convert_amounts, load_rate_table, rates_from_quotes, save_rates
+from src.operations import normalize_operations
+
+
+@pytest.fixture
+def rates() -> pd.DataFrame:
+    """Курсы юаня на две даты и доллара на одну."""
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2021-01-01', '2021-06-01', '2021-01-01']),
+        'currency': ['CNY', 'CNY', 'USD'],
+        'rate': [11.0, 12.0, 74.0],
+    })
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Операции по рублевой и юаневой картам, одна - в валюте без курса."""
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['2021-07-01 10:00', '2021-03-01 10:00', '2020-12-01 10:00',
+                                         '2021-03-01 10:00', '2021-03-02 10:00', '2021-03-03 10:00']),
+        'Номер карты': ['*7197', '*1111', '*1111', '*1111', '*7197', '*7197'],
+        'Сумма операции': [-10.0, -100.0, -20.0, -5.0, -100.0, -3.0],
+        'Валюта операции': ['USD', 'RUB', 'CNY', 'CNY', 'RUB', 'TRY'],
+        'Сумма платежа': [-750.0, -9.0, -20.0, -5.0, -100.0, -3.0],
+        'Валюта платежа': ['RUB', 'CNY', 'CNY', 'CNY', 'RUB', 'TRY'],
+    })
+
+
+def test_convert_amounts_uses_base_amounts_and_dated_rates(operations: pd.DataFrame, rates: pd.DataFrame) -> None:
+    """Суммы в базовой валюте берутся как есть, остальные пересчитываются по курсу на дату операции."""
+    result = convert_amounts(operations, rates, base='RUB')
+
+    # Списание с рублевой карты, сумма операции в рублях, курс до начала таблицы и курс на дату
+    assert result.tolist()[:5] == [-750.0, -100.0, -220.0, -55.0, -100.0]
+    # Для лиры курса нет
+    assert np.isnan(result.iloc[5])
+
+
+def test_aggregations_use_base_amounts(operations: pd.DataFrame, rates: pd.DataFrame, tmp_path: Path) -> None:
+    """Траты по картам считаются по суммам в базовой валюте."""
+    rates_path = tmp_path / 'rates.csv'
+    save_rates(rates, str(rates_path))
+    df = operations.copy()
+    df[BASE_AMOUNT_COLUMN] = convert_amounts(df, load_rate_table(str(rates_path)), base='RUB')
+
+    totals = {card["last_digits"]: card["total_spent"] for card in aggregate_cards(df)}
+
+    assert totals == {"7197": -850.0, "1111": -375.0}
+
+
+def test_rates_from_quotes_round_trip(tmp_path: Path) -> None:
+    """Курсы API (к евро) пересчитываются к базовой валюте и дописываются в таблицу курсов."""
+    quotes = [{"currency": "RUB", "rate": 90.0}, {"currency": "USD", "rate": 1.2}, {"currency": "EUR", "rate": 1.0}]
+    rates_path = str(tmp_path / 'rates.csv')
+
+    save_rates(rates_from_quotes(quotes, pd.Timestamp('2021-12-31'), base='RUB'), rates_path)
+    table = save_rates(rates_from_quotes(quotes, pd.Timestamp('2021-12-31'), base='RUB'), rates_path)
+
+    assert table['currency'].tolist() == ['EUR', 'USD']
+    assert table['rate'].tolist() == [90.0, 75.0]
+    pd.testing.assert_frame_equal(load_rate_table(rates_path), table)
+    with pytest.raises(ValueError):
+        rates_from_quotes(quotes, base='JPY')
+
+
+def test_normalize_operations_adds_base_amounts() -> None:
+    """При загрузке операций добавляется столбец сумм в базовой валюте."""
+    df = normalize_operations(pd.DataFrame({
+        'Дата операции': ['31.12.2021 16:44:00'],
+        'Сумма операции': [-10.0],
+        'Валюта операции': ['USD'],
+        'Сумма платежа': [-750.0],
+        'Валюта платежа': ['RUB'],
+        'Категория': ['Супермаркеты'],
+        'Описание': ['Колхоз'],
+    }))
+
+    assert df[BASE_AMOUNT_COLUMN].tolist() == [-750.0]
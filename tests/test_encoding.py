@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from src.encoding import dumps, encode_records, format_dates, iter_json_document
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Операции с пропусками и компактными типами."""
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['2021-12-31 16:44:00', 'NaT', '2021-01-02 03:04:05']),
+        'Номер карты': pd.Series(['*7197', None, '*4556'], dtype='category'),
+        'Сумма операции': [-160.89, np.nan, 1000.0],
+        'Кэшбэк': np.array([1.1, np.nan, 70.0], dtype='float32'),
+        'MCC': pd.array([5411, None, 4121], dtype='Int32'),
+        'Бонусы': np.array([3, 0, 10], dtype='int8'),
+    })
+
+
+def test_encode_records(operations: pd.DataFrame) -> None:
+    """Тестирование кодирования строк в словари с пропусками и датами."""
+    records = encode_records(operations, {'Дата операции': '%d.%m.%Y %H:%M:%S'})
+
+    assert records[0] == {'Дата операции': '31.12.2021 16:44:00', 'Номер карты': '*7197', 'Сумма операции': -160.89,
+                          'Кэшбэк': 1.1, 'MCC': 5411, 'Бонусы': 3}
+    assert records[1] == {'Дата операции': None, 'Номер карты': None, 'Сумма операции': None,
+                          'Кэшбэк': None, 'MCC': None, 'Бонусы': 0}
+    assert [type(value) for value in records[2].values()] == [str, str, float, float, int, int]
+
+
+def test_format_dates_matches_strftime(operations: pd.DataFrame) -> None:
+    """Тестирование быстрого форматирования дат."""
+    dates = operations['Дата операции']
+    for date_format in ['%d.%m.%Y %H:%M:%S', '%d.%m.%Y', '%Y/%m/%d']:
+        expected = [None if pd.isna(date) else date.strftime(date_format) for date in dates]
+        assert format_dates(dates, date_format) == expected
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_dumps_backends_match(mocker: MockerFixture, backend: str) -> None:
+    """Тестирование одинакового вывода кодировщиков json и orjson."""
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    mocker.patch('src.encoding.JSON_BACKEND', backend)
+
+    assert dumps({"Категория": "Еда", "Сумма": -160.89, "MCC": None, "Список": [1, 2.5]}) == (
+        '{"Категория":"Еда","Сумма":-160.89,"MCC":null,"Список":[1,2.5]}')
+
+
+def test_iter_json_document(operations: pd.DataFrame) -> None:
+    """Тестирование потоковой выдачи документа по частям."""
+    parts = list(iter_json_document("transactions", operations, chunk_size=1, rows=[2, 0], extra={"total": 2}))
+
+    assert len(parts) == 4
+    document = json.loads("".join(parts))
+    assert [row['Бонусы'] for row in document["transactions"]] == [10, 3]
+    assert document["total"] == 2
+    assert "".join(iter_json_document("transactions", operations.iloc[:0])) == '{"transactions":[]}'
@@ -0,0 +1,113 @@
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from src.columnar_cache import compute_file_hash, get_cache_path
+from src.cube import get_operations_cube
+from src.ingest import append_operations, find_new_rows, read_new_operations
+from src import operations as operations_module
+from src.operations import clear_operations_cache, get_operations_version, load_operations
+from src.search_index import clear_search_index_cache, get_search_index
+from src.time_index import clear_time_index_cache, get_time_index
+
+
+@pytest.fixture(autouse=True)
+def clean_cache() -> Any:
+    """Очистка кэшей операций и индексов."""
+    clear_operations_cache()
+    clear_search_index_cache()
+    clear_time_index_cache()
+    yield
+    clear_operations_cache()
+    clear_search_index_cache()
+    clear_time_index_cache()
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Операции в том виде, в котором они читаются из Excel."""
+    return pd.DataFrame({
+        'Дата операции': ['31.12.2021 16:44:00', '30.12.2021 10:00:00', '01.12.2021 12:00:00'],
+        'Номер карты': ['*7197', '*7197', '*4556'],
+        'Сумма операции': [-160.89, -64.0, -500.0],
+        'Валюта операции': ['RUB', 'RUB', 'RUB'],
+        'Сумма платежа': [-160.89, -64.0, -500.0],
+        'Категория': ['Супермаркеты', 'Супермаркеты', 'Фастфуд'],
+        'Описание': ['Колхоз', 'Магнит', 'Теремок'],
+    })
+
+
+@pytest.fixture
+def delta() -> List[Dict[str, Any]]:
+    """Новые операции: одна уже загружена, одна повторяется дважды."""
+    new = {'Дата операции': '31.12.2021 20:00:00', 'Номер карты': '*4556', 'Сумма операции': -250.0,
+           'Валюта операции': 'RUB', 'Сумма платежа': -250.0, 'Категория': 'Аптеки', 'Описание': 'Ригла'}
+    loaded = {'Дата операции': '31.12.2021 16:44:00', 'Номер карты': '*7197', 'Сумма операции': -160.89,
+              'Валюта операции': 'RUB', 'Сумма платежа': -160.89, 'Категория': 'Супермаркеты',
+              'Описание': 'Колхоз'}
+    return [new, loaded, dict(new)]
+
+
+@pytest.fixture
+def operations_file(tmp_path: Path, mocker: MockerFixture, operations: pd.DataFrame) -> str:
+    """Временный файл операций, содержимое которого читается из фикстуры."""
+    file_path = tmp_path / "operations.xlsx"
+    file_path.write_bytes(b"export")
+    mocker.patch('pandas.read_excel', return_value=operations)
+    return str(file_path)
+
+
+def test_find_new_rows_skips_loaded_and_repeated(operations: pd.DataFrame, delta: List[Dict[str, Any]]) -> None:
+    """Уже загруженные и повторяющиеся операции не считаются новыми."""
+    df = read_new_operations(operations)
+
+    assert find_new_rows(df, read_new_operations(delta)).tolist() == [True, False, False]
+
+
+def test_append_operations_updates_snapshot_and_indexes(operations_file: str,
+                                                        delta: List[Dict[str, Any]]) -> None:
+    """Снимок, поисковый индекс, куб и индекс по датам дополняются без перечитывания файла."""
+    df = load_operations(operations_file)
+    version = get_operations_version(operations_file)
+    get_search_index(operations_file)
+    get_operations_cube(operations_file)
+
+    result = append_operations(delta, operations_file)
+
+    updated = load_operations(operations_file)
+    assert result == {"received": 3, "added": 1, "duplicates": 2}
+    assert len(updated) == len(df) + 1 and len(df) == 3
+    assert get_operations_version(operations_file) != version
+    assert updated['Категория'].dtype == 'category'
+    assert get_search_index(operations_file)[1].search('ригла') == [3]
+    assert get_operations_cube(operations_file).top_cashback_categories(2021, 12) == {
+        'Фастфуд': 5.0, 'Аптеки': 2.5, 'Супермаркеты': 2.2489
+    }
+    assert get_time_index(updated).month(2021, 12)['Описание'].tolist() == ['Колхоз', 'Магнит', 'Теремок', 'Ригла']
+
+
+def test_append_operations_without_new_rows(operations_file: str, delta: List[Dict[str, Any]]) -> None:
+    """Повторная загрузка тех же операций ничего не меняет."""
+    append_operations(delta, operations_file)
+    df = load_operations(operations_file)
+
+    assert append_operations(delta, operations_file) == {"received": 3, "added": 0, "duplicates": 3}
+    assert load_operations(operations_file) is df
+
+
+def test_append_operations_keeps_file_disk_cache(operations_file: str, delta: List[Dict[str, Any]],
+                                                 monkeypatch: pytest.MonkeyPatch) -> None:
+    """Индекс снимка с добавленными операциями не пишется на диск и не удаляет кэш файла."""
+    monkeypatch.setattr(operations_module, 'DISK_CACHE_ENABLED', True)
+    load_operations(operations_file)
+    cache_path = get_cache_path(operations_file, compute_file_hash(operations_file))
+    assert Path(cache_path).exists()
+
+    append_operations(delta, operations_file)
+    assert get_search_index(operations_file)[1].search('ригла') == [3]
+
+    assert Path(cache_path).exists()
+    assert sorted(path.name for path in Path(cache_path).parent.iterdir()) == [Path(cache_path).name]
@@ -0,0 +1,43 @@
+import json
+import subprocess
+import sys
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.importtime import check_imports
+from src.main import build_parser, main
+
+
+def test_subcommand_dispatch(capsys: Any) -> None:
+    """Тестирование вызова анализа по подкоманде с аргументами командной строки."""
+    with patch('src.services.analyze_cashback_categories', return_value='{"Супермаркеты": 5.0}') as analyze:
+        assert main(['cashback', '--year', '2021', '--month', '12']) == 0
+
+    analyze.assert_called_once_with(2021, 12, None)
+    assert json.loads(capsys.readouterr().out) == {"Супермаркеты": 5.0}
+
+
+def test_parser_rejects_bad_arguments() -> None:
+    """Тестирование ошибок в аргументах: неверный месяц и отсутствие обязательной категории."""
+    parser = build_parser()
+    with pytest.raises(SystemExit):
+        parser.parse_args(['cashback', '--year', '2021', '--month', '13'])
+    with pytest.raises(SystemExit):
+        parser.parse_args(['spending', '--year', '2021'])
+
+
+def test_import_time_budget() -> None:
+    """Импорт командной строки не загружает pandas, requests и другие тяжелые зависимости."""
+    # Бюджет времени с запасом для медленных машин; главное - отсутствие тяжелых модулей
+    assert check_imports('src.main', budget=1.0) == []
+
+
+def test_imports_do_not_configure_logging() -> None:
+    """Импорт модулей проекта не настраивает логирование: это делают только точки входа."""
+    code = ("import logging, src.server, src.runner, src.batch, src.services, src.currency; "
+            "print(len(logging.getLogger().handlers))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == '0'
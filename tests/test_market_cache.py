@@ -0,0 +1,96 @@
+import time
+from pathlib import Path
+from typing import Any, List
+from unittest.mock import Mock
+
+import pytest
+
+from src.market_cache import TTLCache, cached_market_data, market_cache
+
+
+def wait_for(condition: Any, timeout: float = 2.0) -> None:
+    """Ожидание завершения фонового обновления."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_fresh_value_is_served_from_cache() -> None:
+    """Пока время жизни не истекло, загрузчик не вызывается повторно."""
+    cache = TTLCache()
+    loader = Mock(return_value=[{"currency": "USD", "rate": 1.0}])
+
+    first = cache.get("rates", loader, ttl=60, max_stale=600)
+    second = cache.get("rates", loader, ttl=60, max_stale=600)
+
+    assert first == second
+    loader.assert_called_once()
+    assert cache.stats() == {"hits": 1, "misses": 1, "stale": 0, "errors": 0, "size": 1}
+
+
+def test_stale_value_is_served_while_refreshing() -> None:
+    """Устаревшее значение отдается сразу, а обновляется в фоне."""
+    cache = TTLCache()
+    loader = Mock(side_effect=[["old"], ["new"]])
+    cache.get("rates", loader, ttl=0, max_stale=600)
+
+    assert cache.get("rates", loader, ttl=0, max_stale=600) == ["old"]
+    wait_for(lambda: loader.call_count == 2 and cache.get("rates", loader, ttl=60, max_stale=600) == ["new"])
+    assert cache.get("rates", loader, ttl=60, max_stale=600) == ["new"]
+
+
+def test_last_known_value_on_api_failure() -> None:
+    """При ошибке API возвращается последнее известное значение."""
+    cache = TTLCache()
+    cache.get("rates", Mock(return_value=["old"]), ttl=0, max_stale=0)
+
+    assert cache.get("rates", Mock(return_value=[]), ttl=0, max_stale=0) == ["old"]
+    assert cache.get("rates", Mock(side_effect=RuntimeError("timeout")), ttl=0, max_stale=0) == ["old"]
+    assert cache.stats()["errors"] == 2
+
+
+def test_lru_eviction() -> None:
+    """При переполнении вытесняется давно не использованная запись."""
+    cache = TTLCache(max_size=2)
+    for key in ["a", "b"]:
+        cache.get(key, Mock(return_value=[key]), ttl=60, max_stale=60)
+    cache.get("a", Mock(), ttl=60, max_stale=60)
+    cache.get("c", Mock(return_value=["c"]), ttl=60, max_stale=60)
+
+    loader = Mock(return_value=["b2"])
+    assert cache.get("b", loader, ttl=60, max_stale=60) == ["b2"]
+    loader.assert_called_once()
+
+
+def test_store_survives_restart(tmp_path: Path) -> None:
+    """Записи сохраняются в файл и читаются новым экземпляром кэша."""
+    store_path = str(tmp_path / "market_cache.json")
+    TTLCache(store_path=store_path).get("rates", Mock(return_value=["saved"]), ttl=60, max_stale=60)
+
+    loader = Mock()
+    assert TTLCache(store_path=store_path).get("rates", loader, ttl=60, max_stale=60) == ["saved"]
+    loader.assert_not_called()
+
+
+@pytest.fixture
+def clean_market_cache() -> Any:
+    """Очистка общего кэша рыночных данных."""
+    market_cache.clear()
+    yield
+    market_cache.clear()
+
+
+def test_cached_market_data_ignores_api_key(clean_market_cache: Any) -> None:
+    """Ключ кэша не зависит от API ключа."""
+    calls: List[str] = []
+
+    @cached_market_data("stock_price")
+    def fetch_price(api_key: str, stock: str) -> dict:
+        calls.append(api_key)
+        return {"stock": stock, "price": 1.0}
+
+    fetch_price("key1", "AAPL")
+    fetch_price("key2", "AAPL")
+    fetch_price("key2", "MSFT")
+
+    assert calls == ["key1", "key2"]
@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from pytest_mock import MockerFixture
+
+from src.market_cache import market_cache
+from src.market_data import RateLimiter, fetch_all, run_parallel
+from src.utils import get_currency_rates, get_stock_prices
+
+STUB_DELAY = 0.2
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Локальная заглушка API курсов валют и цен акций."""
+
+    failures: Dict[str, int] = {}
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        time.sleep(STUB_DELAY)
+
+        if StubHandler.failures.get(url.path, 0) > 0:
+            StubHandler.failures[url.path] -= 1
+            self._reply(503, {"message": "unavailable"})
+        elif url.path == "/latest":
+            self._reply(200, {"rates": {"USD": 1.0, "EUR": 0.9}})
+        elif params.get("symbol") == "FAIL":
+            self._reply(200, {"Information": "rate limit"})
+        else:
+            series = {"2025-01-01 10:00:00": {"1. open": str(100 + len(params["symbol"]))}}
+            self._reply(200, {"Time Series (1min)": series})
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_url() -> Iterator[str]:
+    """Запуск заглушки API на свободном локальном порту."""
+    StubHandler.failures = {}
+    market_cache.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_stock_prices_concurrent(stub_url: str) -> None:
+    """Цены по всем тикерам запрашиваются одновременно, порядок сохраняется."""
+    start = time.perf_counter()
+    result = get_stock_prices("key", ["AAPL", "FAIL", "GOOGL", "MSFT"], url=f"{stub_url}/query")
+    elapsed = time.perf_counter() - start
+
+    assert result == [
+        {"stock": "AAPL", "price": 104.0},
+        {"stock": "GOOGL", "price": 105.0},
+        {"stock": "MSFT", "price": 104.0},
+    ]
+    assert elapsed < STUB_DELAY * 3
+
+
+def test_get_currency_rates_retries_server_errors(stub_url: str) -> None:
+    """Ошибка сервера повторяется, после чего курсы успешно получены."""
+    StubHandler.failures["/latest"] = 1
+
+    result = get_currency_rates("key", url=f"{stub_url}/latest")
+
+    assert result == [{"currency": "USD", "rate": 1.0}, {"currency": "EUR", "rate": 0.9}]
+
+
+def test_get_currency_rates_connection_error(mocker: MockerFixture) -> None:
+    """Недоступный сервис не роняет приложение."""
+    mocker.patch('src.market_data.RETRY_BACKOFF', 0)
+    mocker.patch('src.market_data._session', None)
+
+    assert get_currency_rates("key", url="http://127.0.0.1:9/latest") == []
+
+
+def slow(value: int) -> int:
+    """Значение после задержки, как у медленного API."""
+    time.sleep(STUB_DELAY)
+    return value
+
+
+def test_run_parallel_and_fetch_all() -> None:
+    """Независимые вызовы выполняются одновременно."""
+    start = time.perf_counter()
+    results = run_parallel(lambda: slow(1), lambda: slow(2))
+
+    assert results == [1, 2]
+    assert time.perf_counter() - start < STUB_DELAY * 2
+    assert fetch_all(lambda x: x * 2, [1, 2, 3]) == [2, 4, 6]
+
+
+def test_rate_limiter_waits_for_free_slot() -> None:
+    """Сверх лимита запрос ждет освобождения окна."""
+    limiter = RateLimiter(max_calls=2, period=0.2)
+
+    start = time.perf_counter()
+    for _ in range(3):
+        limiter.acquire()
+
+    assert time.perf_counter() - start >= 0.2
@@ -0,0 +1,88 @@
+import os
+from typing import Iterator
+
+import pytest
+
+from src import metrics
+from src.metrics import MetricsRegistry, record_cache, stage, timed
+
+
+@pytest.fixture
+def enabled_metrics() -> Iterator[MetricsRegistry]:
+    """Включенные замеры с пустым реестром."""
+    metrics.registry.clear()
+    metrics.set_enabled(True)
+    yield metrics.registry
+    metrics.set_enabled(False)
+    metrics.registry.clear()
+
+
+def test_stage_records_duration_and_rows(enabled_metrics: MetricsRegistry) -> None:
+    """Тестирование замера этапа: длительность, строки и статус ошибки."""
+    with stage('cards') as measured:
+        measured.add_rows(10)
+    with pytest.raises(ValueError):
+        with stage('cards'):
+            raise ValueError("ошибка")
+
+    data = enabled_metrics.snapshot()
+    assert data["counters"]["stage_rows_total"] == {(('stage', 'cards'),): 10}
+    durations = data["summaries"]["stage_seconds"]
+    assert durations[(('stage', 'cards'), ('status', 'ok'))][0] == 1
+    assert durations[(('stage', 'cards'), ('status', 'error'))][0] == 1
+
+
+def test_disabled_metrics_record_nothing() -> None:
+    """Тестирование выключенных замеров: реестр не заполняется."""
+    metrics.registry.clear()
+
+    @timed('noop')
+    def double(value: int) -> int:
+        return value * 2
+
+    with stage('cards') as measured:
+        measured.add_rows(10)
+    record_cache('operations', True)
+
+    assert double(2) == 4
+    assert metrics.registry.snapshot() == {"counters": {}, "summaries": {}}
+
+
+def test_timed_and_cache_render_prometheus(enabled_metrics: MetricsRegistry) -> None:
+    """Тестирование декоратора, счетчиков кэша и текстового формата Prometheus."""
+    @timed('search')
+    def search(query: str) -> str:
+        return query
+
+    assert search('Колхоз') == 'Колхоз'
+    record_cache('operations', True)
+    record_cache('operations', False)
+    record_cache('operations', True)
+
+    text = enabled_metrics.render_prometheus()
+    assert '# TYPE projectone_cache_requests_total counter' in text
+    assert 'projectone_cache_requests_total{cache="operations",result="hit"} 2' in text
+    assert 'projectone_cache_requests_total{cache="operations",result="miss"} 1' in text
+    assert 'projectone_stage_seconds_count{stage="search",status="ok"} 1' in text
+
+
+def test_prometheus_label_values_are_escaped(enabled_metrics: MetricsRegistry) -> None:
+    """Обратная косая черта, кавычки и перевод строки в значении метки экранируются."""
+    enabled_metrics.inc('errors_total', stage='путь C:\\data "операции"\nстрока 2')
+
+    text = enabled_metrics.render_prometheus()
+    assert 'projectone_errors_total{stage="путь C:\\\\data \\"операции\\"\\nстрока 2"} 1' in text
+
+
+def test_timed_writes_profile(enabled_metrics: MetricsRegistry, tmp_path: str,
+                              monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тестирование сохранения профиля cProfile для каждого вызова."""
+    monkeypatch.setattr(metrics, 'METRICS_PROFILE_DIR', str(tmp_path))
+
+    @timed('profiled')
+    def work() -> int:
+        return sum(range(100))
+
+    assert work() == 4950
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].startswith('profiled-') and files[0].endswith('.prof')
@@ -0,0 +1,112 @@
+import os
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from src.operations import clear_operations_cache, load_operations, normalize_operations
+
+
+@pytest.fixture(autouse=True)
+def clean_cache() -> Any:
+    """Очистка кэша операций до и после каждого теста."""
+    clear_operations_cache()
+    yield
+    clear_operations_cache()
+
+
+@pytest.fixture
+def operations_file(tmp_path: Path) -> str:
+    """Создание временного файла с операциями."""
+    file_path = tmp_path / "operations.xlsx"
+    file_path.write_bytes(b"placeholder")
+    return str(file_path)
+
+
+@pytest.fixture
+def raw_operations() -> pd.DataFrame:
+    """Операции в том виде, в котором они читаются из Excel."""
+    return pd.DataFrame({
+        'Дата операции': ['31.12.2021 16:44:00', '2021-12-30 10:00:00'],
+        'Дата платежа': ['31.12.2021', '30.12.2021'],
+        'Сумма операции': ['-160.89', -64.0],
+        'Категория': ['Супермаркеты', None],
+    })
+
+
+def test_normalize_operations(raw_operations: pd.DataFrame) -> None:
+    """Тестирование приведения типов столбцов."""
+    df = normalize_operations(raw_operations)
+
+    assert df['Дата операции'].tolist() == [pd.Timestamp('2021-12-31 16:44:00'), pd.Timestamp('2021-12-30 10:00:00')]
+    assert df['Дата платежа'].iloc[0] == pd.Timestamp('2021-12-31')
+    assert df['Сумма операции'].tolist() == [-160.89, -64.0]
+    assert pd.isna(df['Категория'].iloc[1])
+
+
+def test_load_operations_reads_file_once(mocker: MockerFixture, operations_file: str,
+                                         raw_operations: pd.DataFrame) -> None:
+    """Повторная загрузка неизмененного файла не читает Excel заново."""
+    mock_read_excel = mocker.patch('pandas.read_excel', return_value=raw_operations)
+
+    first = load_operations(operations_file)
+    second = load_operations(operations_file)
+
+    assert first is second
+    mock_read_excel.assert_called_once()
+
+
+def test_load_operations_reloads_changed_file(mocker: MockerFixture, operations_file: str,
+                                              raw_operations: pd.DataFrame) -> None:
+    """Изменение файла сбрасывает кэш."""
+    mock_read_excel = mocker.patch('pandas.read_excel', side_effect=[raw_operations, raw_operations.copy()])
+
+    load_operations(operations_file)
+    with open(operations_file, 'ab') as f:
+        f.write(b"new export")
+    load_operations(operations_file)
+
+    assert mock_read_excel.call_count == 2
+
+
+def test_load_operations_keeps_previous_version_on_error(mocker: MockerFixture, operations_file: str,
+                                                         raw_operations: pd.DataFrame) -> None:
+    """Если измененный файл не читается, отдается прежняя версия; та же версия файла не разбирается повторно."""
+    mocker.patch('src.operations.DISK_CACHE_ENABLED', False)
+    mock_read_excel = mocker.patch('pandas.read_excel',
+                                   side_effect=[raw_operations, ValueError("File is not a zip file"),
+                                                raw_operations.copy()])
+
+    first = load_operations(operations_file)
+    with open(operations_file, 'ab') as f:
+        f.write(b"partial write")
+
+    assert load_operations(operations_file) is first
+    assert load_operations(operations_file) is first
+    assert mock_read_excel.call_count == 2
+
+    with open(operations_file, 'ab') as f:
+        f.write(b" complete")
+    assert load_operations(operations_file) is not first
+    assert mock_read_excel.call_count == 3
+
+
+def test_load_operations_file_not_found() -> None:
+    """Тестирование загрузки несуществующего файла."""
+    with pytest.raises(FileNotFoundError):
+        load_operations(os.path.join("missing", "operations.xlsx"))
+
+
+def test_load_operations_uses_disk_cache(mocker: MockerFixture, operations_file: str,
+                                         raw_operations: pd.DataFrame) -> None:
+    """Новый процесс берет операции из колоночного кэша, а не из Excel."""
+    mock_read_excel = mocker.patch('pandas.read_excel', return_value=raw_operations)
+    first = load_operations(operations_file)
+    clear_operations_cache()
+
+    second = load_operations(operations_file)
+
+    mock_read_excel.assert_called_once()
+    pd.testing.assert_frame_equal(second, first)
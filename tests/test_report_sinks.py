@@ -0,0 +1,108 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from src.report_sinks import BackgroundWriter, FileSink, JsonLinesSink, TemplateFileSink, flush_reports, get_writer
+from src.reports import log_report_result
+
+
+def test_file_sink_keeps_last_report(tmp_path: Path) -> None:
+    """Файл перезаписывается последним отчетом из пачки."""
+    path = tmp_path / "report.json"
+    writer = BackgroundWriter(FileSink(str(path)))
+
+    writer.submit("report", {"n": 1})
+    writer.submit("report", {"n": 2})
+    writer.close()
+
+    assert json.loads(path.read_text(encoding='utf-8')) == {"n": 2}
+
+
+def test_json_lines_sink_appends(tmp_path: Path) -> None:
+    """Отчеты дописываются построчно вместе с именем отчета."""
+    path = tmp_path / "reports.jsonl"
+    writer = BackgroundWriter(JsonLinesSink(str(path)), fsync='always')
+
+    for n in range(3):
+        writer.submit("spending", {"n": n})
+    writer.flush()
+
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [line["result"] for line in lines] == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert lines[0]["report"] == "spending"
+    writer.close()
+
+
+def test_template_file_sink_one_file_per_report(tmp_path: Path) -> None:
+    """Каждый отчет пишется в свой файл по шаблону имени."""
+    writer = BackgroundWriter(TemplateFileSink(str(tmp_path / "out" / "{report}_{seq}.json")), fsync='never')
+
+    writer.submit("spending", {"n": 1})
+    writer.submit("spending", {"n": 2})
+    writer.close()
+
+    assert sorted(os.listdir(tmp_path / "out")) == ["spending_1.json", "spending_2.json"]
+
+
+def test_template_file_sink_continues_numbering(tmp_path: Path) -> None:
+    """Новый приемник продолжает нумерацию после уже записанных файлов, а не перезаписывает их."""
+    template = str(tmp_path / "{report}_{seq}.json")
+    (tmp_path / "spending_7.json").write_text('{}', encoding='utf-8')
+    (tmp_path / "other.json").write_text('{}', encoding='utf-8')
+    writer = BackgroundWriter(TemplateFileSink(template), fsync='never')
+
+    writer.submit("cashback", {"n": 1})
+    writer.close()
+
+    assert json.loads((tmp_path / "cashback_8.json").read_text(encoding='utf-8')) == {"n": 1}
+    assert (tmp_path / "spending_7.json").read_text(encoding='utf-8') == '{}'
+
+
+def test_submit_queues_copy_of_result(tmp_path: Path) -> None:
+    """В файл попадает результат на момент вызова, даже если его изменили до записи."""
+    path = tmp_path / "report.json"
+    writer = BackgroundWriter(FileSink(str(path)), flush_interval=0.2)
+    result: Dict[str, Any] = {"items": [1]}
+
+    writer.submit("report", result)
+    result["items"].append(2)
+    result["extra"] = True
+    writer.close()
+
+    assert json.loads(path.read_text(encoding='utf-8')) == {"items": [1]}
+
+
+def test_get_writer_uses_strictest_fsync(tmp_path: Path) -> None:
+    """Писатель приемника получает строжайшую из запрошенных политик fsync."""
+    sink = JsonLinesSink(str(tmp_path / "fsync.jsonl"))
+
+    assert get_writer(sink, 'never').fsync == 'never'
+    assert get_writer(sink, 'always').fsync == 'always'
+    assert get_writer(sink, 'batch').fsync == 'always'
+    with pytest.raises(ValueError):
+        get_writer(sink, 'sometimes')
+
+
+def test_unknown_fsync_policy(tmp_path: Path) -> None:
+    """Неизвестная политика fsync приводит к ошибке."""
+    with pytest.raises(ValueError):
+        BackgroundWriter(FileSink(str(tmp_path / "report.json")), fsync='sometimes')
+
+
+def test_log_report_result_with_sink_and_filename(tmp_path: Path) -> None:
+    """Декоратор пишет в заданный приемник, а аргумент filename не передается в функцию отчета."""
+    jsonl_path = tmp_path / "reports.jsonl"
+
+    @log_report_result(sink=JsonLinesSink(str(jsonl_path)))
+    def report(value: int) -> Dict[str, Any]:
+        return {"value": value}
+
+    assert report(1) == {"value": 1}
+    assert report(2, filename=str(tmp_path / "single.json")) == {"value": 2}
+    flush_reports()
+
+    assert len(jsonl_path.read_text(encoding='utf-8').splitlines()) == 1
+    assert json.loads((tmp_path / "single.json").read_text(encoding='utf-8')) == {"value": 2}
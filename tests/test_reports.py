@@ -1,9 +1,11 @@
 import unittest
+from datetime import datetime
 from unittest.mock import patch
 
 import pandas as pd
 
-from src.reports import spending_by_category
+from src.cube import snapshot_cube
+from src.reports import spending_by_category, spending_by_category_batch
 
 
 class TestSpendingByCategory(unittest.TestCase):
@@ -35,12 +37,81 @@ class TestSpendingByCategory(unittest.TestCase):
         self.assertEqual(result['date'], '2023-03-31')
 
     def test_spending_by_category_with_default_date(self) -> None:
-        result = spending_by_category(self.transactions, category='Еда', year=2023, month=3, day=31)
+        result = spending_by_category(self.transactions, category='Еда')
 
         self.assertEqual(result['category'], 'Еда')
-        self.assertEqual(result['total_spending'], -3300)
+        self.assertEqual(result['total_spending'], 0)
+        self.assertEqual(result['date'], datetime.now().strftime('%Y-%m-%d'))
 
-    def test_spending_by_category_invalid_date_format(self) -> None:
-        with patch('builtins.input', side_effect=['2023', '3', 'invalid-day']):
+    def test_spending_by_category_invalid_date(self) -> None:
+        with patch('builtins.input') as mock_input:
             with self.assertRaises(ValueError):
-                spending_by_category(self.transactions, category='Еда')
+                spending_by_category(self.transactions, category='Еда', year=2023, month=3, day=32)
+        mock_input.assert_not_called()
+
+    def test_spending_by_category_does_not_modify_transactions(self) -> None:
+        spending_by_category(self.transactions, category='Еда', year=2023, month=3, day=31)
+        self.assertEqual(self.transactions['Дата операции'].iloc[0], '01.01.2023 12:00:00')
+
+    def test_spending_by_category_uses_whole_days(self) -> None:
+        # Операция ровно в полночь следующего дня в траты за дату не входит, как и в пакетном расчете
+        transactions = pd.concat([self.transactions, pd.DataFrame({
+            'Категория': ['Еда'], 'Дата операции': ['01.04.2023 00:00:00'], 'Сумма операции': [-999]})])
+
+        with patch('src.reports.snapshot_cube', wraps=snapshot_cube) as cube:
+            result = spending_by_category(transactions, category='Еда', year=2023, month=3, day=31)
+
+        cube.assert_called_once()
+        self.assertEqual(result['total_spending'], -3300)
+        batch = spending_by_category_batch(transactions, [('Еда', '2023-03-31')])
+        self.assertEqual(result['total_spending'], batch['total_spending'].iloc[0])
+
+
+class TestSpendingByCategoryBatch(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.transactions = pd.DataFrame({
+            'Категория': ['Еда', 'Транспорт', 'Еда', 'Развлечения', 'Еда'],
+            'Дата операции': [
+                '01.01.2023 12:00:00',
+                '15.01.2023 12:00:00',
+                '20.02.2023 12:00:00',
+                '10.03.2023 12:00:00',
+                '01.04.2023 12:00:00'
+            ],
+            'Сумма операции': [-1000, -500, -1500, -2000, -800]
+        })
+
+    def test_batch_matches_single_reports(self) -> None:
+        pairs = [('Еда', '2023-03-31'), ('Еда', '2023-04-01'), ('Транспорт', '2023-01-14'), ('Техника', '2023-03-31')]
+
+        result = spending_by_category_batch(self.transactions, pairs)
+
+        expected = []
+        for category, date in pairs:
+            year, month, day = map(int, date.split('-'))
+            expected.append(spending_by_category(self.transactions, category, year, month, day)['total_spending'])
+        self.assertEqual(list(result.columns), ['category', 'date', 'total_spending'])
+        self.assertEqual(result['total_spending'].tolist(), expected)
+        self.assertEqual(expected, [-2500, -3300, 0, 0])
+
+    def test_batch_with_categories_and_date_range(self) -> None:
+        result = spending_by_category_batch(self.transactions, categories=['Еда', 'Развлечения'],
+                                            start='2023-03-30', end='2023-04-01')
+
+        self.assertEqual(len(result), 6)
+        self.assertEqual(result['total_spending'].tolist(), [-2500, -2500, -3300, -2000, -2000, -2000])
+        self.assertEqual(self.transactions['Дата операции'].iloc[0], '01.01.2023 12:00:00')
+
+    def test_batch_requires_pairs_or_range(self) -> None:
+        with self.assertRaises(ValueError):
+            spending_by_category_batch(self.transactions, categories=['Еда'])
+
+    def test_batch_and_single_round_the_same(self) -> None:
+        transactions = self.transactions.assign(**{'Сумма операции': [-0.1, -500, -0.2, -2000, -0.7]})
+
+        result = spending_by_category_batch(transactions, [('Еда', '2023-03-31')])
+        single = spending_by_category(transactions, 'Еда', 2023, 3, 31)['total_spending']
+
+        self.assertEqual(result['total_spending'].tolist(), [single])
+        self.assertEqual(single, -0.3)
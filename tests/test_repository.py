@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_category
+from src.operations import normalize_operations
+from src.repository import FrameRepository, SQLiteRepository, get_sqlite_repository
+from src.services import analyze_cashback_categories, search_transactions
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Операции в том виде, в котором они читаются из Excel."""
+    return pd.DataFrame({
+        'Дата операции': ['31.12.2021 16:44:00', '15.12.2021 10:00:00', '01.12.2021 12:00:00',
+                          '30.11.2021 18:00:00', '01.10.2021 09:00:00'],
+        'Дата платежа': ['31.12.2021', '15.12.2021', '01.12.2021', '30.11.2021', None],
+        'Номер карты': ['*7197', '*4556', '*7197', None, '*4556'],
+        'Сумма операции': [-160.89, -500.0, -64.0, -2000.0, -300.0],
+        'Категория': ['Супермаркеты', 'Аптеки', 'Супермаркеты', 'Переводы', 'Супермаркеты'],
+        'MCC': [5411.0, 5912.0, 5411.0, None, 5411.0],
+        'Описание': ['Колхоз', 'Аптека Вита', 'Магазин Колхозный', 'Перевод Иванову', 'Дикси'],
+    })
+
+
+@pytest.fixture
+def repository(operations: pd.DataFrame, tmp_path: Path) -> SQLiteRepository:
+    """База SQLite с операциями."""
+    return SQLiteRepository.from_frame(operations, str(tmp_path / "operations.sqlite"), chunk_size=2)
+
+
+def test_between_matches_frame(operations: pd.DataFrame, repository: SQLiteRepository) -> None:
+    """Выборка по датам и категориям совпадает с выборкой из DataFrame."""
+    frame = FrameRepository(operations)
+
+    windows = [('2021-12-01', '2021-12-31 16:44:00', None), (None, '2021-12-01', ['Супермаркеты'])]
+    for start, end, categories in windows:
+        expected = frame.between(start, end, categories).reset_index(drop=True)
+        # Целые типы зависят от пропусков в выборке (Int32 или int16), поэтому сравниваются значения
+        pd.testing.assert_frame_equal(repository.between(start, end, categories), expected, check_dtype=False,
+                                      check_categorical=False)
+
+
+def test_category_totals(operations: pd.DataFrame, repository: SQLiteRepository) -> None:
+    """Суммы по категориям за период."""
+    assert repository.category_totals('2021-12-01', '2021-12-31 23:59:59') == {'Аптеки': -500.0,
+                                                                               'Супермаркеты': -224.89}
+    assert repository.category_totals(categories=['Переводы']) == FrameRepository(operations).category_totals(
+        categories=['Переводы'])
+
+
+def test_services_on_repository(operations: pd.DataFrame, repository: SQLiteRepository) -> None:
+    """Анализ кешбэка, траты по категории и поиск дают те же результаты, что и по DataFrame."""
+    spending = getattr(spending_by_category, '__wrapped__', spending_by_category)
+    operations = normalize_operations(operations)
+
+    assert analyze_cashback_categories(2021, 12, repository) == analyze_cashback_categories(2021, 12, operations)
+    assert spending(repository, 'Супермаркеты', 2021, 12, 31) == spending(operations, 'Супермаркеты', 2021, 12, 31)
+    for query in ['колхоз', 'аптека вита', 'олхоз', 'ка', 'ека ви', 'нет такого']:
+        assert search_transactions(query, repository) == search_transactions(query, operations)
+    assert [row['Описание'] for row in json.loads(search_transactions('колхоз', repository))['transactions']] == [
+        'Колхоз', 'Магазин Колхозный']
+
+
+def test_get_sqlite_repository_from_csv(operations: pd.DataFrame, tmp_path: Path) -> None:
+    """База строится из файла пачками один раз на версию файла."""
+    file_path = tmp_path / "operations.csv"
+    operations.to_csv(file_path, index=False)
+
+    first = get_sqlite_repository(str(file_path), chunk_size=2)
+    second = get_sqlite_repository(str(file_path))
+
+    assert first.db_path == second.db_path
+    assert len(second.between()) == len(operations)
@@ -0,0 +1,92 @@
+import threading
+import time
+from pathlib import Path
+from typing import Any, List
+
+import pandas as pd
+import pytest
+
+from src.operations import clear_operations_cache, load_operations
+from src.reports import category_spending
+from src.response_cache import ResponseCache, response_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_caches(monkeypatch: pytest.MonkeyPatch) -> Any:
+    """Очистка кэшей операций и ответов, колоночный кэш на диске отключен."""
+    monkeypatch.setattr('src.operations.DISK_CACHE_ENABLED', False)
+    clear_operations_cache()
+    response_cache.clear()
+    yield
+    clear_operations_cache()
+    response_cache.clear()
+
+
+def write_operations(path: Path, amount: float) -> str:
+    """Файл с одной операцией в категории «Аптеки»."""
+    pd.DataFrame({
+        'Дата операции': ['31.12.2021 16:44:00'],
+        'Сумма операции': [amount],
+        'Категория': ['Аптеки'],
+        'Описание': ['Аптека'],
+    }).to_excel(path, index=False)
+    return str(path)
+
+
+def test_results_are_reused_until_file_changes(tmp_path: Path) -> None:
+    """Повторный запрос к той же версии файла берется из кэша, новая версия файла считается заново."""
+    file_path = write_operations(tmp_path / 'operations.xlsx', -100.0)
+    start, end = pd.Timestamp('2021-12-01'), pd.Timestamp('2022-01-01')
+
+    assert category_spending(load_operations(file_path), 'Аптеки', start, end) == -100.0
+    assert category_spending(load_operations(file_path), 'Аптеки', start, end) == -100.0
+    assert response_cache.stats()["hits"] == 1
+
+    write_operations(tmp_path / 'operations.xlsx', -250.5)
+    assert category_spending(load_operations(file_path), 'Аптеки', start, end) == -250.5
+    assert response_cache.stats()["invalidated"] == 1
+    # DataFrame не из кэша операций не запоминается
+    category_spending(load_operations(file_path).copy(), 'Аптеки', start, end)
+    assert response_cache.stats()["size"] == 1
+
+
+def test_concurrent_requests_are_coalesced() -> None:
+    """Одновременные одинаковые запросы ждут одного вычисления."""
+    cache = ResponseCache()
+    snapshot = pd.DataFrame()
+    calls: List[int] = []
+    results: List[int] = []
+
+    def compute() -> int:
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get('a.xlsx', snapshot, 'key', compute)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_errors_are_not_cached_and_size_is_bounded() -> None:
+    """Ошибка вычисления не запоминается, старые записи вытесняются."""
+    cache = ResponseCache(max_size=2)
+    snapshot = pd.DataFrame()
+
+    def fail() -> int:
+        raise ValueError("нет данных")
+
+    with pytest.raises(ValueError):
+        cache.get('a.xlsx', snapshot, 'key', fail)
+    assert cache.get('a.xlsx', snapshot, 'key', lambda: 1) == 1
+
+    cache.get('a.xlsx', snapshot, 'other', lambda: 2)
+    cache.get('a.xlsx', snapshot, 'third', lambda: 3)
+    assert cache.stats()["size"] == 2
+    assert cache.get('a.xlsx', snapshot, 'key', lambda: 10) == 10
@@ -0,0 +1,102 @@
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping
+
+import pandas as pd
+import pytest
+
+from src.operations import clear_operations_cache
+from src.runner import run_analyses
+
+
+@pytest.fixture(autouse=True)
+def clean_cache() -> Any:
+    """Очистка кэша операций до и после каждого теста."""
+    clear_operations_cache()
+    yield
+    clear_operations_cache()
+
+
+@pytest.fixture
+def operations_files(tmp_path: Path) -> List[str]:
+    """Два файла операций и один поврежденный файл."""
+    paths = []
+    for number, amount in enumerate([-1000.0, -3000.0]):
+        path = tmp_path / f"operations_{number}.xlsx"
+        pd.DataFrame({
+            'Дата операции': ['31.12.2021 16:44:00', '15.12.2021 10:00:00'],
+            'Номер карты': ['*7197', '*7197'],
+            'Сумма операции': [amount, -200.0],
+            'Сумма платежа': [amount, -200.0],
+            'Категория': ['Супермаркеты', 'Аптеки'],
+            'Описание': ['Колхоз', 'Ригла'],
+        }).to_excel(path, index=False)
+        paths.append(str(path))
+    broken = tmp_path / "broken.xlsx"
+    broken.write_bytes(b"not a workbook")
+    paths.append(str(broken))
+    return paths
+
+
+def slow_analysis(df: pd.DataFrame, task: Mapping[str, Any]) -> int:
+    """Анализ, который не укладывается в ограничение времени."""
+    time.sleep(5)
+    return len(df)
+
+
+def crash_analysis(df: pd.DataFrame, task: Mapping[str, Any]) -> int:
+    """Анализ, который аварийно завершает процесс для задачи с 'crash'."""
+    if task.get('crash'):
+        os._exit(1)
+    time.sleep(0.2)
+    return len(df)
+
+
+def test_run_analyses_isolates_errors(operations_files: List[str]) -> None:
+    """Ошибка в одном файле не мешает анализу остальных."""
+    tasks = [{"file_path": path, "date": "2021-12-31 16:44:00", "category": "Супермаркеты"}
+             for path in operations_files]
+
+    results = run_analyses(tasks, ['cashback', 'spending'], workers=0)
+
+    assert [(result["task"], result["analysis"], result["status"]) for result in results] == [
+        (0, 'cashback', 'ok'), (0, 'spending', 'ok'), (1, 'cashback', 'ok'), (1, 'spending', 'ok'),
+        (2, 'cashback', 'error'), (2, 'spending', 'error'),
+    ]
+    assert results[0]["result"] == {"Супермаркеты": 10.0, "Аптеки": 2.0}
+    assert results[3]["result"]["total_spending"] == -3000.0
+
+
+def test_run_analyses_timeout(operations_files: List[str]) -> None:
+    """Задача, превысившая время, завершается с ошибкой timeout."""
+    results = run_analyses(operations_files[:1], [slow_analysis], workers=0, timeout=0.2)
+
+    assert results[0]["status"] == "timeout"
+    assert results[0]["analysis"] == "slow_analysis"
+    assert results[0]["seconds"] < 2
+
+
+def test_run_analyses_in_process_pool(operations_files: List[str]) -> None:
+    """Анализы в пуле процессов совпадают с выполнением в текущем процессе."""
+    tasks = [{"file_path": path, "date": "2021-12-31 16:44:00"} for path in operations_files]
+
+    pooled = run_analyses(tasks, ['cashback'], workers=2)
+    inline = run_analyses(tasks, ['cashback'], workers=0)
+
+    assert [result.get("result") for result in pooled] == [result.get("result") for result in inline]
+    assert [result["status"] for result in pooled] == ['ok', 'ok', 'error']
+
+
+def test_run_analyses_survives_worker_crash(operations_files: List[str]) -> None:
+    """Аварийное завершение процесса пула роняет только свою задачу, остальные выполняются."""
+    tasks: List[Dict[str, Any]] = [
+        {"file_path": operations_files[0]}, {"file_path": operations_files[1], "crash": True},
+        {"file_path": operations_files[1]}, {"file_path": operations_files[0]},
+    ]
+
+    results = run_analyses(tasks, [crash_analysis], workers=2)
+
+    assert [result["status"] for result in results] == ['ok', 'error', 'ok', 'ok']
+    assert 'аварийно' in results[1]["error"]
+    assert [result.get("result") for result in results] == [2, None, 2, 2]
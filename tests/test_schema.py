@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from src.schema import apply_schema, concat_operations, memory_usage, validate_operations
+
+
+@pytest.fixture
+def raw_operations() -> pd.DataFrame:
+    """Операции в том виде, в котором они читаются из Excel."""
+    return pd.DataFrame({
+        'Дата операции': ['31.12.2021 16:44:00', '30.12.2021 10:00:00', '29.12.2021 09:15:00'] * 100,
+        'Дата платежа': ['31.12.2021', '30.12.2021', None] * 100,
+        'Номер карты': ['*7197', '*5091', None] * 100,
+        'Статус': ['OK', 'OK', 'FAILED'] * 100,
+        'Сумма операции': [-160.89, -64.0, 1000.0] * 100,
+        'Кэшбэк': [None, 1.0, 70.0] * 100,
+        'Категория': ['Супермаркеты', 'Супермаркеты', 'Пополнения'] * 100,
+        'MCC': [5411.0, 5411.0, None] * 100,
+        'Описание': ['Колхоз', 'Магнит', 'Пополнение'] * 100,
+        'Бонусы (включая кэшбэк)': [3, 1, 0] * 100,
+    })
+
+
+def test_apply_schema_types(raw_operations: pd.DataFrame) -> None:
+    """Тестирование приведения столбцов к компактным типам."""
+    df = apply_schema(raw_operations)
+
+    assert df['Дата операции'].dtype == 'datetime64[ns]'
+    assert df['Дата платежа'].isna().sum() == 100
+    assert df['Сумма операции'].dtype == 'float64'
+    assert df['Кэшбэк'].dtype == 'float32'
+    assert df['MCC'].dtype == 'Int32'
+    assert df['Бонусы (включая кэшбэк)'].dtype == 'int8'
+    for column in ['Номер карты', 'Статус', 'Категория', 'Описание']:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+    assert pd.isna(df['Номер карты'].iloc[2])
+    assert df['Категория'].cat.categories.tolist() == ['Пополнения', 'Супермаркеты']
+
+
+def test_apply_schema_reduces_memory(raw_operations: pd.DataFrame) -> None:
+    """Тестирование уменьшения занимаемой памяти."""
+    before = memory_usage(raw_operations)
+    after = memory_usage(apply_schema(raw_operations))
+
+    assert after * 3 < before
+
+
+def test_apply_schema_keeps_groupby_results(raw_operations: pd.DataFrame) -> None:
+    """Тестирование того, что суммы по категориям не меняются после приведения типов."""
+    expected = raw_operations.groupby('Категория')['Сумма операции'].sum()
+
+    result = apply_schema(raw_operations).groupby('Категория', observed=True)['Сумма операции'].sum()
+
+    assert result.to_dict() == pytest.approx(expected.to_dict())
+
+
+def test_validate_operations_missing_columns() -> None:
+    """Тестирование проверки ожидаемых столбцов."""
+    problems = validate_operations(pd.DataFrame({'Дата операции': [], 'Категория': []}))
+
+    assert problems == ["Нет столбца 'Сумма операции'", "Нет столбца 'Описание'"]
+
+
+def test_apply_schema_keeps_fractional_integers(raw_operations: pd.DataFrame) -> None:
+    """Столбец целых с дробными значениями остается float64, проверка сообщает об этом."""
+    raw_operations['Округление на инвесткопилку'] = [0.5, 10.0, None] * 100
+
+    df = apply_schema(raw_operations)
+
+    assert df['Округление на инвесткопилку'].dtype == 'float64'
+    assert df['Округление на инвесткопилку'].iloc[0] == 0.5
+    assert df['Бонусы (включая кэшбэк)'].dtype == 'int8'
+    assert validate_operations(df) == ["В столбце 'Округление на инвесткопилку' есть дробные значения, "
+                                       "он хранится как float64"]
+
+
+def test_validate_operations_ok(raw_operations: pd.DataFrame) -> None:
+    """Тестирование проверки полного набора столбцов."""
+    assert validate_operations(raw_operations) == []
+
+
+def test_concat_operations_keeps_categories(raw_operations: pd.DataFrame) -> None:
+    """Склейка операций с новыми значениями категорий сохраняет категориальный тип."""
+    df = apply_schema(raw_operations.copy())
+    new_rows = apply_schema(raw_operations.head(2).assign(Категория=pd.Series(['Аптеки', None])))
+
+    result = concat_operations(df, new_rows)
+
+    assert len(result) == 302
+    assert result['Категория'].dtype == 'category'
+    assert result['Категория'].tail(3).tolist()[:2] == ['Пополнения', 'Аптеки']
+    assert pd.isna(result['Категория'].iloc[-1])
+    assert result['Сумма операции'].dtype == df['Сумма операции'].dtype
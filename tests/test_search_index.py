@@ -0,0 +1,122 @@
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from src.operations import clear_operations_cache
+from src.search_index import SearchIndex, clear_search_index_cache, get_search_index, snapshot_search_index, tokenize
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Операции с описаниями на кириллице и латинице."""
+    return pd.DataFrame({
+        'Описание': ['Покупка в магазине', 'Оплата за услуги', 'Магазин у дома', 'Yandex Go', None],
+        'Категория': ['Еда', 'Коммунальные услуги', 'Супермаркеты', 'Такси', 'Переводы'],
+    })
+
+
+@pytest.fixture(autouse=True)
+def clean_cache() -> Any:
+    """Очистка кэшей операций и индексов."""
+    clear_operations_cache()
+    clear_search_index_cache()
+    yield
+    clear_operations_cache()
+    clear_search_index_cache()
+
+
+def test_tokenize() -> None:
+    """Слова выделяются без учета регистра, знаки препинания отбрасываются."""
+    assert tokenize("ЖКУ Дом, Yandex.Go") == ["жку", "дом", "yandex", "go"]
+
+
+def test_search_prefix_and_ranking(operations: pd.DataFrame) -> None:
+    """Точное слово ранжируется выше совпадения по префиксу."""
+    index = SearchIndex(operations)
+
+    assert index.search("магазин") == [2, 0]
+    assert index.search("МАГАЗ") == [0, 2]
+
+
+def test_search_all_words_required(operations: pd.DataFrame) -> None:
+    """Строка должна содержать все слова запроса, в описании или категории."""
+    index = SearchIndex(operations)
+
+    assert index.search("yandex такси") == [3]
+    assert index.search("yandex еда") == []
+
+
+def test_search_substring_fallback(operations: pd.DataFrame) -> None:
+    """Если слова не найдены, запрос ищется как подстрока, без интерпретации как регулярного выражения."""
+    index = SearchIndex(operations)
+
+    assert index.search("газин") == [0, 2]
+    assert index.search("(") == []
+
+
+def test_search_combines_prefix_and_substring_matches() -> None:
+    """Совпадения по префиксу слова дополняются строками, где запрос встречается внутри слова."""
+    index = SearchIndex(pd.DataFrame({'Описание': ['Кафетерий', 'Антикафе Циферблат', 'Кафе Пушкин', 'Магнит'],
+                                      'Категория': ['Еда', 'Досуг', 'Рестораны', 'Супермаркеты']}))
+
+    assert index.search("кафе") == [2, 0, 1]
+    assert index.search("кафе пушкин") == [2]
+    assert index.search("пушкин кафе") == [2]
+    assert index.search("икафе циф") == [1]
+
+
+def test_search_word_uses_vocabulary(mocker: MockerFixture, operations: pd.DataFrame) -> None:
+    """Запрос из одного слова ищется по словарю индекса, а запрос из нескольких слов проверяет только кандидатов."""
+    index = SearchIndex(operations)
+    scan = mocker.spy(index, '_search_substring')
+
+    assert index.search("газин") == [0, 2]
+    scan.assert_not_called()
+    assert index.search("н у до") == [2]
+    assert scan.call_args.args[1] == {2}
+
+
+def test_get_search_index_is_reused_and_persisted(mocker: MockerFixture, tmp_path: Path,
+                                                  operations: pd.DataFrame) -> None:
+    """Индекс строится один раз на версию файла и читается с диска в новом процессе."""
+    file_path = tmp_path / "operations.xlsx"
+    file_path.write_bytes(b"export")
+    mocker.patch('pandas.read_excel', return_value=operations)
+    build = mocker.spy(SearchIndex, '__init__')
+
+    _, first = get_search_index(str(file_path))
+    _, second = get_search_index(str(file_path))
+    clear_operations_cache()
+    clear_search_index_cache()
+    _, restored = get_search_index(str(file_path))
+
+    assert first is second
+    assert build.call_count == 1
+    assert restored.search("магазин") == [2, 0]
+
+
+def test_extended_index_matches_rebuilt(operations: pd.DataFrame) -> None:
+    """Дополненный индекс совпадает с построенным заново, прежний индекс не меняется."""
+    index = SearchIndex(operations)
+    new_rows = pd.DataFrame({'Описание': ['Магазин Ригла'], 'Категория': ['Аптеки']})
+
+    extended = index.extended(new_rows)
+    rebuilt = SearchIndex(pd.concat([operations, new_rows], ignore_index=True))
+
+    assert (extended.tokens, extended.postings, extended.texts) == (rebuilt.tokens, rebuilt.postings, rebuilt.texts)
+    assert extended.search("магазин") == [2, 5, 0]
+    assert index.search("магазин") == [2, 0]
+
+
+def test_frame_index_is_reused(mocker: MockerFixture, operations: pd.DataFrame) -> None:
+    """Индекс DataFrame, который не является снимком файла, строится один раз на DataFrame."""
+    build = mocker.spy(SearchIndex, '__init__')
+
+    first = snapshot_search_index(operations)
+
+    assert snapshot_search_index(operations) is first
+    assert snapshot_search_index(operations.copy()) is not first
+    assert build.call_count == 2
@@ -0,0 +1,122 @@
+import json
+import threading
+from typing import Any, Iterator, Tuple
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from src.server import PooledHTTPServer, SnapshotWatcher
+
+
+@pytest.fixture
+def server_url() -> Iterator[str]:
+    """Запуск сервера на свободном локальном порту."""
+    server = PooledHTTPServer(("127.0.0.1", 0), workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url: str) -> Tuple[int, Any]:
+    """GET запрос, возвращает статус и разобранный JSON ответа."""
+    try:
+        with urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read().decode('utf-8'))
+    except HTTPError as e:
+        return e.code, json.loads(e.read().decode('utf-8'))
+
+
+def test_search_endpoint(server_url: str, mocker: MockerFixture) -> None:
+    """Тестирование поиска через HTTP."""
+    search = mocker.patch('src.server.search_transactions', return_value='{"transactions": []}')
+
+    assert get(f"{server_url}/search?q={quote('Колхоз')}") == (200, {"transactions": []})
+    search.assert_called_once_with('Колхоз', offset=0, limit=None)
+
+
+def test_search_endpoint_pages_and_stream(server_url: str, mocker: MockerFixture) -> None:
+    """Тестирование страниц и потоковой выдачи результатов поиска."""
+    search = mocker.patch('src.server.search_transactions', return_value='{"transactions": []}')
+    mocker.patch('src.server.iter_search_transactions', return_value=iter(['{"transactions":[', '{"a":1}', ']}']))
+
+    assert get(f"{server_url}/search?q=a&offset=10&limit=5")[0] == 200
+    search.assert_called_once_with('a', offset=10, limit=5)
+    assert get(f"{server_url}/search?q=a&limit=-1")[0] == 400
+    assert get(f"{server_url}/search?q=a&stream=1") == (200, {"transactions": [{"a": 1}]})
+
+
+def test_series_endpoint(server_url: str, mocker: MockerFixture) -> None:
+    """Тестирование рядов трат через HTTP и проверки параметров."""
+    series = pd.DataFrame({'card': ['*7197'], 'period': [pd.Timestamp('2021-12-01')], 'amount': [-100.0]})
+    spending_series = mocker.patch('src.server.spending_series', return_value=series)
+
+    status, body = get(f"{server_url}/series?freq=week&by=card&start=2021-12-01")
+    assert (status, body) == (200, {"series": [{"card": "*7197", "period": "2021-12-01", "amount": -100.0}]})
+    assert spending_series.call_args.args[1:3] == ('week', 'card')
+    assert get(f"{server_url}/series?freq=year")[0] == 400
+    assert get(f"{server_url}/series?start=31.12.2021")[0] == 400
+
+
+def test_cashback_endpoint(server_url: str, mocker: MockerFixture) -> None:
+    """Тестирование анализа кешбэка через HTTP и проверки параметров."""
+    mocker.patch('src.server.analyze_cashback_categories', return_value='{"Супермаркеты": 1.5}')
+
+    assert get(f"{server_url}/cashback?year=2021&month=12") == (200, {"Супермаркеты": 1.5})
+    assert get(f"{server_url}/cashback?year=2021&month=13")[0] == 400
+    assert get(f"{server_url}/cashback?year=abc&month=1")[0] == 400
+
+
+def test_spending_endpoint(server_url: str, mocker: MockerFixture) -> None:
+    """Тестирование трат по категории через HTTP."""
+    df = pd.DataFrame({'Дата операции': pd.to_datetime(['2021-12-30 10:00:00']),
+                       'Категория': ['Аптеки'], 'Сумма операции': [-500.0]})
+    mocker.patch('src.server.operations.load_operations', return_value=df)
+    get_writer = mocker.patch('src.reports.get_writer')
+
+    status, body = get(f"{server_url}/spending?category={quote('Аптеки')}&year=2021&month=12&day=31")
+
+    assert status == 200
+    assert body == {"category": "Аптеки", "total_spending": -500.0, "date": "2021-12-31"}
+    get_writer.assert_not_called()
+    assert get(f"{server_url}/spending?year=2021")[0] == 400
+    assert get(f"{server_url}/spending?category={quote('Аптеки')}&year=2021&month=13")[0] == 400
+    assert get(f"{server_url}/spending?category={quote('Аптеки')}&year=2021&month=2&day=30")[0] == 400
+
+
+def test_home_endpoint_errors(server_url: str, mocker: MockerFixture) -> None:
+    """Тестирование ошибок: неверная дата, ошибка обработчика, неизвестный адрес."""
+    mocker.patch('src.server.base_func_module_one', side_effect=ValueError("EXCHANGE_RATES_API_KEY не установлен."))
+
+    assert get(f"{server_url}/home?date=31.12.2021")[0] == 400
+    assert get(f"{server_url}/home?date={quote('2021-12-31 10:00:00')}") == (
+        500, {"error": "EXCHANGE_RATES_API_KEY не установлен."})
+    assert get(f"{server_url}/unknown")[0] == 404
+
+
+def test_snapshot_watcher_keeps_old_version_on_error(mocker: MockerFixture) -> None:
+    """Тестирование перезагрузки данных при изменении файла."""
+    warm_up = mocker.patch('src.server.warm_up', side_effect=['v1', OSError("file is busy"), 'v2'])
+    watcher = SnapshotWatcher()
+
+    watcher.check()
+    assert watcher.version == 'v1'
+    watcher.check()
+    assert watcher.version == 'v1'
+    watcher.check()
+    assert watcher.version == 'v2'
+    assert warm_up.call_count == 3
+
+
+def test_metrics_endpoint(server_url: str) -> None:
+    """Тестирование вывода показателей в текстовом формате Prometheus."""
+    with urlopen(f"{server_url}/metrics", timeout=5) as response:
+        assert response.headers['Content-Type'].startswith('text/plain')
+        body = response.read().decode('utf-8')
+
+    assert 'projectone_market_cache{counter="size"}' in body
@@ -5,14 +5,21 @@ from unittest.mock import patch
 
 import pandas as pd
 
-from src.services import analyze_cashback_categories, search_transactions
+from src.encoding import dumps
+from src.operations import clear_operations_cache
+from src.services import analyze_cashback_categories, iter_search_transactions, search_transactions
 
 
 class TestAnalyzeCashbackCategories(unittest.TestCase):
 
+    def setUp(self) -> None:
+        clear_operations_cache()
+        disk_cache_patcher = patch('src.operations.DISK_CACHE_ENABLED', False)
+        disk_cache_patcher.start()
+        self.addCleanup(disk_cache_patcher.stop)
+
     @patch('pandas.read_excel')
-    @patch('builtins.input', side_effect=['2021', '12'])
-    def test_analyze_cashback_categories_success(self, mock_input: Any, mock_read_excel: Any) -> None:
+    def test_analyze_cashback_categories_success(self, mock_read_excel: Any) -> None:
         test_data = {
             'Дата операции': ['31.12.2021 16:44:00', '30.12.2021 10:00:00', '01.01.2022 12:00:00'],
             'Категория': ['Еда', 'Транспорт', 'Зарплата'],
@@ -21,22 +28,20 @@ class TestAnalyzeCashbackCategories(unittest.TestCase):
         df = pd.DataFrame(test_data)
         mock_read_excel.return_value = df
 
-        result = analyze_cashback_categories()
+        result = analyze_cashback_categories(2021, 12)
 
         expected_result = json.dumps({'Еда': 10.0, 'Транспорт': 5.0}, ensure_ascii=False)
         self.assertEqual(result, expected_result)
 
     @patch('pandas.read_excel', side_effect=Exception("Ошибка чтения файла"))
-    @patch('builtins.input', side_effect=['2021', '12'])
-    def test_analyze_cashback_categories_file_read_error(self, mock_input: Any, mock_read_excel: Any) -> None:
-        result = analyze_cashback_categories()
+    def test_analyze_cashback_categories_file_read_error(self, mock_read_excel: Any) -> None:
+        result = analyze_cashback_categories(2021, 12)
 
         expected_result = json.dumps({"error": "Ошибка чтения файла"}, ensure_ascii=False)
         self.assertEqual(result, expected_result)
 
     @patch('pandas.read_excel')
-    @patch('builtins.input', side_effect=['2021', '12'])
-    def test_analyze_cashback_categories_excluded_categories(self, mock_input: Any, mock_read_excel: Any) -> None:
+    def test_analyze_cashback_categories_excluded_categories(self, mock_read_excel: Any) -> None:
         test_data = {
             'Дата операции': ['31.12.2021 16:44:00', '30.12.2021 10:00:00'],
             'Категория': ['Зарплата', 'Переводы'],
@@ -45,14 +50,34 @@ class TestAnalyzeCashbackCategories(unittest.TestCase):
         df = pd.DataFrame(test_data)
         mock_read_excel.return_value = df
 
-        result = analyze_cashback_categories()
+        result = analyze_cashback_categories(2021, 12)
 
         expected_result = json.dumps({}, ensure_ascii=False)
         self.assertEqual(result, expected_result)
 
+    def test_analyze_cashback_categories_preloaded_data(self) -> None:
+        df = pd.DataFrame({
+            'Дата операции': ['31.12.2021 16:44:00', '30.11.2021 10:00:00'],
+            'Категория': ['Еда', 'Транспорт'],
+            'Сумма операции': [-1000, -500]
+        })
+
+        with patch('pandas.read_excel') as mock_read_excel:
+            result = analyze_cashback_categories(2021, 12, df)
+
+        mock_read_excel.assert_not_called()
+        self.assertEqual(result, json.dumps({'Еда': 10.0}, ensure_ascii=False))
+        self.assertEqual(df['Дата операции'].iloc[0], '31.12.2021 16:44:00')
+
 
 class TestSearchTransactions(unittest.TestCase):
 
+    def setUp(self) -> None:
+        clear_operations_cache()
+        disk_cache_patcher = patch('src.operations.DISK_CACHE_ENABLED', False)
+        disk_cache_patcher.start()
+        self.addCleanup(disk_cache_patcher.stop)
+
     @patch('pandas.read_excel')
     def test_search_transactions_success(self, mock_read_excel: Any) -> None:
         test_data = {
@@ -66,11 +91,11 @@ class TestSearchTransactions(unittest.TestCase):
         query = "магазин"
         result = search_transactions(query)
 
-        expected_result = json.dumps({
+        expected_result = dumps({
             "transactions": [
                 {"Описание": "Покупка в магазине", "Категория": "Еда", "Сумма операции": -1000}
             ]
-        }, ensure_ascii=False)
+        })
 
         self.assertEqual(result, expected_result)
 
@@ -79,7 +104,7 @@ class TestSearchTransactions(unittest.TestCase):
         query = "магазин"
         result = search_transactions(query)
 
-        expected_result = json.dumps({"error": "Ошибка чтения файла"}, ensure_ascii=False)
+        expected_result = dumps({"error": "Ошибка чтения файла"})
         self.assertEqual(result, expected_result)
 
     @patch('pandas.read_excel')
@@ -95,7 +120,7 @@ class TestSearchTransactions(unittest.TestCase):
         query = "неизвестный запрос"
         result = search_transactions(query)
 
-        expected_result = json.dumps({"message": "Такого слова не было обнаружено."}, ensure_ascii=False)
+        expected_result = dumps({"message": "Такого слова не было обнаружено."})
 
         self.assertEqual(result, expected_result)
 
@@ -109,10 +134,39 @@ class TestSearchTransactions(unittest.TestCase):
         query = "магазин"
         result = search_transactions(query, sample_transactions)
 
-        expected_result = json.dumps({
+        expected_result = dumps({
             "transactions": [
                 {"Описание": "Покупка в магазине", "Категория": "Еда", "Сумма операции": -1000}
             ]
-        }, ensure_ascii=False)
+        })
+
+        self.assertEqual(result, expected_result)
+
+    def test_search_transactions_special_characters(self) -> None:
+        sample_transactions = [
+            {"Описание": "Оплата (онлайн)", "Категория": "Связь", "Сумма операции": -300},
+            {"Описание": "Перевод другу", "Категория": "Переводы", "Сумма операции": -200},
+        ]
+
+        result = search_transactions("(", sample_transactions)
+
+        expected_result = dumps({
+            "transactions": [
+                {"Описание": "Оплата (онлайн)", "Категория": "Связь", "Сумма операции": -300}
+            ]
+        })
 
         self.assertEqual(result, expected_result)
+
+    def test_search_transactions_pagination_and_stream(self) -> None:
+        sample_transactions = [
+            {"Описание": f"Колхоз {i}", "Категория": "Супермаркеты", "Сумма операции": -i} for i in range(5)
+        ]
+
+        page = json.loads(search_transactions("колхоз", sample_transactions, offset=1, limit=2))
+        self.assertEqual([row["Сумма операции"] for row in page["transactions"]], [-1, -2])
+        self.assertEqual((page["total"], page["offset"], page["limit"]), (5, 1, 2))
+
+        parts = list(iter_search_transactions("колхоз", sample_transactions, chunk_size=2))
+        self.assertEqual(len(parts), 5)
+        self.assertEqual("".join(parts), search_transactions("колхоз", sample_transactions))
@@ -0,0 +1,79 @@
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_category
+from src.services import analyze_cashback_categories
+from src.streaming import (CardTotals, SearchHits, TopTransactions, fold_chunks, iter_operation_chunks,
+                           stream_cashback, stream_home_page, stream_spending)
+from src.utils import get_top_transactions, process_card_data
+
+
+@pytest.fixture
+def raw_operations() -> pd.DataFrame:
+    """Операции в формате выгрузки банка."""
+    return pd.DataFrame({
+        'Дата операции': ['31.12.2021 16:44:00', '30.12.2021 10:00:00', '15.12.2021 09:00:00',
+                          '01.12.2021 12:00:00', '30.11.2021 18:00:00', '20.10.2021 11:00:00'],
+        'Номер карты': ['*7197', '*4556', '*7197', None, '*7197', '*4556'],
+        'Сумма операции': [-160.89, -500.0, -1000.0, -64.0, -2000.0, -300.0],
+        'Сумма платежа': [-160.89, -500.0, -1000.0, -64.0, -2000.0, -300.0],
+        'Категория': ['Супермаркеты', 'Аптеки', 'Супермаркеты', 'Переводы', 'Аптеки', 'Аптеки'],
+        'Описание': ['Колхоз', 'Аптека Вита', 'Магнит', 'Иван И.', 'Аптека Ригла', 'Аптека Вита'],
+    })
+
+
+@pytest.fixture(params=['xlsx', 'csv'])
+def operations_file(request: pytest.FixtureRequest, tmp_path: Path, raw_operations: pd.DataFrame) -> str:
+    """Файл операций в формате xlsx или csv."""
+    file_path = tmp_path / f"operations.{request.param}"
+    if request.param == 'csv':
+        raw_operations.to_csv(file_path, index=False)
+    else:
+        raw_operations.to_excel(file_path, index=False)
+    return str(file_path)
+
+
+def test_iter_operation_chunks_filters(operations_file: str) -> None:
+    """Пачки не больше заданного размера, фильтры по дате и категории применяются к каждой пачке."""
+    chunks = list(iter_operation_chunks(operations_file, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 2]
+    assert pd.api.types.is_datetime64_any_dtype(chunks[0]['Дата операции'])
+
+    filtered = pd.concat(iter_operation_chunks(operations_file, chunk_size=2, start=datetime(2021, 12, 1),
+                                               categories=['Аптеки', 'Супермаркеты']))
+    assert filtered['Описание'].tolist() == ['Колхоз', 'Аптека Вита', 'Магнит']
+
+
+def test_aggregators_match_in_memory_functions(operations_file: str, raw_operations: pd.DataFrame) -> None:
+    """Агрегаты по пачкам совпадают с расчетом по всему DataFrame."""
+    df = pd.concat(iter_operation_chunks(operations_file, chunk_size=100))
+
+    cards, top, hits = fold_chunks(iter_operation_chunks(operations_file, chunk_size=2),
+                                   [CardTotals(), TopTransactions(), SearchHits("аптека", limit=2)])
+
+    assert cards == process_card_data(df)
+    assert top == get_top_transactions(df)
+    assert hits['Описание'].tolist() == ['Аптека Вита', 'Аптека Ригла']
+
+
+def test_stream_reports(operations_file: str, raw_operations: pd.DataFrame) -> None:
+    """Отчеты по пачкам совпадают с обычными отчетами."""
+    home = stream_home_page(operations_file, datetime(2021, 12, 31, 20, 0), chunk_size=2)
+    assert [card["last_digits"] for card in home["cards"]] == ["7197", "4556"]
+
+    cashback = stream_cashback(operations_file, 2021, 12, excluded=['Переводы'], chunk_size=2)
+    # Пачки суммируются в другом порядке, поэтому суммы могут отличаться в последнем знаке
+    assert cashback == pytest.approx({'Супермаркеты': 11.6089, 'Аптеки': 5.0})
+    # Кешбэк не округляется, как и до перехода на куб агрегатов
+    assert analyze_cashback_categories(2021, 12, raw_operations) == \
+        '{"Супермаркеты": 11.608899999999998, "Аптеки": 5.0}'
+
+    spending = stream_spending(operations_file, 'Аптеки', 2021, 12, 31, chunk_size=2)
+    assert spending == spending_by_category(raw_operations, 'Аптеки', 2021, 12, 31)
+    # Суммы с копейками округляются так же, как в spending_by_category
+    spending = stream_spending(operations_file, 'Супермаркеты', 2021, 12, 31, chunk_size=1)
+    assert spending['total_spending'] == -1160.89
+    assert spending == spending_by_category(raw_operations, 'Супермаркеты', 2021, 12, 31)
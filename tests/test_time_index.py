@@ -0,0 +1,87 @@
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from src.time_index import TimeIndex, clear_time_index_cache, get_time_index, top_n
+
+
+@pytest.fixture(autouse=True)
+def clean_cache() -> Any:
+    """Очистка кэша индексов до и после каждого теста."""
+    clear_time_index_cache()
+    yield
+    clear_time_index_cache()
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """Операции в порядке выгрузки (от новых к старым)."""
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['2021-12-31 16:44:00', '2021-12-15 10:00:00', '2021-12-01 09:00:00',
+                                         '2021-11-30 18:00:00', 'NaT', '2021-11-01 00:00:00']),
+        'Номер карты': ['*7197', '*4556', '*7197', '*7197', '*4556', '*4556'],
+        'Сумма платежа': [-160.89, -500.0, -160.89, -2000.0, -10.0, -300.0],
+        'Категория': ['Супермаркеты', 'Аптеки', 'Супермаркеты', 'Переводы', 'Аптеки', 'Аптеки'],
+    })
+
+
+def test_window_matches_mask(operations: pd.DataFrame) -> None:
+    """Тестирование выборки за период по индексу."""
+    index = TimeIndex(operations)
+    start, end = pd.Timestamp('2021-11-30 18:00:00'), pd.Timestamp('2021-12-15 10:00:00')
+
+    expected = operations[(operations['Дата операции'] >= start) & (operations['Дата операции'] <= end)]
+
+    pd.testing.assert_frame_equal(index.window(start, end), expected)
+
+
+def test_month_to_date_reuses_month_slice(operations: pd.DataFrame) -> None:
+    """Тестирование повторного использования среза месяца для разных дат."""
+    index = TimeIndex(operations)
+
+    assert index.month_to_date(pd.Timestamp('2021-12-20')).index.tolist() == [1, 2]
+    month = index.month(2021, 12)
+    assert index.month_to_date(pd.Timestamp('2021-12-31 23:00:00')) is month
+    assert index.month_to_date(pd.Timestamp('2021-11-30')).index.tolist() == [5]
+    assert index.month_to_date(pd.Timestamp('2020-01-10')).empty
+
+
+def test_get_time_index_cached_per_frame(operations: pd.DataFrame) -> None:
+    """Тестирование построения индекса один раз для DataFrame."""
+    assert get_time_index(operations) is get_time_index(operations)
+    assert get_time_index(operations.copy()) is not get_time_index(operations)
+
+
+def test_top_n(operations: pd.DataFrame) -> None:
+    """Тестирование топ-N без группировки и с равными значениями."""
+    assert top_n(operations, 2).index.tolist() == [4, 0]
+    assert top_n(operations, 3).index.tolist() == [4, 0, 2]
+    assert top_n(operations, 2, keep='all').index.tolist() == [4, 0, 2]
+    pd.testing.assert_frame_equal(top_n(operations, 3), operations.nlargest(3, 'Сумма платежа'))
+
+
+def test_top_n_by_group(operations: pd.DataFrame) -> None:
+    """Тестирование топ-N в каждой группе."""
+    assert top_n(operations, 1, by='Номер карты').index.tolist() == [0, 4]
+    assert top_n(operations, 1, by='Номер карты', keep='all').index.tolist() == [0, 2, 4]
+    assert top_n(operations.iloc[:0], 1, by='Категория').empty
+
+
+def test_top_n_invalid_keep(operations: pd.DataFrame) -> None:
+    """Тестирование ошибки при неизвестном способе обработки равных значений."""
+    with pytest.raises(ValueError):
+        top_n(operations, keep='random')  # type: ignore[arg-type]
+
+
+def test_extended_index_matches_rebuilt(operations: pd.DataFrame) -> None:
+    """Тестирование дополнения индекса новыми строками без полной сортировки."""
+    new_rows = pd.DataFrame({'Дата операции': pd.to_datetime(['2021-12-15 10:00:00', 'NaT', '2021-10-01 00:00:00']),
+                             'Номер карты': ['*7197'] * 3, 'Сумма платежа': [-1.0] * 3, 'Категория': ['Такси'] * 3})
+    new_df = pd.concat([operations, new_rows], ignore_index=True)
+
+    extended = TimeIndex(operations).extended(new_df)
+    rebuilt = TimeIndex(new_df)
+
+    assert extended.positions.tolist() == rebuilt.positions.tolist()
+    assert extended.month(2021, 12).index.tolist() == [0, 1, 2, 6]
@@ -0,0 +1,86 @@
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.operations import clear_operations_cache, load_operations
+from src.response_cache import response_cache
+from src.timeseries import SpendingSeries, clear_series_cache, series_records, snapshot_series, spending_series
+
+
+@pytest.fixture(autouse=True)
+def clean_caches(monkeypatch: pytest.MonkeyPatch) -> Any:
+    """Очистка кэшей операций, рядов и ответов, колоночный кэш на диске отключен."""
+    monkeypatch.setattr('src.operations.DISK_CACHE_ENABLED', False)
+    clear_operations_cache()
+    clear_series_cache()
+    response_cache.clear()
+    yield
+    clear_operations_cache()
+    clear_series_cache()
+    response_cache.clear()
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """Операции за январь - март 2021 года по двум категориям и картам, в феврале Аптек нет."""
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['2021-01-05 10:00', '2021-01-20 12:00', '2021-01-31 23:00',
+                                         '2021-03-01 09:00', '2021-03-30 18:00', '2021-02-10 08:00']),
+        'Номер карты': ['*7197', '*7197', '*5091', '*5091', '*7197', '*5091'],
+        'Сумма операции': [-100.0, -200.0, -50.0, -300.0, -400.0, -80.0],
+        'Категория': ['Супермаркеты', 'Аптеки', 'Супермаркеты', 'Аптеки', 'Супермаркеты', 'Супермаркеты'],
+        'Описание': ['Колхоз', 'Аптека', 'Магнит', 'Аптека', 'Колхоз', 'Магнит'],
+    })
+
+
+def test_monthly_series_match_point_queries(transactions: pd.DataFrame) -> None:
+    """Суммы за месяцы, изменения и скользящие суммы совпадают с подсчетом по отдельным операциям."""
+    series = SpendingSeries.from_operations(transactions).resample('month', 'category')
+    pharmacy = series[series['category'] == 'Аптеки'].reset_index(drop=True)
+
+    assert pharmacy['period'].dt.strftime('%Y-%m-%d').tolist() == ['2021-01-01', '2021-02-01', '2021-03-01']
+    assert pharmacy['amount'].tolist() == [-200.0, 0.0, -300.0]
+    assert pharmacy['count'].tolist() == [1, 0, 1]
+    assert pharmacy['cashback'].tolist() == [2.0, 0.0, 3.0]
+    assert pharmacy['change'].tolist()[1:] == [200.0, -300.0]
+    assert np.isnan(pharmacy['change_pct'].iloc[0]) and np.isnan(pharmacy['change_pct'].iloc[2])
+
+    # Скользящие суммы на последний день периода - как фильтр операций по окну дат
+    for period, rolling_30d, rolling_90d in pharmacy[['period', 'rolling_30d', 'rolling_90d']].itertuples(index=False):
+        dates = transactions['Дата операции'].dt.normalize()
+        # Последний период заканчивается днем последней операции
+        last_day = min(period + pd.offsets.MonthEnd(0), dates.max())
+        in_category = transactions['Категория'] == 'Аптеки'
+        for window, value in ((30, rolling_30d), (90, rolling_90d)):
+            window_mask = in_category & (dates > last_day - pd.Timedelta(days=window)) & (dates <= last_day)
+            assert value == transactions.loc[window_mask, 'Сумма операции'].sum()
+
+
+def test_weekly_totals_and_date_bounds(transactions: pd.DataFrame) -> None:
+    """Недельный ряд по всем операциям: недели с понедельника, выдача ограничена периодами из [start, end]."""
+    series = SpendingSeries.from_operations(transactions).resample('week', 'total', windows=(7,),
+                                                                   start='2021-01-20', end='2021-02-01')
+
+    assert series['total'].unique().tolist() == ['Итого']
+    assert series['period'].dt.strftime('%Y-%m-%d').tolist() == ['2021-01-18', '2021-01-25', '2021-02-01']
+    assert series['amount'].tolist() == [-200.0, -50.0, 0.0]
+    assert series['rolling_7d'].tolist() == series['amount'].tolist()
+    assert series_records(series)[0]["period"] == '2021-01-18'
+    with pytest.raises(ValueError):
+        SpendingSeries.from_operations(transactions).resample('year')
+
+
+def test_series_are_cached_per_snapshot(transactions: pd.DataFrame, tmp_path: Path) -> None:
+    """Ряды строятся один раз на версию файла операций, повторный запрос берется из кэша ответов."""
+    path = tmp_path / 'operations.xlsx'
+    transactions.assign(**{'Дата операции': transactions['Дата операции'].dt.strftime('%d.%m.%Y %H:%M:%S')}) \
+        .to_excel(path, index=False)
+    df = load_operations(str(path))
+
+    first = spending_series(df, 'month', 'card')
+    assert spending_series(df, 'month', 'card') is first
+    assert snapshot_series(df) is snapshot_series(load_operations(str(path)))
+    assert first.groupby('card')['amount'].sum().to_dict() == {'*5091': -430.0, '*7197': -700.0}
@@ -59,6 +59,14 @@ def test_get_top_transactions(sample_data: pd.DataFrame) -> None:
     assert result[1]['Сумма платежа'] == -1000
 
 
+def test_get_top_transactions_by_card(sample_data: pd.DataFrame) -> None:
+    """Тестирование получения топ-транзакций по каждой карте."""
+    result = get_top_transactions(sample_data, n=1, by='Номер карты')
+
+    assert [(row['Номер карты'], row['Сумма платежа']) for row in result] == [
+        ('1234567890123456', -1000), ('9876543210987654', -1500)]
+
+
 def test_parse_date() -> None:
     """Тестирование преобразования строки даты в объект datetime."""
     date_str = "2023-01-01 12:00:00"
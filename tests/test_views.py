@@ -3,6 +3,7 @@ from unittest.mock import patch
 
 import pandas as pd
 
+from src import metrics
 from src.views import base_func_module_one
 
 # Пример данных для тестирования
@@ -70,3 +71,48 @@ def test_base_func_module_one_no_operations() -> None:
         }
 
         assert result == json.dumps(expected_response, ensure_ascii=False)
+
+
+def test_base_func_module_one_preloaded_data() -> None:
+    """Переданные операции и настройки не читаются из файлов повторно."""
+
+    with patch('src.views.load_user_settings') as mock_load_user_settings, \
+            patch('src.views.read_operations_data') as mock_read_operations_data, \
+            patch('src.views.EXCHANGE_RATES_API_KEY', "key"), \
+            patch('src.views.ALPHA_VANTAGE_API_KEY', "key"), \
+            patch('src.views.get_greeting', return_value="Доброе утро!"), \
+            patch('src.views.get_currency_rates', return_value=[]), \
+            patch('src.views.get_stock_prices', return_value=[]) as mock_get_stock_prices:
+        df = pd.DataFrame({
+            'Дата операции': pd.to_datetime(['2021-12-31 16:44:00', '2021-11-30 16:42:04']),
+            'Номер карты': ['*7197', '*7197'],
+            'Сумма операции': [-160.89, -64.00],
+            'Сумма платежа': [-160.89, -64.00],
+            'Категория': ['Супермаркеты', 'Супермаркеты'],
+            'Описание': ['Колхоз', 'Магнит'],
+        })
+        result = base_func_module_one("2021-12-31 20:00:00", df, {"user_stocks": ["AAPL"]})
+
+    mock_load_user_settings.assert_not_called()
+    mock_read_operations_data.assert_not_called()
+    mock_get_stock_prices.assert_called_once_with("key", ["AAPL"])
+    assert json.loads(result)["cards"] == [{"last_digits": "7197", "total_spent": -160.89, "cashback": 1.61}]
+
+
+def test_market_data_stages_are_timed_per_api() -> None:
+    """Курсы валют и цены акций замеряются отдельными этапами."""
+    metrics.registry.clear()
+    metrics.set_enabled(True)
+    try:
+        with patch('src.views.EXCHANGE_RATES_API_KEY', 'key'), patch('src.views.ALPHA_VANTAGE_API_KEY', 'key'), \
+                patch('src.views.month_operations_summary', return_value=([], [])), \
+                patch('src.views.get_currency_rates', return_value=[]), \
+                patch('src.views.get_stock_prices', return_value=[]):
+            base_func_module_one("2021-12-31 16:44:00", mock_filtered_df, mock_user_settings)
+
+        stages = {dict(labels)['stage'] for labels in metrics.registry.snapshot()["summaries"]["stage_seconds"]}
+    finally:
+        metrics.set_enabled(False)
+        metrics.registry.clear()
+
+    assert {'market_data', 'market_data.currency_rates', 'market_data.stock_prices'} <= stages